@@ -5,6 +5,7 @@ Ads Overview - Aggregated view across all platforms
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
+import asyncio
 from app.core.database import get_database
 from app.services.cache.redis_service import RedisService
 from app.services.aggregators.ads_aggregator import AdsAggregator
@@ -46,24 +47,25 @@ async def get_ads_overview(
         # Calculate date range
         dates = _calculate_date_range(date_range, start_date, end_date)
         
-        # Get aggregated data from all platforms
+        # Get aggregated data from all platforms, current and previous period
+        # (for comparison) concurrently
         aggregator = AdsAggregator()
-        aggregated_data = await aggregator.aggregate_all_platforms(
-            user_id=user_id,
-            start_date=dates['start_date'],
-            end_date=dates['end_date']
+        aggregated_data, previous_period_data = await asyncio.gather(
+            aggregator.aggregate_all_platforms(
+                user_id=user_id,
+                start_date=dates['start_date'],
+                end_date=dates['end_date']
+            ),
+            aggregator.aggregate_all_platforms(
+                user_id=user_id,
+                start_date=dates['previous_start_date'],
+                end_date=dates['previous_end_date']
+            )
         )
         
         # Calculate analytics
         analytics = AdsAnalytics()
         metrics = analytics.calculate_metrics(aggregated_data)
-        
-        # Get previous period for comparison
-        previous_period_data = await aggregator.aggregate_all_platforms(
-            user_id=user_id,
-            start_date=dates['previous_start_date'],
-            end_date=dates['previous_end_date']
-        )
         previous_metrics = analytics.calculate_metrics(previous_period_data)
         
         # Calculate trends
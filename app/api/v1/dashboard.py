@@ -4,7 +4,11 @@ Dashboard API - Unified dashboard endpoint combining all modules
 
 from fastapi import APIRouter, HTTPException, Query
 from typing import Dict, Any
-from app.services.aggregators.dashboard_aggregator import DashboardAggregator
+from app.services.aggregators.dashboard_aggregator import (
+    DashboardAggregator,
+    OVERVIEW_REDIS_KEY,
+    OVERVIEW_REDIS_TTL
+)
 from app.services.cache.redis_service import RedisService
 import logging
 
@@ -48,7 +52,7 @@ async def get_dashboard_overview(
     - Quick overview for dashboard widgets
     """
     try:
-        cache_key = f"dashboard:overview:{user_id}:{date_range}"
+        cache_key = OVERVIEW_REDIS_KEY.format(user_id=user_id, date_range=date_range)
         cached_data = await redis_service.get(cache_key)
         
         if cached_data:
@@ -58,8 +62,12 @@ async def get_dashboard_overview(
         aggregator = DashboardAggregator()
         dashboard_data = await aggregator.get_dashboard_overview(user_id, date_range)
         
+        # Don't cache a dashboard where every module failed
+        if dashboard_data.get("status") == "all_failed":
+            return dashboard_data
+        
         # Cache for 5 minutes
-        await redis_service.set(cache_key, dashboard_data, ttl=300)
+        await redis_service.set(cache_key, dashboard_data, ttl=OVERVIEW_REDIS_TTL)
         
         return dashboard_data
         
@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from app.core.database import get_database
 from app.services.cache.redis_service import RedisService
 from app.services.aggregators.email_aggregator import EmailAggregator
+from app.services.aggregators.dashboard_aggregator import DashboardAggregator
 from bson import ObjectId
 import logging
 
@@ -274,6 +275,8 @@ async def create_campaign(
         
         # Invalidate cache
         await redis_service.delete_pattern(f"email:campaigns:{user_id}:*")
+        await EmailAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         logger.info(f"Email campaign created: {result.inserted_id} for user {user_id}")
         
@@ -351,6 +354,8 @@ async def update_campaign(
         # Invalidate cache
         await redis_service.delete_pattern(f"email:campaign_details:{user_id}:{campaign_id}")
         await redis_service.delete_pattern(f"email:campaigns:{user_id}:*")
+        await EmailAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         return {
             "status": "success",
@@ -404,6 +409,8 @@ async def delete_campaign(
         
         # Invalidate cache
         await redis_service.delete_pattern(f"email:campaigns:{user_id}:*")
+        await EmailAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         return {
             "status": "success",
@@ -480,6 +487,8 @@ async def send_campaign(
         # Invalidate cache
         await redis_service.delete_pattern(f"email:campaign_details:{user_id}:{campaign_id}")
         await redis_service.delete_pattern(f"email:campaigns:{user_id}:*")
+        await EmailAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         logger.info(f"Campaign {campaign_id} sent for user {user_id}")
         
@@ -525,6 +534,8 @@ async def archive_campaign(
         
         # Invalidate cache
         await redis_service.delete_pattern(f"email:campaigns:{user_id}:*")
+        await EmailAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         return {
             "status": "success",
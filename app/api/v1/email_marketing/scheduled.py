@@ -7,6 +7,8 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 from app.core.database import get_database
 from app.services.cache.redis_service import RedisService
+from app.services.aggregators.email_aggregator import EmailAggregator
+from app.services.aggregators.dashboard_aggregator import DashboardAggregator
 from bson import ObjectId
 import logging
 
@@ -212,6 +214,8 @@ async def schedule_campaign(
         # Invalidate cache
         await redis_service.delete_pattern(f"email:scheduled:{user_id}:*")
         await redis_service.delete_pattern(f"email:campaigns:{user_id}:*")
+        await EmailAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         logger.info(f"Campaign {campaign_id} scheduled for {scheduled_datetime} by user {user_id}")
         
@@ -432,6 +436,8 @@ async def cancel_scheduled_campaign(
         # Invalidate cache
         await redis_service.delete_pattern(f"email:scheduled:{user_id}:*")
         await redis_service.delete_pattern(f"email:campaigns:{user_id}:*")
+        await EmailAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         logger.info(f"Scheduled campaign {schedule_id} cancelled by user {user_id}")
         
@@ -734,6 +740,8 @@ async def send_scheduled_campaign_now(
         # Invalidate cache
         await redis_service.delete_pattern(f"email:scheduled:{user_id}:*")
         await redis_service.delete_pattern(f"email:campaigns:{user_id}:*")
+        await EmailAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         logger.info(f"Scheduled campaign {schedule_id} sent immediately by user {user_id}")
         
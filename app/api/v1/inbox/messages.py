@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from app.core.database import get_database
 from app.services.cache.redis_service import RedisService
 from app.services.aggregators.inbox_aggregator import InboxAggregator
+from app.services.aggregators.dashboard_aggregator import DashboardAggregator
 from bson import ObjectId
 import logging
 
@@ -221,6 +222,8 @@ async def get_message_details(
         # Invalidate cache
         await redis_service.delete_pattern(f"inbox:messages:{user_id}:*")
         await redis_service.delete_pattern(f"inbox:stats:{user_id}:*")
+        await InboxAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         response = {
             "id": str(message['_id']),
@@ -283,6 +286,8 @@ async def mark_message_as_read(
         # Invalidate cache
         await redis_service.delete_pattern(f"inbox:messages:{user_id}:*")
         await redis_service.delete_pattern(f"inbox:stats:{user_id}:*")
+        await InboxAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         return {
             "status": "success",
@@ -325,6 +330,8 @@ async def mark_message_as_unread(
         # Invalidate cache
         await redis_service.delete_pattern(f"inbox:messages:{user_id}:*")
         await redis_service.delete_pattern(f"inbox:stats:{user_id}:*")
+        await InboxAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         return {
             "status": "success",
@@ -362,6 +369,8 @@ async def bulk_mark_as_read(
         # Invalidate cache
         await redis_service.delete_pattern(f"inbox:messages:{user_id}:*")
         await redis_service.delete_pattern(f"inbox:stats:{user_id}:*")
+        await InboxAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         return {
             "status": "success",
@@ -402,6 +411,8 @@ async def archive_message(
         # Invalidate cache
         await redis_service.delete_pattern(f"inbox:messages:{user_id}:*")
         await redis_service.delete_pattern(f"inbox:stats:{user_id}:*")
+        await InboxAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         return {
             "status": "success",
@@ -444,6 +455,8 @@ async def unarchive_message(
         # Invalidate cache
         await redis_service.delete_pattern(f"inbox:messages:{user_id}:*")
         await redis_service.delete_pattern(f"inbox:stats:{user_id}:*")
+        await InboxAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         return {
             "status": "success",
@@ -514,6 +527,8 @@ async def reply_to_message(
         # Invalidate cache
         await redis_service.delete_pattern(f"inbox:messages:{user_id}:*")
         await redis_service.delete_pattern(f"inbox:stats:{user_id}:*")
+        await InboxAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         logger.info(f"Reply sent for message {message_id} on platform {platform}")
         
@@ -567,6 +582,8 @@ async def update_message_priority(
         
         # Invalidate cache
         await redis_service.delete_pattern(f"inbox:messages:{user_id}:*")
+        await InboxAggregator.invalidate_cache(user_id)
+        await DashboardAggregator.invalidate_cache(user_id)
         
         return {
             "status": "success",
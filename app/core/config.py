@@ -21,12 +21,20 @@ class Settings(BaseSettings):
     
     # API
     API_V1_PREFIX: str = "/api/v1"
+    ENABLED_MODULES: list = [
+        "ads", "seo", "inbox", "email-marketing", "cold-calling", "branding", "dashboard"
+    ]
     
     # MongoDB Configuration
     MONGODB_URL: str
     MONGODB_DB_NAME: str
     MONGODB_MIN_POOL_SIZE: int = 10
     MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MAX_IDLE_TIME_MS: int = 60000
+    MONGODB_COMPRESSORS: str = "zstd,snappy,zlib"
+    MONGODB_ZLIB_COMPRESSION_LEVEL: int = 3
+    # Route read-only analytics aggregations to secondaries when available
+    MONGODB_ANALYTICS_SECONDARY_READS: bool = True
     
     # Redis Configuration
     REDIS_URL: str
@@ -3,8 +3,17 @@ MongoDB database connection and management
 """
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ReadPreference
 from pymongo.errors import ConnectionFailure
+from pymongo.server_api import ServerApi
 from app.core.config import settings
+from app.core.indexes import (
+    ADS_PLATFORMS,
+    USER_DATE_INDEX,
+    USER_TIMESTAMP_INDEX,
+    USER_PLATFORM_TIMESTAMP_INDEX,
+    SENT_CAMPAIGNS_INDEX
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,6 +25,7 @@ class Database:
     """
     client: AsyncIOMotorClient = None
     db: AsyncIOMotorDatabase = None
+    analytics_db: AsyncIOMotorDatabase = None
 
 
 database = Database()
@@ -33,13 +43,27 @@ async def connect_to_mongo():
             settings.MONGODB_URL,
             minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
             maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
             serverSelectionTimeoutMS=5000,
             connectTimeoutMS=10000,
-            socketTimeoutMS=10000
+            socketTimeoutMS=10000,
+            # Wire compression - analytics queries ship large documents
+            compressors=settings.MONGODB_COMPRESSORS,
+            zlibCompressionLevel=settings.MONGODB_ZLIB_COMPRESSION_LEVEL,
+            server_api=ServerApi("1")
         )
         
         database.db = database.client[settings.MONGODB_DB_NAME]
         
+        # Same database, but reads prefer secondaries so analytics don't load the primary
+        if settings.MONGODB_ANALYTICS_SECONDARY_READS:
+            database.analytics_db = database.client.get_database(
+                settings.MONGODB_DB_NAME,
+                read_preference=ReadPreference.SECONDARY_PREFERRED
+            )
+        else:
+            database.analytics_db = database.db
+        
         # Test connection
         await database.client.admin.command('ping')
         
@@ -69,11 +93,17 @@ async def close_mongo_connection():
         logger.error(f"Error closing MongoDB connection: {str(e)}")
 
 
-async def get_database() -> AsyncIOMotorDatabase:
+async def get_database(analytics: bool = False) -> AsyncIOMotorDatabase:
     """
     Get database instance
     Used as dependency in API endpoints
+    
+    Args:
+        analytics: Return the handle for read-only analytics queries, which
+            prefers secondaries (may lag the primary slightly)
     """
+    if analytics:
+        return database.analytics_db
     return database.db
 
 
@@ -95,19 +125,29 @@ async def create_indexes():
         await db.ad_campaigns.create_index([("user_id", 1), ("platform", 1), ("date", -1)])
         await db.ad_campaigns.create_index([("user_id", 1), ("campaign_id", 1)])
         
+        # Per-platform ads collections
+        for platform in ADS_PLATFORMS:
+            await db[f"ads_{platform}"].create_index(USER_DATE_INDEX)
+            await db[f"ads_{platform}_campaigns"].create_index(USER_DATE_INDEX)
+            await db[f"ads_{platform}_campaigns"].create_index([("user_id", 1), ("campaign_id", 1)])
+        
         # SEO metrics indexes
         await db.seo_metrics.create_index([("user_id", 1), ("date", -1)])
         await db.seo_metrics.create_index([("user_id", 1), ("domain", 1), ("date", -1)])
         
-        # Inbox messages indexes
-        await db.inbox_messages.create_index([("user_id", 1), ("timestamp", -1)])
-        await db.inbox_messages.create_index([("user_id", 1), ("platform", 1)])
+        # Inbox messages indexes (aggregation $match stages are range scans on these)
+        await db.inbox_messages.create_index(USER_TIMESTAMP_INDEX)
+        await db.inbox_messages.create_index(USER_PLATFORM_TIMESTAMP_INDEX)
         await db.inbox_messages.create_index([("user_id", 1), ("read", 1)])
-        await db.inbox_messages.create_index([("user_id", 1), ("sender.id", 1)])
+        # Index-only counts for InboxAggregator.aggregate_single_platform
+        await db.inbox_messages.create_index([("user_id", 1), ("platform", 1), ("read", 1)])
+        await db.inbox_messages.create_index([("user_id", 1), ("platform", 1), ("replied", 1)])
+        await db.inbox_messages.create_index([("user_id", 1), ("platform", 1), ("archived", 1)])
+        await db.inbox_messages.create_index([("user_id", 1), ("sender.id", 1), ("timestamp", -1)])
         
         # Email campaigns indexes
         await db.email_campaigns.create_index([("user_id", 1), ("sent_at", -1)])
-        await db.email_campaigns.create_index([("user_id", 1), ("status", 1)])
+        await db.email_campaigns.create_index(SENT_CAMPAIGNS_INDEX)
         await db.email_campaigns.create_index([("user_id", 1), ("campaign_type", 1)])
         
         # Email scheduled indexes
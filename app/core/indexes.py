@@ -0,0 +1,24 @@
+"""
+MongoDB index specifications shared by startup index creation
+"""
+
+# Ads platforms with their own ads_<platform> / ads_<platform>_campaigns collections
+ADS_PLATFORMS = (
+    "meta_ads",
+    "google_ads",
+    "twitter_ads",
+    "tiktok_ads",
+    "linkedin_ads"
+)
+
+# Compound index on every ads_<platform> and ads_<platform>_campaigns collection
+USER_DATE_INDEX = [("user_id", 1), ("date", -1)]
+
+# Compound indexes on inbox_messages covering the user_id + timestamp range
+# used by every inbox aggregation $match
+USER_TIMESTAMP_INDEX = [("user_id", 1), ("timestamp", -1)]
+USER_PLATFORM_TIMESTAMP_INDEX = [("user_id", 1), ("platform", 1), ("timestamp", -1)]
+
+# Compound index on email_campaigns matching the
+# {user_id, status: "sent", sent_at range} filter every email aggregation uses
+SENT_CAMPAIGNS_INDEX = [("user_id", 1), ("status", 1), ("sent_at", -1)]
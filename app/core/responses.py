@@ -0,0 +1,23 @@
+"""
+Response classes
+"""
+
+from typing import Any
+from fastapi.responses import JSONResponse
+import orjson
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson
+    
+    Unlike fastapi.responses.ORJSONResponse, non-string dict keys (e.g. a
+    None campaign type) are stringified like the stdlib encoder does instead
+    of raising.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
@@ -5,17 +5,21 @@ Main FastAPI application entry point
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from contextlib import asynccontextmanager
-from datetime import datetime
+import importlib
+import gzip
+import json
 import logging
 import sys
 import time
 
 from app.core.config import settings
 from app.core.database import connect_to_mongo, close_mongo_connection, check_database_health
+from app.core.responses import ORJSONResponse
+from app.services.ai.llm_client import close_clients as close_llm_clients
 from app.services.cache.redis_service import RedisService
 from app.utils.error_handlers import (
     http_exception_handler,
@@ -23,15 +27,6 @@ from app.utils.error_handlers import (
     general_exception_handler
 )
 
-# Import all routers
-from app.api.v1.ads import router as ads_router
-from app.api.v1.seo import router as seo_router
-from app.api.v1.inbox import router as inbox_router
-from app.api.v1.email_marketing import router as email_marketing_router
-from app.api.v1.cold_calling import router as cold_calling_router
-from app.api.v1.branding import router as branding_router
-from app.api.v1.dashboard import router as dashboard_router
-
 # Configure logging
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
@@ -45,6 +40,15 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _warm_openapi_cache(app: FastAPI):
+    """
+    Build the OpenAPI schema once and keep it as plain and gzipped bytes
+    """
+    schema_bytes = json.dumps(app.openapi()).encode("utf-8")
+    app.state.openapi_bytes = schema_bytes
+    app.state.openapi_gzip = gzip.compress(schema_bytes)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -60,8 +64,8 @@ async def lifespan(app: FastAPI):
         logger.info("MongoDB connected successfully")
         
         # Connect to Redis (optional - app will continue without it)
-        redis_service = RedisService()
-        await redis_service.connect()
+        app.state.redis = RedisService()
+        await app.state.redis.connect()
         
         logger.info("Application startup completed")
         
@@ -72,6 +76,13 @@ async def lifespan(app: FastAPI):
             raise
         logger.warning("Application starting without some optional services")
     
+    # Pre-serialize the OpenAPI schema so /openapi.json is a bytes copy; a schema
+    # that fails to build shouldn't stop the API from serving requests
+    try:
+        _warm_openapi_cache(app)
+    except Exception as e:
+        logger.warning(f"Could not pre-build OpenAPI schema, serving it lazily: {str(e)}")
+    
     yield
     
     # Shutdown
@@ -81,9 +92,13 @@ async def lifespan(app: FastAPI):
         # Close MongoDB connection
         await close_mongo_connection()
         
-        # Close Redis connection
-        redis_service = RedisService()
-        await redis_service.disconnect()
+        # Close Redis connection (same instance opened at startup)
+        redis_service = getattr(app.state, "redis", None)
+        if redis_service is not None:
+            await redis_service.disconnect()
+        
+        # Close the shared LLM HTTP clients
+        await close_llm_clients()
         
         logger.info("All services disconnected successfully")
         
@@ -168,6 +183,8 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    # orjson serializes route responses several times faster than the stdlib encoder
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -182,8 +199,24 @@ app.add_middleware(
     allow_headers=settings.CORS_ALLOW_HEADERS,
 )
 
-# GZip compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# GZip compression for large responses; routes that already serve
+# pre-compressed bytes bypass it so their bodies aren't compressed twice
+_PRECOMPRESSED_PATHS = frozenset({"/endpoints", app.openapi_url})
+
+
+class _LargeResponseGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that skips routes serving pre-compressed bodies
+    """
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in _PRECOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app.add_middleware(_LargeResponseGZipMiddleware, minimum_size=4096)
 
 
 # Request logging middleware
@@ -249,6 +282,21 @@ async def root():
     }
 
 
+# Health probes fire constantly; the timestamp string is rebuilt at most once per second
+_timestamp_cache = {"second": -1, "value": ""}
+
+
+def _utc_timestamp() -> str:
+    """
+    Get the current UTC time as an ISO-8601 string (second precision)
+    """
+    now = int(time.time())
+    if now != _timestamp_cache["second"]:
+        _timestamp_cache["second"] = now
+        _timestamp_cache["value"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+    return _timestamp_cache["value"]
+
+
 @app.get(
     "/health",
     tags=["System"],
@@ -280,7 +328,7 @@ async def health_check():
         "database": "healthy" if db_healthy else "unhealthy",
         "cache": "healthy" if redis_healthy else "unavailable",
         "version": settings.APP_VERSION,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": _utc_timestamp()
     }
 
 
@@ -306,6 +354,137 @@ async def metrics():
     }
 
 
+def _json_bytes_response(request: Request, body: bytes, gzipped_body: bytes) -> Response:
+    """
+    Return pre-serialized JSON, using the pre-compressed variant when the client accepts gzip
+    """
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=gzipped_body,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        )
+    
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Vary": "Accept-Encoding"}
+    )
+
+
+# Static endpoint listing - serialized and gzipped once at import so
+# /endpoints is served as pre-built bytes
+_API_ENDPOINTS = {
+    "system": {
+        "base_url": "/",
+        "endpoints": [
+            {"path": "/", "method": "GET", "description": "Root endpoint - API information"},
+            {"path": "/health", "method": "GET", "description": "Health check - Service status"},
+            {"path": "/metrics", "method": "GET", "description": "API metrics"},
+            {"path": "/endpoints", "method": "GET", "description": "List all endpoints"},
+            {"path": "/docs", "method": "GET", "description": "Swagger UI documentation"},
+            {"path": "/redoc", "method": "GET", "description": "ReDoc documentation"},
+            {"path": "/openapi.json", "method": "GET", "description": "OpenAPI schema"},
+        ]
+    },
+    "ads_manager": {
+        "base_url": f"{settings.API_V1_PREFIX}/ads",
+        "description": "Manage advertising campaigns across multiple platforms",
+        "endpoints": [
+            {"path": "/overview", "method": "GET", "description": "Get aggregated ads overview"},
+            {"path": "/overview/platforms", "method": "GET", "description": "Get platform-specific overview"},
+            {"path": "/analytics/overview", "method": "GET", "description": "Get ads analytics overview"},
+            {"path": "/analytics/performance-over-time", "method": "GET", "description": "Get performance trends"},
+            {"path": "/campaigns", "method": "GET", "description": "List all campaigns"},
+            {"path": "/campaigns/{campaign_id}", "method": "GET", "description": "Get campaign details"},
+            {"path": "/recommendations", "method": "GET", "description": "Get AI-powered recommendations"},
+            {"path": "/predictions", "method": "GET", "description": "Get performance predictions"},
+        ]
+    },
+    "seo": {
+        "base_url": f"{settings.API_V1_PREFIX}/seo",
+        "description": "SEO tools and analytics",
+        "endpoints": [
+            {"path": "/overview", "method": "GET", "description": "Get SEO overview"},
+            {"path": "/overview/domains", "method": "GET", "description": "List tracked domains"},
+            {"path": "/keywords", "method": "GET", "description": "Get keyword rankings"},
+            {"path": "/rankings", "method": "GET", "description": "Get ranking data"},
+            {"path": "/traffic", "method": "GET", "description": "Get traffic analytics"},
+            {"path": "/competitors", "method": "GET", "description": "Analyze competitors"},
+            {"path": "/growth-report", "method": "GET", "description": "Get growth report"},
+        ]
+    },
+    "inbox": {
+        "base_url": f"{settings.API_V1_PREFIX}/inbox",
+        "description": "Unified inbox for all platforms",
+        "endpoints": [
+            {"path": "/messages", "method": "GET", "description": "Get messages"},
+            {"path": "/messages/{message_id}", "method": "GET", "description": "Get message details"},
+            {"path": "/messages/{message_id}/mark-read", "method": "PATCH", "description": "Mark as read"},
+            {"path": "/messages/{message_id}/reply", "method": "POST", "description": "Reply to message"},
+            {"path": "/messages/{message_id}/archive", "method": "PATCH", "description": "Archive message"},
+            {"path": "/stats", "method": "GET", "description": "Get inbox statistics"},
+        ]
+    },
+    "email_marketing": {
+        "base_url": f"{settings.API_V1_PREFIX}/email-marketing",
+        "description": "Email campaign management",
+        "endpoints": [
+            {"path": "/campaigns", "method": "GET", "description": "List campaigns"},
+            {"path": "/campaigns", "method": "POST", "description": "Create campaign"},
+            {"path": "/campaigns/{campaign_id}", "method": "GET", "description": "Get campaign details"},
+            {"path": "/campaigns/{campaign_id}", "method": "PATCH", "description": "Update campaign"},
+            {"path": "/campaigns/{campaign_id}/send", "method": "POST", "description": "Send campaign"},
+            {"path": "/analytics/overview", "method": "GET", "description": "Get analytics overview"},
+            {"path": "/analytics/performance-over-time", "method": "GET", "description": "Get performance trends"},
+        ]
+    },
+    "cold_calling": {
+        "base_url": f"{settings.API_V1_PREFIX}/cold-calling",
+        "description": "Cold calling tracking and analytics",
+        "endpoints": [
+            {"path": "/overview", "method": "GET", "description": "Get calling overview"},
+            {"path": "/stats/realtime", "method": "GET", "description": "Get real-time stats"},
+            {"path": "/stats/agents", "method": "GET", "description": "Get agent performance"},
+            {"path": "/analytics/performance", "method": "GET", "description": "Get performance analytics"},
+            {"path": "/history", "method": "GET", "description": "Get call history"},
+        ]
+    },
+    "branding": {
+        "base_url": f"{settings.API_V1_PREFIX}/branding",
+        "description": "Brand presence monitoring",
+        "endpoints": [
+            {"path": "/overview", "method": "GET", "description": "Get branding overview"},
+            {"path": "/platforms", "method": "GET", "description": "List connected platforms"},
+            {"path": "/growth", "method": "GET", "description": "Get audience growth"},
+            {"path": "/engagement-summary", "method": "GET", "description": "Get engagement summary"},
+        ]
+    },
+    "dashboard": {
+        "base_url": f"{settings.API_V1_PREFIX}/dashboard",
+        "description": "Unified dashboard combining all modules",
+        "endpoints": [
+            {"path": "/overview", "method": "GET", "description": "Get unified dashboard overview"},
+        ]
+    }
+}
+
+_ENDPOINTS_PAYLOAD = {
+    "api_version": settings.APP_VERSION,
+    "base_url": settings.API_V1_PREFIX,
+    "total_modules": len(_API_ENDPOINTS) - 1,  # Exclude system
+    "endpoints": _API_ENDPOINTS,
+    "documentation": {
+        "swagger_ui": "/docs",
+        "redoc": "/redoc",
+        "openapi_schema": "/openapi.json"
+    }
+}
+
+_ENDPOINTS_BYTES = json.dumps(_ENDPOINTS_PAYLOAD).encode("utf-8")
+_ENDPOINTS_GZIP = gzip.compress(_ENDPOINTS_BYTES)
+
+
 @app.get(
     "/endpoints",
     tags=["System"],
@@ -313,163 +492,63 @@ async def metrics():
     description="Get a comprehensive list of all available API endpoints organized by category",
     response_description="List of all API endpoints"
 )
-async def list_endpoints():
+async def list_endpoints(request: Request):
     """
     List all available API endpoints
     
     Returns a structured list of all endpoints organized by module/category.
     Useful for discovering available functionality.
     """
-    endpoints = {
-        "system": {
-            "base_url": "/",
-            "endpoints": [
-                {"path": "/", "method": "GET", "description": "Root endpoint - API information"},
-                {"path": "/health", "method": "GET", "description": "Health check - Service status"},
-                {"path": "/metrics", "method": "GET", "description": "API metrics"},
-                {"path": "/endpoints", "method": "GET", "description": "List all endpoints"},
-                {"path": "/docs", "method": "GET", "description": "Swagger UI documentation"},
-                {"path": "/redoc", "method": "GET", "description": "ReDoc documentation"},
-                {"path": "/openapi.json", "method": "GET", "description": "OpenAPI schema"},
-            ]
-        },
-        "ads_manager": {
-            "base_url": f"{settings.API_V1_PREFIX}/ads",
-            "description": "Manage advertising campaigns across multiple platforms",
-            "endpoints": [
-                {"path": "/overview", "method": "GET", "description": "Get aggregated ads overview"},
-                {"path": "/overview/platforms", "method": "GET", "description": "Get platform-specific overview"},
-                {"path": "/analytics/overview", "method": "GET", "description": "Get ads analytics overview"},
-                {"path": "/analytics/performance-over-time", "method": "GET", "description": "Get performance trends"},
-                {"path": "/campaigns", "method": "GET", "description": "List all campaigns"},
-                {"path": "/campaigns/{campaign_id}", "method": "GET", "description": "Get campaign details"},
-                {"path": "/recommendations", "method": "GET", "description": "Get AI-powered recommendations"},
-                {"path": "/predictions", "method": "GET", "description": "Get performance predictions"},
-            ]
-        },
-        "seo": {
-            "base_url": f"{settings.API_V1_PREFIX}/seo",
-            "description": "SEO tools and analytics",
-            "endpoints": [
-                {"path": "/overview", "method": "GET", "description": "Get SEO overview"},
-                {"path": "/overview/domains", "method": "GET", "description": "List tracked domains"},
-                {"path": "/keywords", "method": "GET", "description": "Get keyword rankings"},
-                {"path": "/rankings", "method": "GET", "description": "Get ranking data"},
-                {"path": "/traffic", "method": "GET", "description": "Get traffic analytics"},
-                {"path": "/competitors", "method": "GET", "description": "Analyze competitors"},
-                {"path": "/growth-report", "method": "GET", "description": "Get growth report"},
-            ]
-        },
-        "inbox": {
-            "base_url": f"{settings.API_V1_PREFIX}/inbox",
-            "description": "Unified inbox for all platforms",
-            "endpoints": [
-                {"path": "/messages", "method": "GET", "description": "Get messages"},
-                {"path": "/messages/{message_id}", "method": "GET", "description": "Get message details"},
-                {"path": "/messages/{message_id}/mark-read", "method": "PATCH", "description": "Mark as read"},
-                {"path": "/messages/{message_id}/reply", "method": "POST", "description": "Reply to message"},
-                {"path": "/messages/{message_id}/archive", "method": "PATCH", "description": "Archive message"},
-                {"path": "/stats", "method": "GET", "description": "Get inbox statistics"},
-            ]
-        },
-        "email_marketing": {
-            "base_url": f"{settings.API_V1_PREFIX}/email-marketing",
-            "description": "Email campaign management",
-            "endpoints": [
-                {"path": "/campaigns", "method": "GET", "description": "List campaigns"},
-                {"path": "/campaigns", "method": "POST", "description": "Create campaign"},
-                {"path": "/campaigns/{campaign_id}", "method": "GET", "description": "Get campaign details"},
-                {"path": "/campaigns/{campaign_id}", "method": "PATCH", "description": "Update campaign"},
-                {"path": "/campaigns/{campaign_id}/send", "method": "POST", "description": "Send campaign"},
-                {"path": "/analytics/overview", "method": "GET", "description": "Get analytics overview"},
-                {"path": "/analytics/performance-over-time", "method": "GET", "description": "Get performance trends"},
-            ]
-        },
-        "cold_calling": {
-            "base_url": f"{settings.API_V1_PREFIX}/cold-calling",
-            "description": "Cold calling tracking and analytics",
-            "endpoints": [
-                {"path": "/overview", "method": "GET", "description": "Get calling overview"},
-                {"path": "/stats/realtime", "method": "GET", "description": "Get real-time stats"},
-                {"path": "/stats/agents", "method": "GET", "description": "Get agent performance"},
-                {"path": "/analytics/performance", "method": "GET", "description": "Get performance analytics"},
-                {"path": "/history", "method": "GET", "description": "Get call history"},
-            ]
-        },
-        "branding": {
-            "base_url": f"{settings.API_V1_PREFIX}/branding",
-            "description": "Brand presence monitoring",
-            "endpoints": [
-                {"path": "/overview", "method": "GET", "description": "Get branding overview"},
-                {"path": "/platforms", "method": "GET", "description": "List connected platforms"},
-                {"path": "/growth", "method": "GET", "description": "Get audience growth"},
-                {"path": "/engagement-summary", "method": "GET", "description": "Get engagement summary"},
-            ]
-        },
-        "dashboard": {
-            "base_url": f"{settings.API_V1_PREFIX}/dashboard",
-            "description": "Unified dashboard combining all modules",
-            "endpoints": [
-                {"path": "/overview", "method": "GET", "description": "Get unified dashboard overview"},
-            ]
-        }
-    }
-    
-    return {
-        "api_version": settings.APP_VERSION,
-        "base_url": settings.API_V1_PREFIX,
-        "total_modules": len(endpoints) - 1,  # Exclude system
-        "endpoints": endpoints,
-        "documentation": {
-            "swagger_ui": "/docs",
-            "redoc": "/redoc",
-            "openapi_schema": "/openapi.json"
-        }
-    }
-
-
-# Include API routers
-app.include_router(
-    ads_router,
-    prefix=f"{settings.API_V1_PREFIX}/ads",
-    tags=["Ads Manager"]
-)
+    return _json_bytes_response(request, _ENDPOINTS_BYTES, _ENDPOINTS_GZIP)
 
-app.include_router(
-    seo_router,
-    prefix=f"{settings.API_V1_PREFIX}/seo",
-    tags=["SEO"]
-)
 
-app.include_router(
-    inbox_router,
-    prefix=f"{settings.API_V1_PREFIX}/inbox",
-    tags=["Inbox"]
-)
+# Replace FastAPI's default schema route, which re-serializes the schema on every request
+app.router.routes = [
+    route for route in app.router.routes
+    if getattr(route, "path", None) != app.openapi_url
+]
 
-app.include_router(
-    email_marketing_router,
-    prefix=f"{settings.API_V1_PREFIX}/email-marketing",
-    tags=["Email Marketing"]
-)
 
-app.include_router(
-    cold_calling_router,
-    prefix=f"{settings.API_V1_PREFIX}/cold-calling",
-    tags=["Cold Calling"]
-)
+@app.get(app.openapi_url, include_in_schema=False)
+async def openapi_schema(request: Request):
+    """
+    Serve the OpenAPI schema from pre-serialized bytes
+    """
+    if getattr(request.app.state, "openapi_bytes", None) is None:
+        _warm_openapi_cache(request.app)
+    
+    return _json_bytes_response(
+        request,
+        request.app.state.openapi_bytes,
+        request.app.state.openapi_gzip
+    )
+
+
+# API routers: (module path, URL slug, OpenAPI tag)
+# Modules are imported lazily so disabled modules never load their dependencies
+API_ROUTERS = [
+    ("app.api.v1.ads", "ads", "Ads Manager"),
+    ("app.api.v1.seo", "seo", "SEO"),
+    ("app.api.v1.inbox", "inbox", "Inbox"),
+    ("app.api.v1.email_marketing", "email-marketing", "Email Marketing"),
+    ("app.api.v1.cold_calling", "cold-calling", "Cold Calling"),
+    ("app.api.v1.branding", "branding", "Branding"),
+    ("app.api.v1.dashboard", "dashboard", "Dashboard"),
+]
 
-app.include_router(
-    branding_router,
-    prefix=f"{settings.API_V1_PREFIX}/branding",
-    tags=["Branding"]
-)
+# Include API routers
+_enabled_modules = set(settings.ENABLED_MODULES)
 
-app.include_router(
-    dashboard_router,
-    prefix=f"{settings.API_V1_PREFIX}/dashboard",
-    tags=["Dashboard"]
-)
+for module_path, slug, tag in API_ROUTERS:
+    if slug not in _enabled_modules:
+        logger.info(f"Module disabled, skipping router: {slug}")
+        continue
+    
+    app.include_router(
+        importlib.import_module(module_path).router,
+        prefix=f"{settings.API_V1_PREFIX}/{slug}",
+        tags=[tag]
+    )
 
 
 # Development-only endpoints
@@ -488,4 +567,17 @@ if settings.DEBUG:
         }
 
 
-logger.info(f"FastAPI application initialized - Docs available at /docs")
\ No newline at end of file
+logger.info(f"FastAPI application initialized - Docs available at /docs")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvloop + httptools: C-level event loop and HTTP parser for I/O-bound workloads
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools"
+    )
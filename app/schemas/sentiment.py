@@ -2,3 +2,26 @@
 Sentiment schemas
 """
 
+from typing import Dict, List, Literal
+from pydantic import BaseModel, Field, field_validator
+
+
+class SentimentResult(BaseModel):
+    """
+    One LLM sentiment analysis, validated once when the response is parsed
+    
+    Missing fields take neutral defaults; wrongly typed or out-of-range
+    values raise a ValidationError.
+    """
+    
+    sentiment: Literal["positive", "neutral", "negative"] = "neutral"
+    score: float = Field(default=0.0, ge=-1.0, le=1.0)
+    confidence: float = Field(default=0.0, ge=0.0, le=1.0)
+    keywords: List[str] = Field(default_factory=list)
+    emotions: Dict[str, float] = Field(default_factory=dict)
+    
+    @field_validator("sentiment", mode="before")
+    @classmethod
+    def normalize_sentiment(cls, value):
+        """Accept labels in any case ("Positive", "NEGATIVE")"""
+        return value.strip().lower() if isinstance(value, str) else value
@@ -0,0 +1,9 @@
+"""
+Aggregators - combine raw module data into summaries
+
+Public aggregator methods are safe to run concurrently on one event loop
+(the in-process result caches they share are only touched between awaits),
+so callers fanning out to several of them (or to one method over several
+date ranges) should run them with asyncio.gather rather than awaiting them
+one after another.
+"""
@@ -2,13 +2,141 @@
 Ads Aggregator - Aggregates ad data across all platforms
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import asyncio
+import heapq
 from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core.database import get_database
+from app.core.indexes import ADS_PLATFORMS
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _campaign_roas(platform_campaign: Tuple[str, Dict[str, Any]]) -> float:
+    """
+    Ranking key for (platform, grouped campaign) pairs; matches the rounded
+    "roas" _format_campaign outputs so ties order the same way
+    """
+    return round(platform_campaign[1].get("roas", 0), 2)
+
+
+# Pipeline stages that don't depend on the request are built once at import;
+# only the $match stage and $unionWith sources are assembled per call
+
+_TAGGED_FIELDS = {
+    "_id": 0,
+    "campaign_id": 1,
+    "campaign_name": 1,
+    "spend": 1,
+    "impressions": 1,
+    "clicks": 1,
+    "conversions": 1,
+    "revenue": 1
+}
+
+# Campaign ROAS from the grouped spend and revenue
+_ROAS_STAGE = {
+    "$addFields": {
+        "roas": {
+            "$cond": [
+                {"$gt": ["$spend", 0]},
+                {"$divide": ["$revenue", "$spend"]},
+                0
+            ]
+        }
+    }
+}
+
+_PLATFORMS_FACET_STAGE = {
+    "$facet": {
+        "by_platform": [
+            {"$match": {"kind": "totals"}},
+            {"$group": {
+                "_id": "$platform",
+                "spend": {"$sum": "$spend"},
+                "impressions": {"$sum": "$impressions"},
+                "clicks": {"$sum": "$clicks"},
+                "conversions": {"$sum": "$conversions"}
+            }}
+        ],
+        "campaigns": [
+            {"$match": {"kind": "campaigns"}},
+            {"$group": {
+                "_id": {"platform": "$platform", "campaign_id": "$campaign_id"},
+                "name": {"$first": "$campaign_name"},
+                "spend": {"$sum": "$spend"},
+                "impressions": {"$sum": "$impressions"},
+                "clicks": {"$sum": "$clicks"},
+                "conversions": {"$sum": "$conversions"},
+                "revenue": {"$sum": "$revenue"}
+            }},
+            _ROAS_STAGE,
+            # Top 20 campaigns by spend per platform, without buffering the rest
+            {"$group": {
+                "_id": "$_id.platform",
+                "campaigns": {
+                    "$topN": {"n": 20, "sortBy": {"spend": -1}, "output": "$$ROOT"}
+                }
+            }}
+        ]
+    }
+}
+
+# Single-collection stages for _get_platform_data; plain $group/$sort/$limit
+# so they run on servers without $unionWith (4.4) or $topN (5.2)
+_TOTALS_GROUP_STAGE = {
+    "$group": {
+        "_id": None,
+        "spend": {"$sum": "$spend"},
+        "impressions": {"$sum": "$impressions"},
+        "clicks": {"$sum": "$clicks"},
+        "conversions": {"$sum": "$conversions"}
+    }
+}
+
+_TOP_CAMPAIGNS_STAGES = [
+    {"$group": {
+        "_id": "$campaign_id",
+        "name": {"$first": "$campaign_name"},
+        "spend": {"$sum": "$spend"},
+        "impressions": {"$sum": "$impressions"},
+        "clicks": {"$sum": "$clicks"},
+        "conversions": {"$sum": "$conversions"},
+        "revenue": {"$sum": "$revenue"}
+    }},
+    _ROAS_STAGE,
+    # Top 20 campaigns by spend
+    {"$sort": {"spend": -1}},
+    {"$limit": 20}
+]
+
+_DAILY_GROUP_STAGE = {
+    "$group": {
+        "_id": {
+            "$dateToString": {"format": "%Y-%m-%d", "date": "$date"}
+        },
+        "spend": {"$sum": "$spend"},
+        "impressions": {"$sum": "$impressions"},
+        "clicks": {"$sum": "$clicks"},
+        "conversions": {"$sum": "$conversions"}
+    }
+}
+
+_SORT_BY_ID_STAGE = {"$sort": {"_id": 1}}
+
+
+def _match_stage(user_id: str, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """
+    Build the per-request $match stage on the (user_id, date) index
+    """
+    return {
+        "$match": {
+            "user_id": user_id,
+            "date": {"$gte": start_date, "$lte": end_date}
+        }
+    }
+
 
 class AdsAggregator:
     """
@@ -20,13 +148,31 @@ class AdsAggregator:
     - LinkedIn Ads
     """
     
-    SUPPORTED_PLATFORMS = [
-        "meta_ads",
-        "google_ads", 
-        "twitter_ads",
-        "tiktok_ads",
-        "linkedin_ads"
-    ]
+    # Iteration order for platform breakdowns
+    _PLATFORM_ORDER = ADS_PLATFORMS
+    
+    SUPPORTED_PLATFORMS = frozenset(_PLATFORM_ORDER)
+    
+    # Number of cross-platform top campaigns returned by aggregate_all_platforms
+    TOP_CAMPAIGNS_LIMIT = 20
+    
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None):
+        """
+        Initialize aggregator
+        
+        Args:
+            db: Optional database handle; callers fanning out to several
+                aggregators can share one handle instead of each resolving it
+        """
+        self._db = db
+    
+    async def _get_db(self) -> AsyncIOMotorDatabase:
+        """
+        Get the database handle, resolving it once per instance
+        """
+        if self._db is None:
+            self._db = await get_database(analytics=True)
+        return self._db
     
     async def aggregate_all_platforms(
         self,
@@ -40,48 +186,69 @@ class AdsAggregator:
         Returns:
             Dict containing aggregated metrics, platform breakdown, and top campaigns
         """
-        db = await get_database()
+        db = await self._get_db()
+        
+        # One round-trip for every platform's totals and campaigns
+        try:
+            platforms_data = await self._get_platforms_data(
+                db, user_id, self._PLATFORM_ORDER, start_date, end_date
+            )
+        except Exception as e:
+            # One bad collection shouldn't blank the whole breakdown; query each
+            # platform on its own and skip the ones that fail
+            logger.warning(f"Combined ads aggregation failed, querying platforms separately: {e}")
+            results = await asyncio.gather(*(
+                self._get_platform_data(db, user_id, platform, start_date, end_date)
+                for platform in self._PLATFORM_ORDER
+            ))
+            platforms_data = {
+                platform: data
+                for platform, data in zip(self._PLATFORM_ORDER, results)
+                if data
+            }
         
         platform_breakdown = []
-        all_campaigns = []
+        
+        # Raw grouped campaigns tagged with their platform; only the winners are
+        # formatted into response dicts
+        all_campaigns: List[Tuple[str, Dict[str, Any]]] = []
         
         total_spend = 0.0
         total_impressions = 0
         total_clicks = 0
         total_conversions = 0
         
-        for platform in self.SUPPORTED_PLATFORMS:
-            try:
-                platform_data = await self._get_platform_data(
-                    db, user_id, platform, start_date, end_date
-                )
-                
-                if platform_data:
-                    platform_breakdown.append({
-                        "platform": platform,
-                        "spend": platform_data.get("spend", 0),
-                        "impressions": platform_data.get("impressions", 0),
-                        "clicks": platform_data.get("clicks", 0),
-                        "conversions": platform_data.get("conversions", 0)
-                    })
-                    
-                    total_spend += platform_data.get("spend", 0)
-                    total_impressions += platform_data.get("impressions", 0)
-                    total_clicks += platform_data.get("clicks", 0)
-                    total_conversions += platform_data.get("conversions", 0)
-                    
-                    all_campaigns.extend(platform_data.get("campaigns", []))
-                    
-            except Exception as e:
-                logger.warning(f"Failed to get data for platform {platform}: {e}")
+        for platform in self._PLATFORM_ORDER:
+            platform_data = platforms_data.get(platform)
+            if not platform_data:
                 continue
+            
+            platform_breakdown.append({
+                "platform": platform,
+                "spend": platform_data.get("spend", 0),
+                "impressions": platform_data.get("impressions", 0),
+                "clicks": platform_data.get("clicks", 0),
+                "conversions": platform_data.get("conversions", 0)
+            })
+            
+            total_spend += platform_data.get("spend", 0)
+            total_impressions += platform_data.get("impressions", 0)
+            total_clicks += platform_data.get("clicks", 0)
+            total_conversions += platform_data.get("conversions", 0)
+            
+            all_campaigns.extend(
+                (platform, campaign) for campaign in platform_data["campaigns"]
+            )
         
-        # Sort campaigns by performance (ROAS or conversions)
-        top_campaigns = sorted(
-            all_campaigns,
-            key=lambda x: x.get("roas", 0),
-            reverse=True
-        )
+        # Top campaigns by performance (ROAS) - partial selection, no full sort
+        top_campaigns = [
+            self._format_campaign(campaign, platform)
+            for platform, campaign in heapq.nlargest(
+                self.TOP_CAMPAIGNS_LIMIT,
+                all_campaigns,
+                key=_campaign_roas
+            )
+        ]
         
         return {
             "total_spend": total_spend,
@@ -105,140 +272,161 @@ class AdsAggregator:
         if platform not in self.SUPPORTED_PLATFORMS:
             raise ValueError(f"Unsupported platform: {platform}")
         
-        db = await get_database()
+        db = await self._get_db()
         
-        platform_data = await self._get_platform_data(
-            db, user_id, platform, start_date, end_date
+        platform_data, daily_data = await asyncio.gather(
+            self._get_platform_data(db, user_id, platform, start_date, end_date),
+            self._get_daily_breakdown(db, user_id, platform, start_date, end_date)
         )
         
-        daily_data = await self._get_daily_breakdown(
-            db, user_id, platform, start_date, end_date
-        )
+        campaigns = [
+            self._format_campaign(c, platform)
+            for c in platform_data.get("campaigns", [])
+        ] if platform_data else []
         
         return {
             "spend": platform_data.get("spend", 0) if platform_data else 0,
             "impressions": platform_data.get("impressions", 0) if platform_data else 0,
             "clicks": platform_data.get("clicks", 0) if platform_data else 0,
             "conversions": platform_data.get("conversions", 0) if platform_data else 0,
-            "campaigns": platform_data.get("campaigns", []) if platform_data else [],
+            "campaigns": campaigns,
             "daily_data": daily_data
         }
     
-    async def _get_platform_data(
+    async def _get_platforms_data(
         self,
         db,
         user_id: str,
-        platform: str,
+        platforms: Sequence[str],
         start_date: datetime,
         end_date: datetime
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Dict[str, Dict[str, Any]]:
         """
-        Get aggregated data for a specific platform from database
+        Get totals and top campaigns for several platforms in a single round-trip
+        
+        Returns:
+            Dict of platform -> {spend, impressions, clicks, conversions, campaigns};
+            campaigns are raw grouped documents (see _format_campaign) and
+            platforms without ads data in the range are omitted
         """
-        try:
-            # Query ads data collection
-            collection = db[f"ads_{platform}"]
-            
-            pipeline = [
-                {
-                    "$match": {
-                        "user_id": user_id,
-                        "date": {"$gte": start_date, "$lte": end_date}
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": None,
-                        "spend": {"$sum": "$spend"},
-                        "impressions": {"$sum": "$impressions"},
-                        "clicks": {"$sum": "$clicks"},
-                        "conversions": {"$sum": "$conversions"}
-                    }
-                }
+        pipeline = self._build_platforms_pipeline(user_id, platforms, start_date, end_date)
+        first_collection = db[f"ads_{platforms[0]}"]
+        
+        result = await first_collection.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+        
+        platform_campaigns = {
+            row["_id"]: row["campaigns"] for row in facets.get("campaigns", [])
+        }
+        
+        platforms_data = {}
+        for row in facets.get("by_platform", []):
+            platform = row.pop("_id")
+            row["campaigns"] = platform_campaigns.get(platform, [])
+            platforms_data[platform] = row
+        
+        return platforms_data
+    
+    def _build_platforms_pipeline(
+        self,
+        user_id: str,
+        platforms: Sequence[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        Build a single pipeline covering the given platforms' ads and campaign collections
+        
+        Run against the first platform's ads collection; the other collections are
+        pulled in with $unionWith and each document is tagged with its platform and kind.
+        """
+        match_stage = _match_stage(user_id, start_date, end_date)
+        
+        def tagged(platform: str, kind: str) -> List[Dict[str, Any]]:
+            return [
+                match_stage,
+                {"$project": {
+                    **_TAGGED_FIELDS,
+                    "platform": {"$literal": platform},
+                    "kind": {"$literal": kind}
+                }}
             ]
-            
-            result = await collection.aggregate(pipeline).to_list(length=1)
-            
-            if result:
-                # Get campaigns for this platform
-                campaigns = await self._get_campaigns(
-                    db, user_id, platform, start_date, end_date
-                )
-                result[0]["campaigns"] = campaigns
-                return result[0]
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error getting platform data for {platform}: {e}")
-            return None
+        
+        first_platform, *other_platforms = platforms
+        
+        pipeline = tagged(first_platform, "totals")
+        pipeline += [
+            {"$unionWith": {"coll": f"ads_{platform}", "pipeline": tagged(platform, "totals")}}
+            for platform in other_platforms
+        ]
+        pipeline += [
+            {"$unionWith": {
+                "coll": f"ads_{platform}_campaigns",
+                "pipeline": tagged(platform, "campaigns")
+            }}
+            for platform in platforms
+        ]
+        pipeline.append(_PLATFORMS_FACET_STAGE)
+        
+        return pipeline
     
-    async def _get_campaigns(
+    def _format_campaign(self, campaign: Dict[str, Any], platform: str) -> Dict[str, Any]:
+        """
+        Format a grouped campaign document for API output
+        """
+        campaign_id = campaign["_id"]
+        if isinstance(campaign_id, dict):
+            campaign_id = campaign_id.get("campaign_id")
+        
+        return {
+            "campaign_id": str(campaign_id),
+            "name": campaign.get("name", "Unknown"),
+            "platform": platform,
+            "spend": campaign.get("spend", 0),
+            "impressions": campaign.get("impressions", 0),
+            "clicks": campaign.get("clicks", 0),
+            "conversions": campaign.get("conversions", 0),
+            "roas": round(campaign.get("roas", 0), 2)
+        }
+    
+    async def _get_platform_data(
         self,
         db,
         user_id: str,
         platform: str,
         start_date: datetime,
         end_date: datetime
-    ) -> List[Dict[str, Any]]:
+    ) -> Optional[Dict[str, Any]]:
         """
-        Get campaign-level data for a platform
+        Get aggregated data for a specific platform from database
+        
+        Queries the platform's two collections separately with plain pipelines,
+        so it also works where the combined pipeline isn't supported.
         """
         try:
-            collection = db[f"ads_{platform}_campaigns"]
-            
-            pipeline = [
-                {
-                    "$match": {
-                        "user_id": user_id,
-                        "date": {"$gte": start_date, "$lte": end_date}
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": "$campaign_id",
-                        "name": {"$first": "$campaign_name"},
-                        "spend": {"$sum": "$spend"},
-                        "impressions": {"$sum": "$impressions"},
-                        "clicks": {"$sum": "$clicks"},
-                        "conversions": {"$sum": "$conversions"},
-                        "revenue": {"$sum": "$revenue"}
-                    }
-                },
-                {
-                    "$addFields": {
-                        "roas": {
-                            "$cond": [
-                                {"$gt": ["$spend", 0]},
-                                {"$divide": ["$revenue", "$spend"]},
-                                0
-                            ]
-                        }
-                    }
-                },
-                {"$sort": {"spend": -1}},
-                {"$limit": 20}
-            ]
+            match_stage = _match_stage(user_id, start_date, end_date)
             
-            campaigns = await collection.aggregate(pipeline).to_list(length=20)
+            totals, campaigns = await asyncio.gather(
+                db[f"ads_{platform}"].aggregate(
+                    [match_stage, _TOTALS_GROUP_STAGE]
+                ).to_list(length=1),
+                db[f"ads_{platform}_campaigns"].aggregate(
+                    [match_stage, *_TOP_CAMPAIGNS_STAGES]
+                ).to_list(length=None)
+            )
             
-            return [
-                {
-                    "campaign_id": str(c["_id"]),
-                    "name": c.get("name", "Unknown"),
-                    "platform": platform,
-                    "spend": c.get("spend", 0),
-                    "impressions": c.get("impressions", 0),
-                    "clicks": c.get("clicks", 0),
-                    "conversions": c.get("conversions", 0),
-                    "roas": round(c.get("roas", 0), 2)
-                }
-                for c in campaigns
-            ]
+            # Same shape as _get_platforms_data: omitted without ads data
+            if not totals:
+                return None
             
+            platform_data = totals[0]
+            platform_data.pop("_id", None)
+            platform_data["campaigns"] = campaigns
+            return platform_data
+        
         except Exception as e:
-            logger.error(f"Error getting campaigns for {platform}: {e}")
-            return []
+            logger.error(f"Error getting platform data for {platform}: {e}")
+            return None
     
     async def _get_daily_breakdown(
         self,
@@ -255,24 +443,9 @@ class AdsAggregator:
             collection = db[f"ads_{platform}"]
             
             pipeline = [
-                {
-                    "$match": {
-                        "user_id": user_id,
-                        "date": {"$gte": start_date, "$lte": end_date}
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": {
-                            "$dateToString": {"format": "%Y-%m-%d", "date": "$date"}
-                        },
-                        "spend": {"$sum": "$spend"},
-                        "impressions": {"$sum": "$impressions"},
-                        "clicks": {"$sum": "$clicks"},
-                        "conversions": {"$sum": "$conversions"}
-                    }
-                },
-                {"$sort": {"_id": 1}}
+                _match_stage(user_id, start_date, end_date),
+                _DAILY_GROUP_STAGE,
+                _SORT_BY_ID_STAGE
             ]
             
             daily_data = await collection.aggregate(pipeline).to_list(length=100)
@@ -287,7 +460,7 @@ class AdsAggregator:
                 }
                 for d in daily_data
             ]
-            
+        
         except Exception as e:
             logger.error(f"Error getting daily breakdown for {platform}: {e}")
             return []
@@ -3,14 +3,35 @@ Branding Aggregator - Aggregates branding metrics across all social platforms
 """
 
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core.database import get_database
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _build_query_filter(
+    user_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Build a branding_metrics filter; dates are stored as "YYYY-MM-DD" strings
+    """
+    query_filter = {"user_id": user_id}
+    
+    if start_date or end_date:
+        date_filter = {}
+        if start_date:
+            date_filter["$gte"] = start_date.date().isoformat()
+        if end_date:
+            date_filter["$lte"] = end_date.date().isoformat()
+        query_filter["date"] = date_filter
+    
+    return query_filter
+
+
 class BrandingAggregator:
     """
     Aggregates branding metrics from multiple social media platforms:
@@ -22,14 +43,32 @@ class BrandingAggregator:
     - YouTube
     """
     
-    SUPPORTED_PLATFORMS = [
+    SUPPORTED_PLATFORMS = frozenset({
         "facebook",
         "instagram",
         "twitter",
         "linkedin",
         "tiktok",
         "youtube"
-    ]
+    })
+    
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None):
+        """
+        Initialize aggregator
+        
+        Args:
+            db: Optional database handle; callers fanning out to several
+                aggregators can share one handle instead of each resolving it
+        """
+        self._db = db
+    
+    async def _get_db(self) -> AsyncIOMotorDatabase:
+        """
+        Get the database handle, resolving it once per instance
+        """
+        if self._db is None:
+            self._db = await get_database(analytics=True)
+        return self._db
     
     async def aggregate_all_platforms(
         self,
@@ -48,21 +87,15 @@ class BrandingAggregator:
         Returns:
             Aggregated branding statistics across all platforms
         """
-        db = await get_database()
+        db = await self._get_db()
         
         # Build query filter
-        query_filter = {"user_id": user_id}
-        
-        if start_date or end_date:
-            query_filter["date"] = {}
-            if start_date:
-                query_filter["date"]["$gte"] = start_date.strftime("%Y-%m-%d")
-            if end_date:
-                query_filter["date"]["$lte"] = end_date.strftime("%Y-%m-%d")
+        query_filter = _build_query_filter(user_id, start_date, end_date)
         
         # Get latest metrics
         latest_metrics = await db.branding_metrics.find_one(
             query_filter,
+            projection={"_id": 0, "platforms": 1, "sentiment_score": 1},
             sort=[("date", -1)]
         )
         
@@ -87,13 +120,18 @@ class BrandingAggregator:
         
         platform_breakdown = {}
         
+        # Average engagement rate over platforms that report one, accumulated in the loop
+        engagement_rate_sum = 0.0
+        engagement_rate_count = 0
+        
         for platform_name, platform_data in platforms.items():
-            followers = platform_data.get("followers", 0)
-            engagement_rate = platform_data.get("engagement_rate", 0)
-            posts = platform_data.get("posts", 0)
-            likes = platform_data.get("likes", 0)
-            comments = platform_data.get("comments", 0)
-            shares = platform_data.get("shares", 0)
+            # Missing and null counts are both treated as zero
+            followers = platform_data.get("followers") or 0
+            engagement_rate = platform_data.get("engagement_rate") or 0
+            posts = platform_data.get("posts") or 0
+            likes = platform_data.get("likes") or 0
+            comments = platform_data.get("comments") or 0
+            shares = platform_data.get("shares") or 0
             
             total_followers += followers
             total_posts += posts
@@ -105,6 +143,10 @@ class BrandingAggregator:
             platform_engagement = likes + comments + shares
             total_engagement += platform_engagement
             
+            if engagement_rate > 0:
+                engagement_rate_sum += engagement_rate
+                engagement_rate_count += 1
+            
             platform_breakdown[platform_name] = {
                 "followers": followers,
                 "engagement_rate": engagement_rate,
@@ -115,15 +157,9 @@ class BrandingAggregator:
                 "total_engagement": platform_engagement
             }
         
-        # Calculate average engagement rate
-        engagement_rates = [
-            p.get("engagement_rate", 0)
-            for p in platform_breakdown.values()
-            if p.get("engagement_rate", 0) > 0
-        ]
         avg_engagement_rate = (
-            sum(engagement_rates) / len(engagement_rates)
-            if engagement_rates else 0.0
+            engagement_rate_sum / engagement_rate_count
+            if engagement_rate_count else 0.0
         )
         
         sentiment_score = latest_metrics.get("sentiment_score", 0.0)
@@ -162,19 +198,13 @@ class BrandingAggregator:
         if platform not in self.SUPPORTED_PLATFORMS:
             raise ValueError(f"Unsupported platform: {platform}")
         
-        db = await get_database()
-        
-        query_filter = {"user_id": user_id}
+        db = await self._get_db()
         
-        if start_date or end_date:
-            query_filter["date"] = {}
-            if start_date:
-                query_filter["date"]["$gte"] = start_date.strftime("%Y-%m-%d")
-            if end_date:
-                query_filter["date"]["$lte"] = end_date.strftime("%Y-%m-%d")
+        query_filter = _build_query_filter(user_id, start_date, end_date)
         
         latest_metrics = await db.branding_metrics.find_one(
             query_filter,
+            projection={"_id": 0, f"platforms.{platform}": 1},
             sort=[("date", -1)]
         )
         
@@ -225,22 +255,22 @@ class BrandingAggregator:
         Returns:
             List of follower counts over time
         """
-        db = await get_database()
+        db = await self._get_db()
         
-        query_filter = {
-            "user_id": user_id,
-            "date": {
-                "$gte": start_date.strftime("%Y-%m-%d"),
-                "$lte": end_date.strftime("%Y-%m-%d")
-            }
-        }
+        query_filter = _build_query_filter(user_id, start_date, end_date)
+        
+        # Only ship the fields the timeline reads
+        if platform:
+            projection = {"_id": 0, "date": 1, f"platforms.{platform}.followers": 1}
+        else:
+            projection = {"_id": 0, "date": 1, "platforms": 1}
         
-        metrics_cursor = db.branding_metrics.find(query_filter).sort("date", 1)
-        metrics_data = await metrics_cursor.to_list(length=None)
+        metrics_cursor = db.branding_metrics.find(query_filter, projection).sort("date", 1)
         
         timeline = []
         
-        for metric in metrics_data:
+        # Stream the cursor - documents are processed batch by batch as they arrive
+        async for metric in metrics_cursor:
             date = metric.get("date")
             platforms = metric.get("platforms", {})
             
@@ -285,11 +315,33 @@ class BrandingAggregator:
         Returns:
             Growth metrics (net growth, growth rate, etc.)
         """
-        timeline = await self.get_growth_timeline(
-            user_id, start_date, end_date, platform
-        )
+        db = await self._get_db()
+        
+        if platform:
+            followers_expr = {"$ifNull": [f"$platforms.{platform}.followers", 0]}
+        else:
+            followers_expr = {"$sum": {"$map": {
+                "input": {"$objectToArray": {"$ifNull": ["$platforms", {}]}},
+                "in": {"$ifNull": ["$$this.v.followers", 0]}
+            }}}
+        
+        # Only the first and last points of the timeline are needed - let the
+        # server pick them instead of shipping the whole timeline
+        pipeline = [
+            {"$match": _build_query_filter(user_id, start_date, end_date)},
+            {"$sort": {"date": 1}},
+            {"$project": {"followers": followers_expr}},
+            {"$group": {
+                "_id": None,
+                "first_followers": {"$first": "$followers"},
+                "last_followers": {"$last": "$followers"},
+                "timeline_points": {"$sum": 1}
+            }}
+        ]
         
-        if len(timeline) < 2:
+        result = await db.branding_metrics.aggregate(pipeline).to_list(length=1)
+        
+        if not result or result[0]["timeline_points"] < 2:
             return {
                 "net_growth": 0,
                 "growth_rate": 0.0,
@@ -298,8 +350,8 @@ class BrandingAggregator:
                 "daily_avg_growth": 0.0
             }
         
-        first_followers = timeline[0]["followers"]
-        last_followers = timeline[-1]["followers"]
+        first_followers = result[0]["first_followers"]
+        last_followers = result[0]["last_followers"]
         net_growth = last_followers - first_followers
         
         growth_rate = (
@@ -317,7 +369,7 @@ class BrandingAggregator:
             "current_followers": last_followers,
             "starting_followers": first_followers,
             "daily_avg_growth": round(daily_avg_growth, 2),
-            "timeline_points": len(timeline)
+            "timeline_points": result[0]["timeline_points"]
         }
     
     async def get_engagement_summary(
@@ -337,60 +389,45 @@ class BrandingAggregator:
         Returns:
             Engagement summary with platform breakdown
         """
-        db = await get_database()
-        
-        query_filter = {
-            "user_id": user_id,
-            "date": {
-                "$gte": start_date.strftime("%Y-%m-%d"),
-                "$lte": end_date.strftime("%Y-%m-%d")
-            }
-        }
-        
-        metrics_cursor = db.branding_metrics.find(query_filter)
-        metrics_data = await metrics_cursor.to_list(length=None)
-        
-        platform_engagement = defaultdict(lambda: {
-            "likes": 0,
-            "comments": 0,
-            "shares": 0,
-            "total_engagement": 0
-        })
+        db = await self._get_db()
+        
+        query_filter = _build_query_filter(user_id, start_date, end_date)
+        
+        # Per-platform totals are computed server-side; only one row per platform is returned
+        pipeline = [
+            {"$match": query_filter},
+            {"$project": {"platform": {"$objectToArray": {"$ifNull": ["$platforms", {}]}}}},
+            {"$unwind": "$platform"},
+            {"$group": {
+                "_id": "$platform.k",
+                "likes": {"$sum": "$platform.v.likes"},
+                "comments": {"$sum": "$platform.v.comments"},
+                "shares": {"$sum": "$platform.v.shares"}
+            }},
+            {"$addFields": {
+                "total_engagement": {"$add": ["$likes", "$comments", "$shares"]}
+            }},
+            {"$sort": {"total_engagement": -1}}
+        ]
         
         total_likes = 0
         total_comments = 0
         total_shares = 0
+        platform_list = []
         
-        for metric in metrics_data:
-            platforms = metric.get("platforms", {})
+        # Stream the per-platform rows instead of materializing them first
+        async for stat in db.branding_metrics.aggregate(pipeline):
+            total_likes += stat["likes"]
+            total_comments += stat["comments"]
+            total_shares += stat["shares"]
             
-            for platform_name, platform_data in platforms.items():
-                likes = platform_data.get("likes", 0)
-                comments = platform_data.get("comments", 0)
-                shares = platform_data.get("shares", 0)
-                
-                total_likes += likes
-                total_comments += comments
-                total_shares += shares
-                
-                platform_engagement[platform_name]["likes"] += likes
-                platform_engagement[platform_name]["comments"] += comments
-                platform_engagement[platform_name]["shares"] += shares
-                platform_engagement[platform_name]["total_engagement"] += (
-                    likes + comments + shares
-                )
-        
-        # Format platform engagement
-        platform_list = [
-            {
-                "platform": platform,
-                **data
-            }
-            for platform, data in platform_engagement.items()
-        ]
-        
-        # Sort by total engagement
-        platform_list.sort(key=lambda x: x["total_engagement"], reverse=True)
+            platform_list.append({
+                "platform": stat["_id"],
+                "likes": stat["likes"],
+                "comments": stat["comments"],
+                "shares": stat["shares"],
+                "total_engagement": stat["total_engagement"]
+            })
         
         return {
             "total_likes": total_likes,
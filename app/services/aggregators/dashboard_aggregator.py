@@ -2,19 +2,71 @@
 Dashboard Aggregator - Aggregates data from all modules for dashboard view
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Set, Tuple
+import asyncio
+import time
 from datetime import datetime, timedelta
 from app.core.database import get_database
 from app.services.aggregators.ads_aggregator import AdsAggregator
-from app.services.aggregators.seo_aggregator import SEOAggregator
 from app.services.aggregators.inbox_aggregator import InboxAggregator
 from app.services.aggregators.email_aggregator import EmailAggregator
 from app.services.aggregators.branding_aggregator import BrandingAggregator
+from app.services.cache.redis_service import RedisService
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# In-process cache of dashboard overviews: (user_id, date_range) -> (expires_at, data)
+# Absorbs dashboard polling even when Redis is unavailable
+_OVERVIEW_CACHE: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+_OVERVIEW_CACHE_TTL = 30  # seconds
+_OVERVIEW_CACHE_MAX_SIZE = 10_000
+
+# Redis key and TTL the dashboard route caches overviews under; prefetched
+# overviews are written there too so the route actually hits them
+OVERVIEW_REDIS_KEY = "dashboard:overview:{user_id}:{date_range}"
+OVERVIEW_REDIS_TTL = 300  # seconds
+
+# Module errors are truncated so one long exception message can't bloat the payload
+_MAX_ERROR_LENGTH = 256
+
+# Dashboard ranges in navigation order; neighbours of a requested range are prefetched
+_DATE_RANGES = ("last_7_days", "last_30_days", "last_90_days")
+
+# user_id -> monotonic time of the last prefetch (at most one per user per TTL)
+_LAST_PREFETCH: Dict[str, float] = {}
+
+# Strong references to in-flight prefetch tasks so they aren't garbage collected
+_PREFETCH_TASKS: Set[asyncio.Task] = set()
+
+
+def _module_error(module: str, error: Exception) -> Dict[str, str]:
+    """
+    Log a module failure and build its (truncated) error entry
+    """
+    logger.error(f"Error aggregating {module} data: {error}")
+    return {"error": str(error)[:_MAX_ERROR_LENGTH]}
+
+
+def _cache_overview(cache_key: Tuple[str, str], dashboard_data: Dict[str, Any]) -> bool:
+    """
+    Store a dashboard overview in the TTL cache
+    
+    Returns:
+        False if the overview was not cached (every module failed)
+    """
+    if dashboard_data["summary"]["total_modules"] == 0:
+        return False
+    
+    _OVERVIEW_CACHE.pop(cache_key, None)
+    if len(_OVERVIEW_CACHE) >= _OVERVIEW_CACHE_MAX_SIZE:
+        # Evict the oldest entry (dicts keep insertion order)
+        _OVERVIEW_CACHE.pop(next(iter(_OVERVIEW_CACHE)))
+    _OVERVIEW_CACHE[cache_key] = (time.monotonic() + _OVERVIEW_CACHE_TTL, dashboard_data)
+    return True
+
+
 class DashboardAggregator:
     """
     Aggregates data from all modules for unified dashboard view
@@ -28,6 +80,8 @@ class DashboardAggregator:
         """
         Get comprehensive dashboard overview combining all modules
         
+        Results are cached in-process for a short TTL per (user_id, date_range).
+        
         Args:
             user_id: User ID
             date_range: Date range string
@@ -35,6 +89,88 @@ class DashboardAggregator:
         Returns:
             Combined dashboard data from all modules
         """
+        cache_key = (user_id, date_range)
+        now = time.monotonic()
+        
+        cached = _OVERVIEW_CACHE.get(cache_key)
+        if cached and cached[0] > now:
+            return cached[1]
+        
+        dashboard_data = await self._build_dashboard_overview(user_id, date_range)
+        
+        if _cache_overview(cache_key, dashboard_data):
+            self._schedule_prefetch(user_id, date_range, now)
+        
+        return dashboard_data
+    
+    def _schedule_prefetch(self, user_id: str, date_range: str, now: float):
+        """
+        Warm the cache for the date ranges adjacent to the one just requested
+        """
+        if date_range not in _DATE_RANGES:
+            return
+        
+        last_prefetch = _LAST_PREFETCH.get(user_id)
+        if last_prefetch is not None and now - last_prefetch < _OVERVIEW_CACHE_TTL:
+            return
+        
+        if len(_LAST_PREFETCH) >= _OVERVIEW_CACHE_MAX_SIZE:
+            _LAST_PREFETCH.pop(next(iter(_LAST_PREFETCH)))
+        _LAST_PREFETCH.pop(user_id, None)
+        _LAST_PREFETCH[user_id] = now
+        
+        index = _DATE_RANGES.index(date_range)
+        for neighbour in _DATE_RANGES[max(index - 1, 0):index + 2]:
+            cached = _OVERVIEW_CACHE.get((user_id, neighbour))
+            if neighbour == date_range or (cached and cached[0] > now):
+                continue
+            
+            task = asyncio.create_task(self._prefetch(user_id, neighbour))
+            _PREFETCH_TASKS.add(task)
+            task.add_done_callback(_PREFETCH_TASKS.discard)
+    
+    async def _prefetch(self, user_id: str, date_range: str):
+        """
+        Build and cache a dashboard overview in the background, both in-process
+        and under the route's Redis key
+        """
+        try:
+            dashboard_data = await self._build_dashboard_overview(user_id, date_range)
+            if _cache_overview((user_id, date_range), dashboard_data):
+                await RedisService().set(
+                    OVERVIEW_REDIS_KEY.format(user_id=user_id, date_range=date_range),
+                    dashboard_data,
+                    ttl=OVERVIEW_REDIS_TTL
+                )
+        except Exception as e:
+            logger.warning(f"Dashboard prefetch failed for {date_range}: {e}")
+    
+    @staticmethod
+    async def invalidate_cache(user_id: str):
+        """
+        Drop cached dashboard overviews for a user, in-process and in Redis
+        (call after data ingestion or integration changes)
+        """
+        for key in [k for k in _OVERVIEW_CACHE if k[0] == user_id]:
+            _OVERVIEW_CACHE.pop(key, None)
+        
+        # Exact keys for every range the route serves - no keyspace SCAN
+        redis_service = RedisService()
+        await asyncio.gather(*(
+            redis_service.delete(
+                OVERVIEW_REDIS_KEY.format(user_id=user_id, date_range=date_range)
+            )
+            for date_range in _DATE_RANGES
+        ))
+    
+    async def _build_dashboard_overview(
+        self,
+        user_id: str,
+        date_range: str
+    ) -> Dict[str, Any]:
+        """
+        Aggregate the dashboard overview from all modules (uncached)
+        """
         # Calculate date range
         end = datetime.utcnow()
         if date_range == "last_7_days":
@@ -57,100 +193,131 @@ class DashboardAggregator:
             "modules": {}
         }
         
-        try:
-            # Ads data
-            ads_aggregator = AdsAggregator()
-            ads_data = await ads_aggregator.aggregate_all_platforms(
-                user_id, start, end
-            )
-            dashboard_data["modules"]["ads"] = {
-                "total_spend": ads_data.get("total_spend", 0),
-                "total_clicks": ads_data.get("total_clicks", 0),
-                "total_conversions": ads_data.get("total_conversions", 0),
-                "platforms": len(ads_data.get("platform_breakdown", []))
-            }
-        except Exception as e:
-            logger.error(f"Error aggregating ads data: {e}")
-            dashboard_data["modules"]["ads"] = {"error": str(e)}
+        # Resolve the (read-only analytics) database handle once and share it
+        # with the sub-aggregators
+        db = await get_database(analytics=True)
         
-        try:
-            # SEO data
-            db = await get_database()
-            seo_query = {
-                "user_id": user_id,
-                "date": {
-                    "$gte": start.strftime("%Y-%m-%d"),
-                    "$lte": end.strftime("%Y-%m-%d")
-                }
+        # Modules are independent - run them concurrently
+        ads_result, seo_result, inbox_result, email_result, branding_result = await asyncio.gather(
+            AdsAggregator(db).aggregate_all_platforms(user_id, start, end),
+            self._fetch_seo(db, user_id, start, end),
+            InboxAggregator(db).aggregate_all_platforms(user_id, start, end),
+            EmailAggregator(db).aggregate_all_campaigns(user_id, start, end),
+            BrandingAggregator(db).aggregate_all_platforms(user_id, start, end),
+            return_exceptions=True
+        )
+        
+        modules = dashboard_data["modules"]
+        ok_modules = 0
+        
+        # Ads data
+        if isinstance(ads_result, Exception):
+            modules["ads"] = _module_error("ads", ads_result)
+        else:
+            ok_modules += 1
+            modules["ads"] = {
+                "total_spend": ads_result.get("total_spend", 0),
+                "total_clicks": ads_result.get("total_clicks", 0),
+                "total_conversions": ads_result.get("total_conversions", 0),
+                "platforms": len(ads_result.get("platform_breakdown", []))
             }
-            seo_cursor = db.seo_metrics.find(seo_query).sort("date", -1).limit(1)
-            seo_data = await seo_cursor.to_list(length=1)
-            
-            if seo_data:
-                seo_aggregator = SEOAggregator()
-                aggregated_seo = seo_aggregator.aggregate_seo_data(seo_data)
-                dashboard_data["modules"]["seo"] = {
-                    "total_organic_traffic": aggregated_seo.get("total_organic_traffic", 0),
-                    "total_keywords": aggregated_seo.get("total_keywords", 0),
-                    "avg_position": aggregated_seo.get("avg_position", 0)
-                }
-            else:
-                dashboard_data["modules"]["seo"] = {"total_organic_traffic": 0}
-        except Exception as e:
-            logger.error(f"Error aggregating SEO data: {e}")
-            dashboard_data["modules"]["seo"] = {"error": str(e)}
         
-        try:
-            # Inbox data
-            inbox_aggregator = InboxAggregator()
-            inbox_data = await inbox_aggregator.aggregate_all_platforms(
-                user_id, start, end
-            )
-            dashboard_data["modules"]["inbox"] = {
-                "total_messages": inbox_data.get("total_messages", 0),
-                "unread_count": inbox_data.get("total_unread", 0),
-                "reply_percentage": inbox_data.get("reply_percentage", 0)
+        # SEO data
+        if isinstance(seo_result, Exception):
+            modules["seo"] = _module_error("SEO", seo_result)
+        else:
+            ok_modules += 1
+            modules["seo"] = seo_result
+        
+        # Inbox data
+        if isinstance(inbox_result, Exception):
+            modules["inbox"] = _module_error("inbox", inbox_result)
+        else:
+            ok_modules += 1
+            modules["inbox"] = {
+                "total_messages": inbox_result.get("total_messages", 0),
+                "unread_count": inbox_result.get("total_unread", 0),
+                "reply_percentage": inbox_result.get("reply_percentage", 0)
             }
-        except Exception as e:
-            logger.error(f"Error aggregating inbox data: {e}")
-            dashboard_data["modules"]["inbox"] = {"error": str(e)}
         
-        try:
-            # Email marketing data
-            email_aggregator = EmailAggregator()
-            email_data = await email_aggregator.aggregate_all_campaigns(
-                user_id, start, end
-            )
-            dashboard_data["modules"]["email_marketing"] = {
-                "total_campaigns": email_data.get("total_campaigns", 0),
-                "total_sent": email_data.get("total_sent", 0),
-                "overall_open_rate": email_data.get("overall_open_rate", 0)
+        # Email marketing data
+        if isinstance(email_result, Exception):
+            modules["email_marketing"] = _module_error("email", email_result)
+        else:
+            ok_modules += 1
+            modules["email_marketing"] = {
+                "total_campaigns": email_result.get("total_campaigns", 0),
+                "total_sent": email_result.get("total_sent", 0),
+                "overall_open_rate": email_result.get("overall_open_rate", 0)
             }
-        except Exception as e:
-            logger.error(f"Error aggregating email data: {e}")
-            dashboard_data["modules"]["email_marketing"] = {"error": str(e)}
         
-        try:
-            # Branding data
-            branding_aggregator = BrandingAggregator()
-            branding_data = await branding_aggregator.aggregate_all_platforms(
-                user_id, start, end
-            )
-            dashboard_data["modules"]["branding"] = {
-                "total_followers": branding_data.get("total_followers", 0),
-                "total_engagement": branding_data.get("total_engagement", 0),
-                "avg_engagement_rate": branding_data.get("avg_engagement_rate", 0)
+        # Branding data
+        if isinstance(branding_result, Exception):
+            modules["branding"] = _module_error("branding", branding_result)
+        else:
+            ok_modules += 1
+            modules["branding"] = {
+                "total_followers": branding_result.get("total_followers", 0),
+                "total_engagement": branding_result.get("total_engagement", 0),
+                "avg_engagement_rate": branding_result.get("avg_engagement_rate", 0)
             }
-        except Exception as e:
-            logger.error(f"Error aggregating branding data: {e}")
-            dashboard_data["modules"]["branding"] = {"error": str(e)}
         
         # Calculate summary metrics
         dashboard_data["summary"] = {
-            "total_modules": len([m for m in dashboard_data["modules"].values() if "error" not in m]),
+            "total_modules": ok_modules,
             "last_updated": datetime.utcnow().isoformat()
         }
         
+        if ok_modules == 0:
+            # Every module failed - mark it so callers can fail fast and skip caching
+            dashboard_data["status"] = "all_failed"
+        
         return dashboard_data
-
-
+    
+    async def _fetch_seo(
+        self,
+        db,
+        user_id: str,
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, Any]:
+        """
+        Get SEO summary for the dashboard from the latest metrics document in range
+        
+        Computed server-side in a single pipeline (uses the user_id + date index)
+        """
+        pipeline = [
+            {"$match": {
+                "user_id": user_id,
+                "date": {
+                    "$gte": start.strftime("%Y-%m-%d"),
+                    "$lte": end.strftime("%Y-%m-%d")
+                }
+            }},
+            {"$sort": {"date": -1}},
+            {"$limit": 1},
+            {"$project": {
+                "_id": 0,
+                "total_organic_traffic": {"$ifNull": ["$organic_traffic", 0]},
+                # Distinct, non-empty keyword strings
+                "total_keywords": {"$size": {"$setUnion": [
+                    {"$filter": {
+                        "input": {"$ifNull": ["$keywords.keyword", []]},
+                        "cond": {"$not": [{"$in": ["$$this", ["", None]]}]}
+                    }},
+                    []
+                ]}},
+                "avg_position": {"$cond": [
+                    {"$gt": [{"$ifNull": ["$clicks", 0]}, 0]},
+                    {"$round": [{"$ifNull": ["$avg_position", 0]}, 2]},
+                    0.0
+                ]}
+            }}
+        ]
+        
+        seo_data = await db.seo_metrics.aggregate(pipeline).to_list(length=1)
+        
+        if not seo_data:
+            return {"total_organic_traffic": 0}
+        
+        return seo_data[0]
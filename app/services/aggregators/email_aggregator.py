@@ -2,19 +2,225 @@
 Email Aggregator - Aggregates email marketing data across campaigns
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
+import asyncio
 from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core.database import get_database
+from app.services.cache.memory_cache import ttl_cache, invalidate_user, recently_invalidated
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Seconds aggregate results are reused for identical requests
+_RESULT_CACHE_TTL = 120
+
+# Fields read by get_top_performing_campaigns (campaign bodies/recipient lists are skipped)
+_TOP_CAMPAIGN_FIELDS = {
+    "campaign_name": 1,
+    "subject": 1,
+    "campaign_type": 1,
+    "sent": 1,
+    "opened": 1,
+    "clicked": 1,
+    "open_rate": 1,
+    "click_rate": 1,
+    "sent_at": 1
+}
+
+# group_by -> ($dateTrunc unit, period label format); weeks start on Sunday (%U)
+_TIME_BUCKETS = {
+    "day": ("day", "%Y-%m-%d"),
+    "week": ("week", "%Y-W%U"),
+    "month": ("month", "%Y-%m")
+}
+
+
+def _percentage(part: str, total: str) -> Dict[str, Any]:
+    """
+    Aggregation expression for round(part / total * 100, 2), 0 when total is 0
+    """
+    return {"$round": [
+        {"$cond": [
+            {"$gt": [total, 0]},
+            {"$multiply": [{"$divide": [part, total]}, 100]},
+            0
+        ]},
+        2
+    ]}
+
+
+def _rounded(field: str) -> Dict[str, Any]:
+    """
+    Aggregation expression for round(field, 2), 0 when the field is null/missing
+    """
+    return {"$round": [{"$ifNull": [field, 0]}, 2]}
+
+
+# Campaign totals and rates over the matched campaigns; shared by
+# aggregate_all_campaigns and both $facet branches of get_engagement_trends
+_CAMPAIGN_TOTALS_STAGES = [
+    {"$group": {
+        "_id": None,
+        "total_campaigns": {"$sum": 1},
+        "total_sent": {"$sum": "$sent"},
+        "total_opened": {"$sum": "$opened"},
+        "total_clicked": {"$sum": "$clicked"},
+        "total_bounced": {"$sum": "$bounced"},
+        "total_unsubscribed": {"$sum": "$unsubscribed"},
+        "avg_open_rate": {"$avg": "$open_rate"},
+        "avg_click_rate": {"$avg": "$click_rate"},
+        "avg_bounce_rate": {"$avg": "$bounce_rate"}
+    }},
+    # Rates are computed server-side so the result is ready to return
+    {"$project": {
+        "_id": 0,
+        "total_campaigns": 1,
+        "total_sent": 1,
+        "total_opened": 1,
+        "total_clicked": 1,
+        "total_bounced": 1,
+        "total_unsubscribed": 1,
+        "overall_open_rate": _percentage("$total_opened", "$total_sent"),
+        "overall_click_rate": _percentage("$total_clicked", "$total_sent"),
+        "overall_bounce_rate": _percentage("$total_bounced", "$total_sent"),
+        "avg_open_rate": _rounded("$avg_open_rate"),
+        "avg_click_rate": _rounded("$avg_click_rate"),
+        "avg_bounce_rate": _rounded("$avg_bounce_rate")
+    }}
+]
+
+# Users per aggregate_many_users query; keeps each $in match and $group small
+_USER_BATCH_SIZE = 500
+
+# Count fields of _CAMPAIGN_TOTALS_STAGES, summed across batches
+_CAMPAIGN_COUNT_FIELDS = (
+    "total_campaigns",
+    "total_sent",
+    "total_opened",
+    "total_clicked",
+    "total_bounced",
+    "total_unsubscribed"
+)
+
+# overall rate -> count field it is the percentage of total_sent for
+_CAMPAIGN_OVERALL_RATES = {
+    "overall_open_rate": "total_opened",
+    "overall_click_rate": "total_clicked",
+    "overall_bounce_rate": "total_bounced"
+}
+
+_CAMPAIGN_AVG_RATES = ("avg_open_rate", "avg_click_rate", "avg_bounce_rate")
+
+_EMPTY_CAMPAIGN_TOTALS = {
+    "total_campaigns": 0,
+    "total_sent": 0,
+    "total_opened": 0,
+    "total_clicked": 0,
+    "total_bounced": 0,
+    "total_unsubscribed": 0,
+    "overall_open_rate": 0.0,
+    "overall_click_rate": 0.0,
+    "overall_bounce_rate": 0.0,
+    "avg_open_rate": 0.0,
+    "avg_click_rate": 0.0,
+    "avg_bounce_rate": 0.0
+}
+
+
+def _build_query_filter(
+    user_id: Union[str, Dict[str, Any]],
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Build the sent-campaigns filter shared by every email aggregation
+    (matches SENT_CAMPAIGNS_INDEX in app.core.indexes)
+    
+    user_id may also be a query operator, e.g. {"$in": [...]}
+    """
+    query_filter = {"user_id": user_id, "status": "sent"}
+    
+    if start_date or end_date:
+        date_filter = {}
+        if start_date:
+            date_filter["$gte"] = start_date
+        if end_date:
+            date_filter["$lte"] = end_date
+        query_filter["sent_at"] = date_filter
+    
+    return query_filter
+
+
+def _sum_campaign_totals(batch_totals: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine _CAMPAIGN_TOTALS_STAGES results over disjoint sets of campaigns
+    
+    Counts are summed and overall rates recomputed from the sums; average
+    rates are weighted by each set's campaign count.
+    """
+    totals = dict(_EMPTY_CAMPAIGN_TOTALS)
+    
+    for batch in batch_totals:
+        for field in _CAMPAIGN_COUNT_FIELDS:
+            totals[field] += batch.get(field, 0)
+    
+    total_campaigns = totals["total_campaigns"]
+    if total_campaigns:
+        for field in _CAMPAIGN_AVG_RATES:
+            weighted_sum = sum(
+                batch.get(field, 0) * batch.get("total_campaigns", 0)
+                for batch in batch_totals
+            )
+            totals[field] = round(weighted_sum / total_campaigns, 2)
+    
+    total_sent = totals["total_sent"]
+    if total_sent:
+        for rate, count_field in _CAMPAIGN_OVERALL_RATES.items():
+            totals[rate] = round(totals[count_field] / total_sent * 100, 2)
+    
+    return totals
+
 
 class EmailAggregator:
     """
     Aggregates email marketing campaign data and metrics
     """
     
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None):
+        """
+        Initialize aggregator
+        
+        Args:
+            db: Optional database handle; callers fanning out to several
+                aggregators can share one handle instead of each resolving it
+        """
+        self._db = db
+    
+    async def _get_db(self, user_id: Optional[str] = None) -> AsyncIOMotorDatabase:
+        """
+        Get the database handle, resolving it once per instance
+        
+        Reads for a user whose cache was just invalidated go to the primary,
+        so they see the write even if secondaries lag.
+        """
+        if user_id is not None and await recently_invalidated(user_id):
+            return await get_database()
+        if self._db is None:
+            self._db = await get_database(analytics=True)
+        return self._db
+    
+    @staticmethod
+    async def invalidate_cache(user_id: str):
+        """
+        Drop cached aggregates for a user (call after campaigns are created,
+        sent or updated)
+        """
+        EmailAggregator.aggregate_all_campaigns.invalidate(user_id)
+        EmailAggregator.get_campaign_performance_over_time.invalidate(user_id)
+        await invalidate_user(user_id)
+    
+    @ttl_cache(ttl=_RESULT_CACHE_TTL)
     async def aggregate_all_campaigns(
         self,
         user_id: str,
@@ -24,6 +230,8 @@ class EmailAggregator:
         """
         Aggregate email campaign data across all campaigns
         
+        Results are cached in-process for a short TTL (see invalidate_cache).
+        
         Args:
             user_id: User ID
             start_date: Optional start date filter
@@ -32,79 +240,19 @@ class EmailAggregator:
         Returns:
             Aggregated email marketing statistics
         """
-        db = await get_database()
+        db = await self._get_db(user_id)
         
-        # Build query filter
-        query_filter = {"user_id": user_id, "status": "sent"}
-        
-        if start_date or end_date:
-            query_filter["sent_at"] = {}
-            if start_date:
-                query_filter["sent_at"]["$gte"] = start_date
-            if end_date:
-                query_filter["sent_at"]["$lte"] = end_date
+        query_filter = _build_query_filter(user_id, start_date, end_date)
         
         # Aggregate campaign metrics
-        pipeline = [
-            {"$match": query_filter},
-            {"$group": {
-                "_id": None,
-                "total_campaigns": {"$sum": 1},
-                "total_sent": {"$sum": "$sent"},
-                "total_opened": {"$sum": "$opened"},
-                "total_clicked": {"$sum": "$clicked"},
-                "total_bounced": {"$sum": "$bounced"},
-                "total_unsubscribed": {"$sum": "$unsubscribed"},
-                "avg_open_rate": {"$avg": "$open_rate"},
-                "avg_click_rate": {"$avg": "$click_rate"},
-                "avg_bounce_rate": {"$avg": "$bounce_rate"}
-            }}
-        ]
+        pipeline = [{"$match": query_filter}, *_CAMPAIGN_TOTALS_STAGES]
         
         result = await db.email_campaigns.aggregate(pipeline).to_list(length=1)
         
         if result:
-            stats = result[0]
-            total_sent = stats.get("total_sent", 0)
-            
-            return {
-                "total_campaigns": stats.get("total_campaigns", 0),
-                "total_sent": total_sent,
-                "total_opened": stats.get("total_opened", 0),
-                "total_clicked": stats.get("total_clicked", 0),
-                "total_bounced": stats.get("total_bounced", 0),
-                "total_unsubscribed": stats.get("total_unsubscribed", 0),
-                "overall_open_rate": round(
-                    (stats.get("total_opened", 0) / total_sent * 100) if total_sent > 0 else 0,
-                    2
-                ),
-                "overall_click_rate": round(
-                    (stats.get("total_clicked", 0) / total_sent * 100) if total_sent > 0 else 0,
-                    2
-                ),
-                "overall_bounce_rate": round(
-                    (stats.get("total_bounced", 0) / total_sent * 100) if total_sent > 0 else 0,
-                    2
-                ),
-                "avg_open_rate": round(stats.get("avg_open_rate", 0), 2),
-                "avg_click_rate": round(stats.get("avg_click_rate", 0), 2),
-                "avg_bounce_rate": round(stats.get("avg_bounce_rate", 0), 2)
-            }
+            return result[0]
         
-        return {
-            "total_campaigns": 0,
-            "total_sent": 0,
-            "total_opened": 0,
-            "total_clicked": 0,
-            "total_bounced": 0,
-            "total_unsubscribed": 0,
-            "overall_open_rate": 0.0,
-            "overall_click_rate": 0.0,
-            "overall_bounce_rate": 0.0,
-            "avg_open_rate": 0.0,
-            "avg_click_rate": 0.0,
-            "avg_bounce_rate": 0.0
-        }
+        return dict(_EMPTY_CAMPAIGN_TOTALS)
     
     async def aggregate_by_campaign_type(
         self,
@@ -123,16 +271,9 @@ class EmailAggregator:
         Returns:
             Breakdown by campaign type
         """
-        db = await get_database()
+        db = await self._get_db(user_id)
         
-        query_filter = {"user_id": user_id, "status": "sent"}
-        
-        if start_date or end_date:
-            query_filter["sent_at"] = {}
-            if start_date:
-                query_filter["sent_at"]["$gte"] = start_date
-            if end_date:
-                query_filter["sent_at"]["$lte"] = end_date
+        query_filter = _build_query_filter(user_id, start_date, end_date)
         
         pipeline = [
             {"$match": query_filter},
@@ -146,36 +287,28 @@ class EmailAggregator:
                 "avg_open_rate": {"$avg": "$open_rate"},
                 "avg_click_rate": {"$avg": "$click_rate"}
             }},
-            {"$sort": {"total_sent": -1}}
+            {"$sort": {"total_sent": -1}},
+            {"$project": {
+                "campaign_count": 1,
+                "total_sent": 1,
+                "total_opened": 1,
+                "total_clicked": 1,
+                "total_bounced": 1,
+                "open_rate": _percentage("$total_opened", "$total_sent"),
+                "click_rate": _percentage("$total_clicked", "$total_sent"),
+                "avg_open_rate": _rounded("$avg_open_rate"),
+                "avg_click_rate": _rounded("$avg_click_rate")
+            }}
         ]
         
-        type_breakdown = await db.email_campaigns.aggregate(pipeline).to_list(length=None)
-        
-        result = {}
-        for item in type_breakdown:
-            campaign_type = item["_id"]
-            total_sent = item.get("total_sent", 0)
-            
-            result[campaign_type] = {
-                "campaign_count": item.get("campaign_count", 0),
-                "total_sent": total_sent,
-                "total_opened": item.get("total_opened", 0),
-                "total_clicked": item.get("total_clicked", 0),
-                "total_bounced": item.get("total_bounced", 0),
-                "open_rate": round(
-                    (item.get("total_opened", 0) / total_sent * 100) if total_sent > 0 else 0,
-                    2
-                ),
-                "click_rate": round(
-                    (item.get("total_clicked", 0) / total_sent * 100) if total_sent > 0 else 0,
-                    2
-                ),
-                "avg_open_rate": round(item.get("avg_open_rate", 0), 2),
-                "avg_click_rate": round(item.get("avg_click_rate", 0), 2)
-            }
-        
-        return result
+        # Stream the cursor straight into the result, keyed by campaign type
+        # (descending total_sent order)
+        return {
+            item.pop("_id"): item
+            async for item in db.email_campaigns.aggregate(pipeline)
+        }
     
+    @ttl_cache(ttl=_RESULT_CACHE_TTL)
     async def get_campaign_performance_over_time(
         self,
         user_id: str,
@@ -186,6 +319,8 @@ class EmailAggregator:
         """
         Get campaign performance metrics over time
         
+        Results are cached in-process for a short TTL (see invalidate_cache).
+        
         Args:
             user_id: User ID
             start_date: Start date
@@ -195,68 +330,43 @@ class EmailAggregator:
         Returns:
             List of performance metrics by time period
         """
-        db = await get_database()
-        
-        query_filter = {
-            "user_id": user_id,
-            "status": "sent",
-            "sent_at": {
-                "$gte": start_date,
-                "$lte": end_date
-            }
-        }
+        db = await self._get_db(user_id)
         
-        # Determine date format based on group_by
-        if group_by == "day":
-            date_format = "%Y-%m-%d"
-        elif group_by == "week":
-            date_format = "%Y-W%U"
-        elif group_by == "month":
-            date_format = "%Y-%m"
-        else:
-            date_format = "%Y-%m-%d"
+        query_filter = _build_query_filter(user_id, start_date, end_date)
+        
+        # Determine bucket unit and period label format based on group_by
+        unit, date_format = _TIME_BUCKETS.get(group_by, _TIME_BUCKETS["day"])
         
+        # Group on a native date bucket (cheap to compare and sort); the label
+        # string is only formatted once per bucket
         pipeline = [
             {"$match": query_filter},
             {"$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": date_format,
-                        "date": "$sent_at"
-                    }
-                },
+                "_id": {"$dateTrunc": {"date": "$sent_at", "unit": unit}},
                 "campaign_count": {"$sum": 1},
                 "total_sent": {"$sum": "$sent"},
                 "total_opened": {"$sum": "$opened"},
                 "total_clicked": {"$sum": "$clicked"},
                 "total_bounced": {"$sum": "$bounced"}
             }},
-            {"$sort": {"_id": 1}}
+            {"$sort": {"_id": 1}},
+            {"$project": {
+                "_id": 0,
+                "period": {"$dateToString": {"format": date_format, "date": "$_id"}},
+                "campaign_count": 1,
+                "total_sent": 1,
+                "total_opened": 1,
+                "total_clicked": 1,
+                "total_bounced": 1,
+                "open_rate": _percentage("$total_opened", "$total_sent"),
+                "click_rate": _percentage("$total_clicked", "$total_sent")
+            }}
         ]
         
-        performance_data = await db.email_campaigns.aggregate(pipeline).to_list(length=None)
-        
-        result = []
-        for item in performance_data:
-            total_sent = item.get("total_sent", 0)
-            result.append({
-                "period": item["_id"],
-                "campaign_count": item.get("campaign_count", 0),
-                "total_sent": total_sent,
-                "total_opened": item.get("total_opened", 0),
-                "total_clicked": item.get("total_clicked", 0),
-                "total_bounced": item.get("total_bounced", 0),
-                "open_rate": round(
-                    (item.get("total_opened", 0) / total_sent * 100) if total_sent > 0 else 0,
-                    2
-                ),
-                "click_rate": round(
-                    (item.get("total_clicked", 0) / total_sent * 100) if total_sent > 0 else 0,
-                    2
-                )
-            })
-        
-        return result
+        # Long ranges grouped by day can exceed the in-memory $group limit
+        return await db.email_campaigns.aggregate(
+            pipeline, allowDiskUse=True
+        ).to_list(length=None)
     
     async def get_top_performing_campaigns(
         self,
@@ -279,46 +389,42 @@ class EmailAggregator:
         Returns:
             List of top performing campaigns
         """
-        db = await get_database()
+        db = await self._get_db(user_id)
         
-        query_filter = {
-            "user_id": user_id,
-            "status": "sent"
-        }
-        
-        if start_date or end_date:
-            query_filter["sent_at"] = {}
-            if start_date:
-                query_filter["sent_at"]["$gte"] = start_date
-            if end_date:
-                query_filter["sent_at"]["$lte"] = end_date
+        query_filter = _build_query_filter(user_id, start_date, end_date)
         
-        # Calculate click_to_open_rate if needed
         if metric == "click_to_open_rate":
-            # Need to fetch and calculate manually
-            campaigns_cursor = db.email_campaigns.find(query_filter)
-            campaigns = await campaigns_cursor.to_list(length=None)
-            
-            for campaign in campaigns:
-                opened = campaign.get("opened", 0)
-                clicked = campaign.get("clicked", 0)
-                if opened > 0:
-                    campaign["click_to_open_rate"] = round((clicked / opened) * 100, 2)
-                else:
-                    campaign["click_to_open_rate"] = 0.0
-            
-            top_campaigns = sorted(
-                campaigns,
-                key=lambda x: x.get("click_to_open_rate", 0),
-                reverse=True
-            )[:limit]
+            # Derived metric - compute, sort and limit it server-side
+            pipeline = [
+                {"$match": query_filter},
+                {"$project": {
+                    **_TOP_CAMPAIGN_FIELDS,
+                    "click_to_open_rate": {
+                        "$cond": [
+                            {"$gt": ["$opened", 0]},
+                            {"$round": [
+                                {"$multiply": [
+                                    {"$divide": [{"$ifNull": ["$clicked", 0]}, "$opened"]},
+                                    100
+                                ]},
+                                2
+                            ]},
+                            0.0
+                        ]
+                    }
+                }},
+                {"$sort": {"click_to_open_rate": -1}},
+                {"$limit": limit}
+            ]
+            top_campaigns = await db.email_campaigns.aggregate(pipeline).to_list(length=limit)
         else:
-            campaigns_cursor = db.email_campaigns.find(query_filter).sort(metric, -1).limit(limit)
+            campaigns_cursor = db.email_campaigns.find(
+                query_filter, _TOP_CAMPAIGN_FIELDS
+            ).sort(metric, -1).limit(limit)
             top_campaigns = await campaigns_cursor.to_list(length=limit)
         
-        result = []
-        for campaign in top_campaigns:
-            result.append({
+        return [
+            {
                 "campaign_id": str(campaign["_id"]),
                 "campaign_name": campaign.get("campaign_name"),
                 "subject": campaign.get("subject"),
@@ -330,9 +436,49 @@ class EmailAggregator:
                 "click_rate": campaign.get("click_rate", 0),
                 "click_to_open_rate": campaign.get("click_to_open_rate", 0),
                 "sent_at": campaign.get("sent_at")
-            })
+            }
+            for campaign in top_campaigns
+        ]
+    
+    async def aggregate_many_users(
+        self,
+        user_ids: List[str],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate email campaign totals across many users (e.g. admin views)
         
-        return result
+        Users are split into batches of _USER_BATCH_SIZE; each batch is one
+        indexed {"user_id": {"$in": batch}} query, batches run concurrently
+        and their totals are summed here, so no single $group spans the
+        whole cohort.
+        
+        Args:
+            user_ids: User IDs
+            start_date: Optional start date filter
+            end_date: Optional end date filter
+            
+        Returns:
+            The same totals aggregate_all_campaigns returns, over all the users
+        """
+        db = await self._get_db()
+        
+        user_ids = list(dict.fromkeys(user_ids))
+        batches = [
+            user_ids[i:i + _USER_BATCH_SIZE]
+            for i in range(0, len(user_ids), _USER_BATCH_SIZE)
+        ]
+        
+        batch_results = await asyncio.gather(*(
+            db.email_campaigns.aggregate([
+                {"$match": _build_query_filter({"$in": batch}, start_date, end_date)},
+                *_CAMPAIGN_TOTALS_STAGES
+            ]).to_list(length=1)
+            for batch in batches
+        ))
+        
+        return _sum_campaign_totals([rows[0] for rows in batch_results if rows])
     
     async def get_engagement_trends(
         self,
@@ -351,16 +497,34 @@ class EmailAggregator:
         Returns:
             Comparison of current vs previous period
         """
-        # Get current period data
-        current_data = await self.aggregate_all_campaigns(user_id, start_date, end_date)
-        
         # Calculate previous period (same length)
         period_length = (end_date - start_date).days
         previous_end = start_date
         previous_start = previous_end - timedelta(days=period_length)
         
-        # Get previous period data
-        previous_data = await self.aggregate_all_campaigns(user_id, previous_start, previous_end)
+        db = await self._get_db(user_id)
+        
+        # One index range scan over both periods; each $facet branch narrows
+        # to its own period and computes the same totals as aggregate_all_campaigns
+        pipeline = [
+            {"$match": _build_query_filter(user_id, previous_start, end_date)},
+            {"$facet": {
+                "current": [
+                    {"$match": {"sent_at": {"$gte": start_date, "$lte": end_date}}},
+                    *_CAMPAIGN_TOTALS_STAGES
+                ],
+                "previous": [
+                    {"$match": {"sent_at": {"$gte": previous_start, "$lte": previous_end}}},
+                    *_CAMPAIGN_TOTALS_STAGES
+                ]
+            }}
+        ]
+        
+        result = await db.email_campaigns.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+        
+        current_data = (facets.get("current") or [dict(_EMPTY_CAMPAIGN_TOTALS)])[0]
+        previous_data = (facets.get("previous") or [dict(_EMPTY_CAMPAIGN_TOTALS)])[0]
         
         def calc_change(current: float, previous: float) -> float:
             """Calculate percentage change"""
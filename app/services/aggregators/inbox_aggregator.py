@@ -3,13 +3,111 @@ Inbox Aggregator - Aggregates inbox messages across all platforms
 """
 
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict
+import asyncio
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core.database import get_database
+from app.services.cache.memory_cache import ttl_cache, invalidate_user, recently_invalidated
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Seconds aggregate results are reused for identical requests
+_RESULT_CACHE_TTL = 120
+
+
+def _count_if(condition: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    $group accumulator counting documents where a boolean expression holds
+    
+    Sums the boolean converted to 0/1 rather than branching with $cond.
+    """
+    return {"$sum": {"$toInt": condition}}
+
+
+# Sub-pipelines shared by aggregate_all_platforms' $facet and the standalone helpers;
+# both run after a $match on user_id (+ timestamp range)
+_RESPONSE_TIME_STAGES = [
+    {"$match": {
+        "replied": True,
+        "replied_at": {"$exists": True},
+        "timestamp": {"$exists": True}
+    }},
+    {"$project": {
+        "response_time_hours": {
+            "$divide": [
+                {"$subtract": ["$replied_at", "$timestamp"]},
+                3600000  # Convert milliseconds to hours
+            ]
+        }
+    }},
+    {"$group": {
+        "_id": None,
+        "avg_response_time_hours": {"$avg": "$response_time_hours"},
+        "min_response_time_hours": {"$min": "$response_time_hours"},
+        "max_response_time_hours": {"$max": "$response_time_hours"}
+    }}
+]
+
+_PEAK_HOURS_STAGES = [
+    {"$group": {
+        "_id": {"$hour": "$timestamp"},
+        "count": {"$sum": 1}
+    }},
+    {"$sort": {"_id": 1}}
+]
+
+
+def _format_response_times(result: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Format the response-time sub-pipeline output
+    """
+    if result and result[0].get("avg_response_time_hours"):
+        return {
+            "avg_hours": round(result[0]["avg_response_time_hours"], 2),
+            "min_hours": round(result[0].get("min_response_time_hours", 0), 2),
+            "max_hours": round(result[0].get("max_response_time_hours", 0), 2)
+        }
+    
+    return {
+        "avg_hours": 0.0,
+        "min_hours": 0.0,
+        "max_hours": 0.0
+    }
+
+
+def _format_peak_hours(hourly_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Format the peak-hours sub-pipeline output
+    """
+    return [
+        {"hour": item["_id"], "message_count": item["count"]}
+        for item in hourly_data
+    ]
+
+
+def _build_query_filter(
+    user_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    **extra: Any
+) -> Dict[str, Any]:
+    """
+    Build an inbox_messages filter on user_id, extra equality fields and
+    an optional timestamp range
+    """
+    query_filter = {"user_id": user_id, **extra}
+    
+    if start_date or end_date:
+        date_filter = {}
+        if start_date:
+            date_filter["$gte"] = start_date
+        if end_date:
+            date_filter["$lte"] = end_date
+        query_filter["timestamp"] = date_filter
+    
+    return query_filter
+
 
 class InboxAggregator:
     """
@@ -29,6 +127,39 @@ class InboxAggregator:
         "email"
     ]
     
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None):
+        """
+        Initialize aggregator
+        
+        Args:
+            db: Optional database handle; callers fanning out to several
+                aggregators can share one handle instead of each resolving it
+        """
+        self._db = db
+    
+    async def _get_db(self, user_id: Optional[str] = None) -> AsyncIOMotorDatabase:
+        """
+        Get the database handle, resolving it once per instance
+        
+        Reads for a user whose cache was just invalidated go to the primary,
+        so they see the write even if secondaries lag.
+        """
+        if user_id is not None and await recently_invalidated(user_id):
+            return await get_database()
+        if self._db is None:
+            self._db = await get_database(analytics=True)
+        return self._db
+    
+    @staticmethod
+    async def invalidate_cache(user_id: str):
+        """
+        Drop cached aggregates for a user (call after messages are read,
+        replied to, archived, etc.)
+        """
+        InboxAggregator.aggregate_all_platforms.invalidate(user_id)
+        await invalidate_user(user_id)
+    
+    @ttl_cache(ttl=_RESULT_CACHE_TTL)
     async def aggregate_all_platforms(
         self,
         user_id: str,
@@ -38,6 +169,8 @@ class InboxAggregator:
         """
         Aggregate inbox messages from all connected platforms
         
+        Results are cached in-process for a short TTL (see invalidate_cache).
+        
         Args:
             user_id: User ID
             start_date: Optional start date filter
@@ -46,47 +179,39 @@ class InboxAggregator:
         Returns:
             Aggregated inbox statistics across all platforms
         """
-        db = await get_database()
-        
-        # Build query filter
-        query_filter = {"user_id": user_id}
+        db = await self._get_db(user_id)
         
-        if start_date or end_date:
-            query_filter["timestamp"] = {}
-            if start_date:
-                query_filter["timestamp"]["$gte"] = start_date
-            if end_date:
-                query_filter["timestamp"]["$lte"] = end_date
+        query_filter = _build_query_filter(user_id, start_date, end_date)
         
-        # Aggregate by platform
+        # Platform breakdown, response times and peak hours in a single pass
+        # over the matched messages
         pipeline = [
             {"$match": query_filter},
-            {"$group": {
-                "_id": "$platform",
-                "total_messages": {"$sum": 1},
-                "unread_count": {
-                    "$sum": {"$cond": [{"$eq": ["$read", False]}, 1, 0]}
-                },
-                "replied_count": {
-                    "$sum": {"$cond": [{"$eq": ["$replied", True]}, 1, 0]}
-                },
-                "archived_count": {
-                    "$sum": {"$cond": [{"$eq": ["$archived", True]}, 1, 0]}
-                },
-                "high_priority_count": {
-                    "$sum": {"$cond": [{"$eq": ["$priority", "high"]}, 1, 0]}
-                },
-                "medium_priority_count": {
-                    "$sum": {"$cond": [{"$eq": ["$priority", "medium"]}, 1, 0]}
-                },
-                "low_priority_count": {
-                    "$sum": {"$cond": [{"$eq": ["$priority", "low"]}, 1, 0]}
-                }
-            }},
-            {"$sort": {"total_messages": -1}}
+            {"$facet": {
+                "by_platform": [
+                    {"$group": {
+                        "_id": "$platform",
+                        "total_messages": {"$sum": 1},
+                        "unread_count": _count_if({"$eq": ["$read", False]}),
+                        "replied_count": _count_if({"$eq": ["$replied", True]}),
+                        "archived_count": _count_if({"$eq": ["$archived", True]}),
+                        "high_priority_count": _count_if({"$eq": ["$priority", "high"]}),
+                        "medium_priority_count": _count_if({"$eq": ["$priority", "medium"]}),
+                        "low_priority_count": _count_if({"$eq": ["$priority", "low"]})
+                    }},
+                    {"$sort": {"total_messages": -1}}
+                ],
+                "response_times": _RESPONSE_TIME_STAGES,
+                "peak_hours": _PEAK_HOURS_STAGES
+            }}
         ]
         
-        platform_stats = await db.inbox_messages.aggregate(pipeline).to_list(length=None)
+        result = await db.inbox_messages.aggregate(
+            pipeline, allowDiskUse=True
+        ).to_list(length=1)
+        facets = result[0] if result else {}
+        
+        platform_stats = facets.get("by_platform", [])
         
         # Calculate totals
         total_messages = 0
@@ -113,25 +238,19 @@ class InboxAggregator:
             total_replied += stat["replied_count"]
             total_archived += stat["archived_count"]
         
-        # Get response time metrics
-        response_times = await self._calculate_response_times(db, user_id, start_date, end_date)
+        response_times = _format_response_times(facets.get("response_times", []))
+        peak_hours = _format_peak_hours(facets.get("peak_hours", []))
         
-        # Get peak hours
-        peak_hours = await self._get_peak_hours(db, user_id, start_date, end_date)
+        # Percentage factor computed once (0 when there are no messages)
+        scale = 100.0 / total_messages if total_messages > 0 else 0.0
         
         return {
             "total_messages": total_messages,
             "total_unread": total_unread,
             "total_replied": total_replied,
             "total_archived": total_archived,
-            "read_percentage": round(
-                ((total_messages - total_unread) / total_messages * 100) if total_messages > 0 else 0,
-                2
-            ),
-            "reply_percentage": round(
-                (total_replied / total_messages * 100) if total_messages > 0 else 0,
-                2
-            ),
+            "read_percentage": round((total_messages - total_unread) * scale, 2),
+            "reply_percentage": round(total_replied * scale, 2),
             "platform_breakdown": platform_breakdown,
             "response_times": response_times,
             "peak_hours": peak_hours
@@ -159,49 +278,51 @@ class InboxAggregator:
         if platform not in self.SUPPORTED_PLATFORMS:
             raise ValueError(f"Unsupported platform: {platform}")
         
-        db = await get_database()
-        
-        query_filter = {"user_id": user_id, "platform": platform}
+        db = await self._get_db(user_id)
         
-        if start_date or end_date:
-            query_filter["timestamp"] = {}
-            if start_date:
-                query_filter["timestamp"]["$gte"] = start_date
-            if end_date:
-                query_filter["timestamp"]["$lte"] = end_date
-        
-        pipeline = [
-            {"$match": query_filter},
-            {"$group": {
-                "_id": None,
-                "total_messages": {"$sum": 1},
-                "unread_count": {
-                    "$sum": {"$cond": [{"$eq": ["$read", False]}, 1, 0]}
-                },
-                "replied_count": {
-                    "$sum": {"$cond": [{"$eq": ["$replied", True]}, 1, 0]}
-                },
-                "archived_count": {
-                    "$sum": {"$cond": [{"$eq": ["$archived", True]}, 1, 0]}
-                }
-            }}
-        ]
+        query_filter = _build_query_filter(user_id, start_date, end_date, platform=platform)
         
-        result = await db.inbox_messages.aggregate(pipeline).to_list(length=1)
+        if start_date is None and end_date is None:
+            # No date range - each count is an index-only COUNT_SCAN on a
+            # {user_id, platform, <flag>} index, run concurrently
+            total_messages, unread_count, replied_count, archived_count = await asyncio.gather(
+                db.inbox_messages.count_documents(query_filter),
+                db.inbox_messages.count_documents({**query_filter, "read": False}),
+                db.inbox_messages.count_documents({**query_filter, "replied": True}),
+                db.inbox_messages.count_documents({**query_filter, "archived": True})
+            )
+            stats = {
+                "total_messages": total_messages,
+                "unread_count": unread_count,
+                "replied_count": replied_count,
+                "archived_count": archived_count
+            }
+        else:
+            pipeline = [
+                {"$match": query_filter},
+                {"$group": {
+                    "_id": None,
+                    "total_messages": {"$sum": 1},
+                    "unread_count": _count_if({"$eq": ["$read", False]}),
+                    "replied_count": _count_if({"$eq": ["$replied", True]}),
+                    "archived_count": _count_if({"$eq": ["$archived", True]})
+                }}
+            ]
+            
+            result = await db.inbox_messages.aggregate(pipeline).to_list(length=1)
+            stats = result[0] if result else None
         
-        if result:
-            stats = result[0]
+        if stats:
+            total_messages = stats["total_messages"]
+            scale = 100.0 / total_messages if total_messages > 0 else 0.0
+            
             return {
                 "platform": platform,
-                "total_messages": stats["total_messages"],
+                "total_messages": total_messages,
                 "unread_count": stats["unread_count"],
                 "replied_count": stats["replied_count"],
                 "archived_count": stats["archived_count"],
-                "read_percentage": round(
-                    ((stats["total_messages"] - stats["unread_count"]) / stats["total_messages"] * 100)
-                    if stats["total_messages"] > 0 else 0,
-                    2
-                )
+                "read_percentage": round((total_messages - stats["unread_count"]) * scale, 2)
             }
         
         return {
@@ -222,54 +343,17 @@ class InboxAggregator:
     ) -> Dict[str, Any]:
         """
         Calculate average response times for messages
+        
+        Standalone variant; aggregate_all_platforms computes this in its $facet
         """
         try:
-            query_filter = {
-                "user_id": user_id,
-                "replied": True,
-                "replied_at": {"$exists": True},
-                "timestamp": {"$exists": True}
-            }
+            query_filter = _build_query_filter(user_id, start_date, end_date)
             
-            if start_date or end_date:
-                query_filter["timestamp"] = {}
-                if start_date:
-                    query_filter["timestamp"]["$gte"] = start_date
-                if end_date:
-                    query_filter["timestamp"]["$lte"] = end_date
-            
-            pipeline = [
-                {"$match": query_filter},
-                {"$project": {
-                    "response_time_hours": {
-                        "$divide": [
-                            {"$subtract": ["$replied_at", "$timestamp"]},
-                            3600000  # Convert milliseconds to hours
-                        ]
-                    }
-                }},
-                {"$group": {
-                    "_id": None,
-                    "avg_response_time_hours": {"$avg": "$response_time_hours"},
-                    "min_response_time_hours": {"$min": "$response_time_hours"},
-                    "max_response_time_hours": {"$max": "$response_time_hours"}
-                }}
-            ]
+            pipeline = [{"$match": query_filter}, *_RESPONSE_TIME_STAGES]
             
             result = await db.inbox_messages.aggregate(pipeline).to_list(length=1)
             
-            if result and result[0].get("avg_response_time_hours"):
-                return {
-                    "avg_hours": round(result[0]["avg_response_time_hours"], 2),
-                    "min_hours": round(result[0].get("min_response_time_hours", 0), 2),
-                    "max_hours": round(result[0].get("max_response_time_hours", 0), 2)
-                }
-            
-            return {
-                "avg_hours": 0.0,
-                "min_hours": 0.0,
-                "max_hours": 0.0
-            }
+            return _format_response_times(result)
             
         except Exception as e:
             logger.error(f"Error calculating response times: {e}")
@@ -288,32 +372,17 @@ class InboxAggregator:
     ) -> List[Dict[str, Any]]:
         """
         Get hourly distribution of messages (peak hours)
+        
+        Standalone variant; aggregate_all_platforms computes this in its $facet
         """
         try:
-            query_filter = {"user_id": user_id}
+            query_filter = _build_query_filter(user_id, start_date, end_date)
             
-            if start_date or end_date:
-                query_filter["timestamp"] = {}
-                if start_date:
-                    query_filter["timestamp"]["$gte"] = start_date
-                if end_date:
-                    query_filter["timestamp"]["$lte"] = end_date
-            
-            pipeline = [
-                {"$match": query_filter},
-                {"$group": {
-                    "_id": {"$hour": "$timestamp"},
-                    "count": {"$sum": 1}
-                }},
-                {"$sort": {"_id": 1}}
-            ]
+            pipeline = [{"$match": query_filter}, *_PEAK_HOURS_STAGES]
             
             hourly_data = await db.inbox_messages.aggregate(pipeline).to_list(length=24)
             
-            return [
-                {"hour": item["_id"], "message_count": item["count"]}
-                for item in hourly_data
-            ]
+            return _format_peak_hours(hourly_data)
             
         except Exception as e:
             logger.error(f"Error getting peak hours: {e}")
@@ -336,7 +405,7 @@ class InboxAggregator:
         Returns:
             Conversation summary with message count, last message, etc.
         """
-        db = await get_database()
+        db = await self._get_db(user_id)
         
         query_filter = {
             "user_id": user_id,
@@ -353,11 +422,10 @@ class InboxAggregator:
             {"$group": {
                 "_id": None,
                 "total_messages": {"$sum": 1},
-                "unread_count": {
-                    "$sum": {"$cond": [{"$eq": ["$read", False]}, 1, 0]}
-                },
-                "last_message": {"$first": "$$ROOT"},
-                "first_message": {"$last": "$$ROOT"}
+                "unread_count": _count_if({"$eq": ["$read", False]}),
+                # Only the fields the summary reads, not whole messages
+                "last_message": {"$first": {"timestamp": "$timestamp", "replied": "$replied"}},
+                "first_message": {"$last": {"timestamp": "$timestamp"}}
             }}
         ]
         
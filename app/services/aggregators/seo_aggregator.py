@@ -2,25 +2,261 @@
 SEO Aggregator - Aggregates SEO data from various sources
 """
 
-from typing import Dict, Any, List
-from collections import defaultdict
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from numba import njit
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Record-level count fields summed in aggregate_seo_data
+_TOTAL_FIELDS = ("organic_traffic", "impressions", "clicks", "backlinks_count")
+
+
+def _record_column(
+    seo_data: List[Dict[str, Any]],
+    field: str,
+    dtype: type = np.int64
+) -> np.ndarray:
+    """
+    Extract one record-level field into a NumPy array (missing values are 0)
+    """
+    return np.fromiter(
+        (record.get(field, 0) for record in seo_data),
+        dtype=dtype,
+        count=len(seo_data)
+    )
+
+
+def _flatten_rows(
+    seo_data: List[Dict[str, Any]],
+    rows_field: str,
+    key_field: str
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flatten the page or keyword rows of every record into parallel arrays
+    
+    Each distinct key (URL or keyword) is interned to an integer ID in order
+    of first appearance; rows with an empty key are skipped.
+    
+    Returns:
+        (keys, key IDs, clicks, impressions, positions)
+    """
+    # Records without the sub-array are common; `or ()` avoids allocating a
+    # default list per miss
+    n_rows = sum(len(record.get(rows_field) or ()) for record in seo_data)
+    
+    row_keys = np.empty(n_rows, dtype=np.int64)
+    clicks = np.empty(n_rows, dtype=np.int64)
+    impressions = np.empty(n_rows, dtype=np.int64)
+    positions = np.empty(n_rows, dtype=np.float64)
+    
+    key_ids: Dict[str, int] = {}
+    n = 0
+    
+    for record in seo_data:
+        rows = record.get(rows_field)
+        if not rows:
+            continue
+        
+        for row in rows:
+            key = row.get(key_field, "")
+            if not key:
+                continue
+            
+            row_keys[n] = key_ids.setdefault(key, len(key_ids))
+            clicks[n] = row.get("clicks", 0)
+            impressions[n] = row.get("impressions", 0)
+            positions[n] = row.get("position", 0)
+            n += 1
+    
+    return list(key_ids), row_keys[:n], clicks[:n], impressions[:n], positions[:n]
+
+
+@njit(cache=True)
+def _accumulate_rows(row_keys, clicks, impressions, positions, n_keys):
+    """
+    Sum flattened rows per key ID
+    
+    Returns:
+        Per-key (clicks, impressions, position sum, row count, any position <= 10)
+    """
+    key_clicks = np.zeros(n_keys, dtype=np.int64)
+    key_impressions = np.zeros(n_keys, dtype=np.int64)
+    key_positions = np.zeros(n_keys, dtype=np.float64)
+    key_counts = np.zeros(n_keys, dtype=np.int64)
+    key_top_10 = np.zeros(n_keys, dtype=np.bool_)
+    
+    for i in range(row_keys.shape[0]):
+        key = row_keys[i]
+        key_clicks[key] += clicks[i]
+        key_impressions[key] += impressions[i]
+        key_positions[key] += positions[i]
+        key_counts[key] += 1
+        if positions[i] <= 10:
+            key_top_10[key] = True
+    
+    return key_clicks, key_impressions, key_positions, key_counts, key_top_10
+
+
+class _RowTable(NamedTuple):
+    """
+    Per-key page or keyword sums as parallel arrays indexed by key ID
+    """
+    keys: List[str]
+    clicks: np.ndarray
+    impressions: np.ndarray
+    positions: np.ndarray
+    counts: np.ndarray
+    top_10: np.ndarray
+
+
+def _build_table(
+    seo_data: List[Dict[str, Any]],
+    rows_field: str,
+    key_field: str
+) -> _RowTable:
+    """
+    Flatten and sum the page or keyword rows of every record
+    """
+    keys, *rows = _flatten_rows(seo_data, rows_field, key_field)
+    return _RowTable(keys, *_accumulate_rows(*rows, len(keys)))
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """
+    Element-wise numerator / denominator; 0.0 where the denominator is 0
+    """
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros(numerator.shape, dtype=np.float64),
+        where=denominator > 0
+    )
+
+
+def _ctr(clicks: np.ndarray, impressions: np.ndarray) -> np.ndarray:
+    """
+    Click-through rates as (unrounded) percentages
+    
+    Rows round with Python's round() after .tolist(); np.round rounds halves
+    to even on the binary value and can differ in the last digit.
+    """
+    return _ratio(clicks, impressions) * 100
+
+
+def _page_rows(table: _RowTable, indices: List[int]):
+    """
+    Yield (url, page metrics) for the given page IDs
+    """
+    clicks = table.clicks[indices]
+    impressions = table.impressions[indices]
+    positions = table.positions[indices]
+    
+    for i, page_clicks, page_impressions, ctr, avg_position, position_sum in zip(
+        indices,
+        clicks.tolist(),
+        impressions.tolist(),
+        _ctr(clicks, impressions).tolist(),
+        _ratio(positions, clicks).tolist(),
+        positions.tolist()
+    ):
+        yield table.keys[i], {
+            "clicks": page_clicks,
+            "impressions": page_impressions,
+            "ctr": round(ctr, 2),
+            # Pages without clicks keep the raw position sum
+            "position": round(avg_position, 2) if page_clicks > 0 else position_sum
+        }
+
+
+def _keyword_rows(table: _RowTable, indices: List[int]):
+    """
+    Yield (keyword, keyword metrics) for the given keyword IDs
+    """
+    clicks = table.clicks[indices]
+    impressions = table.impressions[indices]
+    counts = table.counts[indices]
+    
+    for i, keyword_clicks, keyword_impressions, ctr, position, count in zip(
+        indices,
+        clicks.tolist(),
+        impressions.tolist(),
+        _ctr(clicks, impressions).tolist(),
+        _ratio(table.positions[indices], counts).tolist(),
+        counts.tolist()
+    ):
+        yield table.keys[i], {
+            "clicks": keyword_clicks,
+            "impressions": keyword_impressions,
+            "ctr": round(ctr, 2),
+            "position": round(position, 2),
+            "count": count
+        }
+
+
+def _top_indices(clicks: np.ndarray, limit: int) -> List[int]:
+    """
+    IDs of the `limit` keys with the most clicks (ties keep first-seen order)
+    
+    Uses an O(N) partial selection; only the selected IDs are sorted.
+    """
+    k = min(limit, clicks.size)
+    if k <= 0:
+        return []
+    
+    # Click count of the k-th best key
+    threshold = clicks[np.argpartition(-clicks, k - 1)[k - 1]]
+    
+    # Ties at the cut-off go to the first-seen keys, as with a stable sort
+    above = np.flatnonzero(clicks > threshold)
+    tied = np.flatnonzero(clicks == threshold)[:k - above.size]
+    selected = np.concatenate((above, tied))
+    
+    return selected[np.lexsort((selected, -clicks[selected]))].tolist()
+
 
 class SEOAggregator:
     """
     Aggregates SEO metrics from Google Search Console and other SEO tools
     """
     
+    def __init__(self):
+        """
+        Initialize aggregator
+        """
+        # (seo_data, (pages, keywords)) for the last input scanned - report
+        # endpoints call several methods on the same documents
+        self._last_scan: Optional[
+            Tuple[List[Dict[str, Any]], Tuple[_RowTable, _RowTable]]
+        ] = None
+    
+    def _scan(self, seo_data: List[Dict[str, Any]]) -> Tuple[_RowTable, _RowTable]:
+        """
+        Build the page and keyword tables for seo_data, reusing the previous
+        scan when called again with the same list
+        
+        The list is compared by identity, so it must not be mutated between calls.
+        """
+        if self._last_scan is not None and self._last_scan[0] is seo_data:
+            return self._last_scan[1]
+        
+        tables = (
+            _build_table(seo_data, "pages", "url"),
+            _build_table(seo_data, "keywords", "keyword")
+        )
+        
+        # Holding the list keeps its identity from being reused while cached
+        self._last_scan = (seo_data, tables)
+        return tables
+    
     def aggregate_seo_data(self, seo_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Aggregate SEO metrics from raw data
         
         Args:
             seo_data: List of SEO metric documents from database
-            
+        
         Returns:
             Aggregated SEO metrics dictionary
         """
@@ -39,111 +275,56 @@ class SEOAggregator:
                 "keywords": {}
             }
         
-        total_organic_traffic = 0
-        total_impressions = 0
-        total_clicks = 0
-        total_backlinks = 0
-        domain_authority_sum = 0
-        domain_authority_count = 0
-        
-        pages_data = defaultdict(lambda: {
-            "clicks": 0,
-            "impressions": 0,
-            "ctr": 0.0,
-            "position": 0.0
-        })
-        
-        keywords_data = defaultdict(lambda: {
-            "clicks": 0,
-            "impressions": 0,
-            "ctr": 0.0,
-            "position": 0.0,
-            "count": 0
-        })
-        
-        all_keywords = set()
-        top_10_keywords = set()
-        
-        for record in seo_data:
-            # Aggregate basic metrics
-            total_organic_traffic += record.get("organic_traffic", 0)
-            total_impressions += record.get("impressions", 0)
-            total_clicks += record.get("clicks", 0)
-            total_backlinks += record.get("backlinks_count", 0)
-            
-            # Domain authority
-            if "domain_authority" in record:
-                domain_authority_sum += record["domain_authority"]
-                domain_authority_count += 1
-            
-            # Page-level data
-            pages = record.get("pages", [])
-            for page in pages:
-                page_url = page.get("url", "")
-                if page_url:
-                    pages_data[page_url]["clicks"] += page.get("clicks", 0)
-                    pages_data[page_url]["impressions"] += page.get("impressions", 0)
-                    pages_data[page_url]["position"] += page.get("position", 0)
-            
-            # Keyword-level data
-            keywords = record.get("keywords", [])
-            for keyword_data in keywords:
-                keyword = keyword_data.get("keyword", "")
-                if keyword:
-                    all_keywords.add(keyword)
-                    keywords_data[keyword]["clicks"] += keyword_data.get("clicks", 0)
-                    keywords_data[keyword]["impressions"] += keyword_data.get("impressions", 0)
-                    keywords_data[keyword]["position"] += keyword_data.get("position", 0)
-                    keywords_data[keyword]["count"] += 1
-                    
-                    # Track top 10 keywords (position <= 10)
-                    if keyword_data.get("position", 0) <= 10:
-                        top_10_keywords.add(keyword)
-        
-        # Calculate averages for pages
-        for page_url, data in pages_data.items():
-            if data["impressions"] > 0:
-                data["ctr"] = round((data["clicks"] / data["impressions"]) * 100, 2)
-            if data["clicks"] > 0:
-                data["position"] = round(data["position"] / data["clicks"], 2)
-        
-        # Calculate averages for keywords
-        for keyword, data in keywords_data.items():
-            if data["impressions"] > 0:
-                data["ctr"] = round((data["clicks"] / data["impressions"]) * 100, 2)
-            if data["count"] > 0:
-                data["position"] = round(data["position"] / data["count"], 2)
+        # Record-level totals are reduced column by column instead of per record
+        organic_traffic, impressions, clicks, backlinks = (
+            _record_column(seo_data, field) for field in _TOTAL_FIELDS
+        )
+        
+        # .sum() returns NumPy scalars - convert so results stay JSON-serializable
+        total_organic_traffic = int(organic_traffic.sum())
+        total_impressions = int(impressions.sum())
+        total_clicks = int(clicks.sum())
+        total_backlinks = int(backlinks.sum())
+        
+        domain_authorities = [
+            record["domain_authority"]
+            for record in seo_data
+            if "domain_authority" in record
+        ]
+        
+        pages, keywords = self._scan(seo_data)
+        
+        pages_data = dict(_page_rows(pages, list(range(len(pages.keys)))))
+        keywords_data = dict(_keyword_rows(keywords, list(range(len(keywords.keys)))))
         
         # Calculate overall averages
         avg_position = 0.0
         avg_ctr = 0.0
         
         if total_clicks > 0:
-            position_sum = sum(
-                record.get("avg_position", 0) * record.get("clicks", 0)
-                for record in seo_data
-            )
-            avg_position = round(position_sum / total_clicks, 2)
+            # Click-weighted average position
+            positions = _record_column(seo_data, "avg_position", np.float64)
+            avg_position = round(float(np.dot(positions, clicks)) / total_clicks, 2)
         
         if total_impressions > 0:
             avg_ctr = round((total_clicks / total_impressions) * 100, 2)
         
         domain_authority = 0.0
-        if domain_authority_count > 0:
-            domain_authority = round(domain_authority_sum / domain_authority_count, 2)
+        if domain_authorities:
+            domain_authority = round(float(np.mean(domain_authorities)), 2)
         
         return {
             "total_organic_traffic": total_organic_traffic,
             "total_impressions": total_impressions,
             "total_clicks": total_clicks,
-            "total_keywords": len(all_keywords),
-            "top_10_keywords": len(top_10_keywords),
+            "total_keywords": len(keywords.keys),
+            "top_10_keywords": int(keywords.top_10.sum()),
             "total_backlinks": total_backlinks,
             "domain_authority": domain_authority,
             "avg_position": avg_position,
             "avg_ctr": avg_ctr,
-            "pages": dict(pages_data),
-            "keywords": dict(keywords_data)
+            "pages": pages_data,
+            "keywords": keywords_data
         }
     
     def get_top_pages(
@@ -157,45 +338,16 @@ class SEOAggregator:
         Args:
             seo_data: List of SEO metric documents
             limit: Number of top pages to return
-            
+        
         Returns:
             List of top pages with metrics
         """
-        pages_dict = defaultdict(lambda: {
-            "url": "",
-            "clicks": 0,
-            "impressions": 0,
-            "ctr": 0.0,
-            "position": 0.0
-        })
-        
-        for record in seo_data:
-            pages = record.get("pages", [])
-            for page in pages:
-                page_url = page.get("url", "")
-                if page_url:
-                    if not pages_dict[page_url]["url"]:
-                        pages_dict[page_url]["url"] = page_url
-                    
-                    pages_dict[page_url]["clicks"] += page.get("clicks", 0)
-                    pages_dict[page_url]["impressions"] += page.get("impressions", 0)
-                    pages_dict[page_url]["position"] += page.get("position", 0)
-        
-        # Calculate averages
-        for page_url, data in pages_dict.items():
-            if data["impressions"] > 0:
-                data["ctr"] = round((data["clicks"] / data["impressions"]) * 100, 2)
-            if data["clicks"] > 0:
-                data["position"] = round(data["position"] / data["clicks"], 2)
-        
-        # Sort by clicks and return top N
-        top_pages = sorted(
-            pages_dict.values(),
-            key=lambda x: x["clicks"],
-            reverse=True
-        )[:limit]
-        
-        return top_pages
+        pages, _ = self._scan(seo_data)
+        
+        return [
+            {"url": url, **metrics}
+            for url, metrics in _page_rows(pages, _top_indices(pages.clicks, limit))
+        ]
     
     def get_top_keywords(
         self,
@@ -208,46 +360,15 @@ class SEOAggregator:
         Args:
             seo_data: List of SEO metric documents
             limit: Number of top keywords to return
-            
+        
         Returns:
             List of top keywords with metrics
         """
-        keywords_dict = defaultdict(lambda: {
-            "keyword": "",
-            "clicks": 0,
-            "impressions": 0,
-            "ctr": 0.0,
-            "position": 0.0,
-            "count": 0
-        })
-        
-        for record in seo_data:
-            keywords = record.get("keywords", [])
-            for keyword_data in keywords:
-                keyword = keyword_data.get("keyword", "")
-                if keyword:
-                    if not keywords_dict[keyword]["keyword"]:
-                        keywords_dict[keyword]["keyword"] = keyword
-                    
-                    keywords_dict[keyword]["clicks"] += keyword_data.get("clicks", 0)
-                    keywords_dict[keyword]["impressions"] += keyword_data.get("impressions", 0)
-                    keywords_dict[keyword]["position"] += keyword_data.get("position", 0)
-                    keywords_dict[keyword]["count"] += 1
-        
-        # Calculate averages
-        for keyword, data in keywords_dict.items():
-            if data["impressions"] > 0:
-                data["ctr"] = round((data["clicks"] / data["impressions"]) * 100, 2)
-            if data["count"] > 0:
-                data["position"] = round(data["position"] / data["count"], 2)
-        
-        # Sort by clicks and return top N
-        top_keywords = sorted(
-            keywords_dict.values(),
-            key=lambda x: x["clicks"],
-            reverse=True
-        )[:limit]
-        
-        return top_keywords
-
-
+        _, keywords = self._scan(seo_data)
+        
+        return [
+            {"keyword": keyword, **metrics}
+            for keyword, metrics in _keyword_rows(
+                keywords, _top_indices(keywords.clicks, limit)
+            )
+        ]
@@ -2,13 +2,250 @@
 LLM Client - Wrapper for OpenAI and Anthropic APIs
 """
 
+import asyncio
+import functools
+import hashlib
+import json
 import logging
-from typing import Dict, Any, List, Optional
+import re
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from app.core.config import settings
+from app.services.cache.redis_service import RedisService
 import httpx
+import orjson
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential
+)
 
 logger = logging.getLogger(__name__)
 
+# Provider statuses worth retrying: rate limits and transient server errors
+_RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed provider call is transient and should be retried
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in _RETRYABLE_STATUS_CODES
+    # Timeouts, dropped connections and protocol errors
+    return isinstance(error, httpx.TransportError)
+
+
+# Fenced ```json block - the first structured-output fallback
+_JSON_FENCE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+
+# Shared HTTP clients keyed by timeout - every LLMClient reuses one connection
+# pool (and its TLS sessions) instead of handshaking per instance
+_CLIENTS: Dict[float, httpx.AsyncClient] = {}
+
+
+def _get_client(timeout: float) -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client for a timeout, creating it on first use
+    """
+    client = _CLIENTS.get(timeout)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            # Concurrent completions are multiplexed over one connection per host
+            http2=True
+        )
+        _CLIENTS[timeout] = client
+    return client
+
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """
+    Find the first balanced {...} span in text
+    
+    Single linear scan tracking brace depth; braces inside string literals
+    (including escaped quotes) are ignored. Unlike a greedy regex this can't
+    backtrack on long responses.
+    
+    Returns:
+        The object text, or None if there is no complete object
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped = False
+    
+    for i in range(start, len(text)):
+        char = text[i]
+        
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    
+    return None
+
+
+def _parse_json_response(response: str) -> Dict[str, Any]:
+    """
+    Parse the JSON object from a structured-output response
+    
+    Tries the whole response, then a fenced ```json block, then the first
+    balanced {...} span.
+    """
+    try:
+        # Try to parse directly
+        return orjson.loads(response)
+    except orjson.JSONDecodeError:
+        # Try to extract JSON from markdown code blocks
+        json_match = _JSON_FENCE.search(response)
+        if json_match:
+            return orjson.loads(json_match.group(1))
+        
+        # Try to find JSON object
+        json_object = _extract_json_object(response)
+        if json_object:
+            return orjson.loads(json_object)
+        
+        logger.error(f"Failed to parse JSON from response: {response}")
+        raise ValueError("Could not parse JSON from LLM response")
+
+
+# Schema instructions by schema identity: id -> (schema, text). Schemas are
+# module constants, so each is serialized once and every request gets a
+# byte-identical (prefix-cacheable) instruction block
+_SCHEMA_INSTRUCTIONS: Dict[int, Tuple[Dict[str, Any], str]] = {}
+_SCHEMA_INSTRUCTIONS_MAX_SIZE = 256
+
+
+def _schema_instructions(output_schema: Dict[str, Any]) -> str:
+    """
+    Get the JSON-only response instructions for a schema, serializing it once
+    """
+    cached = _SCHEMA_INSTRUCTIONS.get(id(output_schema))
+    # The identity check guards against a freed schema's id being reused
+    if cached and cached[0] is output_schema:
+        return cached[1]
+    
+    instructions = f"""Please respond with ONLY valid JSON matching this schema:
+{json.dumps(output_schema, indent=2)}
+
+Do not include any text outside the JSON object."""
+    
+    if len(_SCHEMA_INSTRUCTIONS) >= _SCHEMA_INSTRUCTIONS_MAX_SIZE:
+        # Evict the oldest entry (dicts keep insertion order)
+        _SCHEMA_INSTRUCTIONS.pop(next(iter(_SCHEMA_INSTRUCTIONS)))
+    # Holding the schema keeps its id from being reused while cached
+    _SCHEMA_INSTRUCTIONS[id(output_schema)] = (output_schema, instructions)
+    return instructions
+
+
+def _structured_prompts(
+    prompt: str,
+    output_schema: Dict[str, Any],
+    system_prompt: Optional[str],
+    cache_system_prompt: bool
+) -> Tuple[str, Optional[str]]:
+    """
+    Add the JSON schema instructions to a structured-output request
+    
+    Returns:
+        (prompt, system_prompt)
+    """
+    schema_instructions = _schema_instructions(output_schema)
+    
+    if cache_system_prompt:
+        # Keep the static schema in the cached prefix, ahead of the variable prompt
+        return prompt, f"{system_prompt or ''}\n\n{schema_instructions}".lstrip()
+    
+    # Enhance prompt to request JSON
+    return f"{prompt}\n\n{schema_instructions}", system_prompt
+
+
+# Provider batch states after which no more results will be produced
+_OPENAI_BATCH_DONE = frozenset({"completed", "failed", "expired", "cancelled"})
+
+# How long wait_for_batch waits by default: both providers expire batches
+# after 24 hours, plus an hour of margin for the final status to land
+_BATCH_WAIT_TIMEOUT = 25 * 60 * 60  # seconds
+
+# In-process cache of low-temperature completions: key -> (expires_at, text)
+# Higher temperatures are meant to vary between calls and are never cached
+_COMPLETION_CACHE: Dict[bytes, Tuple[float, str]] = {}
+_COMPLETION_CACHE_TTL = 3600  # seconds
+_COMPLETION_CACHE_MAX_SIZE = 10_000
+_MAX_CACHED_TEMPERATURE = 0.3
+
+# Cached completions are also shared through Redis so other workers and
+# scheduled jobs (e.g. nightly recommendations) hit them too
+_REDIS_COMPLETION_PREFIX = "llm:completion:"
+
+# Completions in flight per cache key - concurrent identical requests await
+# the same API call instead of each issuing one
+_IN_FLIGHT: Dict[bytes, asyncio.Task] = {}
+
+
+def _completion_key(
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str],
+    temperature: float,
+    max_tokens: int
+) -> bytes:
+    """
+    Hash the inputs that determine a completion into a compact cache key
+    """
+    key_text = "\x1f".join(
+        (model, system_prompt or "", prompt, str(temperature), str(max_tokens))
+    )
+    return hashlib.blake2b(key_text.encode(), digest_size=16).digest()
+
+
+def _finish_in_flight(key: bytes, task: asyncio.Task):
+    """
+    Done callback for an in-flight completion: cache it if it succeeded
+    """
+    _IN_FLIGHT.pop(key, None)
+    
+    if task.cancelled() or task.exception() is not None:
+        return
+    
+    _COMPLETION_CACHE.pop(key, None)
+    if len(_COMPLETION_CACHE) >= _COMPLETION_CACHE_MAX_SIZE:
+        # Evict the oldest entry (dicts keep insertion order)
+        _COMPLETION_CACHE.pop(next(iter(_COMPLETION_CACHE)))
+    _COMPLETION_CACHE[key] = (time.monotonic() + _COMPLETION_CACHE_TTL, task.result())
+
+
+async def close_clients():
+    """
+    Close the shared HTTP clients
+    
+    Called on application shutdown
+    """
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    
+    for client in clients:
+        await client.aclose()
+
 
 class LLMClient:
     """
@@ -35,18 +272,23 @@ class LLMClient:
         else:
             raise ValueError(f"Unsupported provider: {provider}")
         
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.client = _get_client(60.0)
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """
+        Release the client
+        
+        The HTTP client is shared between instances and closed on application
+        shutdown (see close_clients), so there is nothing to release here.
+        """
     
     async def generate_completion(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        cache_system_prompt: bool = False
     ) -> str:
         """
         Generate text completion
@@ -56,71 +298,208 @@ class LLMClient:
             system_prompt: System instructions
             temperature: Creativity (0-1)
             max_tokens: Maximum response length
-            
+            cache_system_prompt: Mark a static system prompt for provider-side
+                prompt caching (see _build_request)
+        
+        Completions with temperature <= 0.3 are cached for an hour (in-process,
+        backed by Redis when available), and concurrent identical requests
+        share a single API call.
+        
         Returns:
             Generated text
         """
-        try:
-            if self.provider == "openai":
-                return await self._openai_completion(
-                    prompt, system_prompt, temperature, max_tokens
-                )
-            elif self.provider == "anthropic":
-                return await self._anthropic_completion(
-                    prompt, system_prompt, temperature, max_tokens
+        if temperature > _MAX_CACHED_TEMPERATURE:
+            return await self._complete(
+                prompt, system_prompt, temperature, max_tokens, cache_system_prompt
+            )
+        
+        key = _completion_key(self.model, prompt, system_prompt, temperature, max_tokens)
+        
+        cached = _COMPLETION_CACHE.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        task = _IN_FLIGHT.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._complete_shared(
+                    key, prompt, system_prompt, temperature, max_tokens, cache_system_prompt
                 )
-        except Exception as e:
-            logger.error(f"LLM completion failed: {str(e)}")
-            raise
+            )
+            _IN_FLIGHT[key] = task
+            task.add_done_callback(functools.partial(_finish_in_flight, key))
+        
+        # Shielded so one cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(task)
     
-    async def _openai_completion(
+    async def _complete_shared(
         self,
+        key: bytes,
         prompt: str,
         system_prompt: Optional[str],
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        cache_system_prompt: bool
     ) -> str:
-        """OpenAI API completion"""
-        url = f"{self.base_url}/chat/completions"
+        """
+        Run a cacheable completion through the shared Redis cache
         
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
+        Redis is optional - when it is unavailable this is a plain completion.
+        """
+        redis = RedisService()
+        redis_key = _REDIS_COMPLETION_PREFIX + key.hex()
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        cached = await redis.get(redis_key)
+        if isinstance(cached, str):
+            return cached
         
-        json_data = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
+        text = await self._complete(
+            prompt, system_prompt, temperature, max_tokens, cache_system_prompt
+        )
+        await redis.set(redis_key, text, ttl=_COMPLETION_CACHE_TTL)
+        return text
+    
+    async def _complete(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        cache_system_prompt: bool = False
+    ) -> str:
+        """
+        Run a buffered (uncached) completion request
+        """
+        try:
+            url, headers, json_data = self._build_request(
+                prompt, system_prompt, temperature, max_tokens, cache_system_prompt
+            )
+            
+            data = await self._post_json(url, headers, json_data)
+            
+            if self.provider == "openai":
+                return data["choices"][0]["message"]["content"]
+            return data["content"][0]["text"]
         
-        response = await self.client.post(url, headers=headers, json=json_data)
+        except Exception as e:
+            logger.error(f"LLM completion failed: {str(e)}")
+            raise
+    
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        stop=stop_after_attempt(4),
+        wait=wait_random_exponential(multiplier=0.5, max=10),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True
+    )
+    async def _post_json(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        json_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        POST a JSON request to the provider and parse the JSON response
+        
+        Rate limits (429), transient 5xx errors and connection failures are
+        retried up to 3 times with jittered exponential backoff; other errors
+        raise immediately.
+        """
+        response = await self.client.post(
+            url, headers=headers, content=orjson.dumps(json_data)
+        )
         response.raise_for_status()
         
-        data = response.json()
-        return data["choices"][0]["message"]["content"]
+        return orjson.loads(response.content)
+    
+    async def generate_completion_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        cache_system_prompt: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Generate text completion, yielding text deltas as they arrive
+        
+        Consumers can start work on the first tokens instead of waiting for
+        the whole response, and the response is never buffered in full.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System instructions
+            temperature: Creativity (0-1)
+            max_tokens: Maximum response length
+            cache_system_prompt: Mark a static system prompt for provider-side
+                prompt caching (see _build_request)
+        
+        Yields:
+            Generated text chunks
+        """
+        url, headers, json_data = self._build_request(
+            prompt, system_prompt, temperature, max_tokens, cache_system_prompt
+        )
+        json_data["stream"] = True
+        
+        try:
+            async with self.client.stream(
+                "POST", url, headers=headers, content=orjson.dumps(json_data)
+            ) as response:
+                response.raise_for_status()
+                
+                # Server-sent events: only the "data:" lines carry payloads
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    delta = self._stream_delta(orjson.loads(data))
+                    if delta:
+                        yield delta
+        
+        except Exception as e:
+            logger.error(f"LLM streaming completion failed: {str(e)}")
+            raise
     
-    async def _anthropic_completion(
+    def _build_request(
         self,
         prompt: str,
         system_prompt: Optional[str],
         temperature: float,
-        max_tokens: int
-    ) -> str:
-        """Anthropic API completion"""
-        url = f"{self.base_url}/messages"
+        max_tokens: int,
+        cache_system_prompt: bool = False
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """
+        Build the provider's completion request
         
-        headers = {
-            "x-api-key": self.api_key,
-            "anthropic-version": "2023-06-01",
-            "Content-Type": "application/json"
-        }
+        The system prompt always leads the request so a static one forms a
+        byte-identical prefix: OpenAI caches such prefixes automatically, and
+        with cache_system_prompt Anthropic gets an explicit ephemeral
+        cache_control breakpoint after it.
+        
+        Returns:
+            (url, headers, JSON body)
+        """
+        headers = {**self._auth_headers(), "Content-Type": "application/json"}
+        
+        if self.provider == "openai":
+            messages = []
+            if system_prompt:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": prompt})
+            
+            json_data = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens
+            }
+            
+            return f"{self.base_url}/chat/completions", headers, json_data
         
         json_data = {
             "model": self.model,
@@ -131,20 +510,48 @@ class LLMClient:
             ]
         }
         
-        if system_prompt:
+        if system_prompt and cache_system_prompt:
+            json_data["system"] = [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }]
+        elif system_prompt:
             json_data["system"] = system_prompt
         
-        response = await self.client.post(url, headers=headers, json=json_data)
-        response.raise_for_status()
+        return f"{self.base_url}/messages", headers, json_data
+    
+    def _auth_headers(self) -> Dict[str, str]:
+        """
+        Authentication headers for the provider's API
+        """
+        if self.provider == "openai":
+            return {"Authorization": f"Bearer {self.api_key}"}
+        return {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+    
+    def _stream_delta(self, event: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the text delta from a streamed event (None for non-text events)
+        """
+        if self.provider == "openai":
+            choices = event.get("choices")
+            if choices:
+                return choices[0].get("delta", {}).get("content")
+            return None
         
-        data = response.json()
-        return data["content"][0]["text"]
+        event_type = event.get("type")
+        if event_type == "content_block_delta":
+            return event["delta"].get("text")
+        if event_type == "error":
+            raise ValueError(f"Anthropic stream error: {event.get('error')}")
+        return None
     
     async def generate_structured_output(
         self,
         prompt: str,
         output_schema: Dict[str, Any],
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        cache_system_prompt: bool = False
     ) -> Dict[str, Any]:
         """
         Generate structured JSON output
@@ -153,71 +560,283 @@ class LLMClient:
             prompt: User prompt
             output_schema: Expected JSON schema
             system_prompt: System instructions
-            
+            cache_system_prompt: The system prompt is static - append the schema
+                instructions to it (instead of the prompt) and mark it for
+                provider-side prompt caching
+        
         Returns:
             Parsed JSON response
         """
-        import json
-        
-        # Enhance prompt to request JSON
-        json_prompt = f"""{prompt}
-
-Please respond with ONLY valid JSON matching this schema:
-{json.dumps(output_schema, indent=2)}
-
-Do not include any text outside the JSON object."""
+        json_prompt, system_prompt = _structured_prompts(
+            prompt, output_schema, system_prompt, cache_system_prompt
+        )
         
         response = await self.generate_completion(
             prompt=json_prompt,
             system_prompt=system_prompt,
-            temperature=0.3  # Lower temperature for structured output
+            temperature=0.3,  # Lower temperature for structured output
+            cache_system_prompt=cache_system_prompt
+        )
+        
+        return _parse_json_response(response)
+    
+    async def generate_packed_output(
+        self,
+        instructions: str,
+        texts: List[str],
+        response_format: str,
+        output_schema: Dict[str, Any],
+        system_prompt: Optional[str] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Generate one structured result per text with a single request
+        
+        The texts are numbered 1.. in the prompt and the response's
+        "results" items are mapped back by their "index" field.
+        
+        Args:
+            instructions: Task description placed before the numbered texts
+            texts: Texts to analyze
+            response_format: Example JSON of the response, a "results" list
+                whose items carry the text number as "index"
+            output_schema: Expected JSON schema of the response
+            system_prompt: System instructions
+        
+        Returns:
+            Results in input order; None for texts the response left out
+        """
+        numbered_texts = "\n".join(
+            f'{number}. "{text}"' for number, text in enumerate(texts, 1)
+        )
+        prompt = (
+            f"{instructions}\n\n{numbered_texts}\n\n"
+            f"Respond with ONLY this JSON format, one result per text:\n{response_format}"
+        )
+        
+        response = await self.generate_structured_output(
+            prompt, output_schema, system_prompt=system_prompt
         )
         
-        # Extract JSON from response
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        for item in response.get("results") or []:
+            number = item.get("index")
+            # The first result for a text wins
+            if isinstance(number, int) and 1 <= number <= len(texts) and results[number - 1] is None:
+                results[number - 1] = item
+        
+        return results
+    
+    async def submit_batch(self, requests: List[Dict[str, Any]]) -> str:
+        """
+        Submit completions to the provider's Batch API
+        
+        Batches complete within 24 hours at half the price of real-time
+        calls and don't count against the real-time rate limits - use them
+        for offline work such as backfills and nightly jobs.
+        
+        Args:
+            requests: One dict per completion with "custom_id" and "prompt",
+                and optionally "system_prompt", "temperature", "max_tokens"
+                and "output_schema" (structured output, see poll_batch)
+        
+        Returns:
+            Batch ID for poll_batch
+        """
+        bodies = []
+        for request in requests:
+            prompt = request["prompt"]
+            system_prompt = request.get("system_prompt")
+            if request.get("output_schema") is not None:
+                prompt, system_prompt = _structured_prompts(
+                    prompt, request["output_schema"], system_prompt, False
+                )
+            
+            _, _, json_data = self._build_request(
+                prompt,
+                system_prompt,
+                request.get("temperature", 0.7),
+                request.get("max_tokens", 2000)
+            )
+            bodies.append((request["custom_id"], json_data))
+        
         try:
-            # Try to parse directly
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Try to extract JSON from markdown code blocks
-            import re
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(1))
+            if self.provider == "openai":
+                # Requests are uploaded as a JSONL file, then batched
+                jsonl = b"\n".join(
+                    orjson.dumps({
+                        "custom_id": custom_id,
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": json_data
+                    })
+                    for custom_id, json_data in bodies
+                )
+                
+                response = await self.client.post(
+                    f"{self.base_url}/files",
+                    headers=self._auth_headers(),
+                    data={"purpose": "batch"},
+                    files={"file": ("batch.jsonl", jsonl, "application/jsonl")}
+                )
+                response.raise_for_status()
+                
+                response = await self.client.post(
+                    f"{self.base_url}/batches",
+                    headers={**self._auth_headers(), "Content-Type": "application/json"},
+                    content=orjson.dumps({
+                        "input_file_id": orjson.loads(response.content)["id"],
+                        "endpoint": "/v1/chat/completions",
+                        "completion_window": "24h"
+                    })
+                )
+            else:
+                response = await self.client.post(
+                    f"{self.base_url}/messages/batches",
+                    headers={**self._auth_headers(), "Content-Type": "application/json"},
+                    content=orjson.dumps({
+                        "requests": [
+                            {"custom_id": custom_id, "params": json_data}
+                            for custom_id, json_data in bodies
+                        ]
+                    })
+                )
             
-            # Try to find JSON object
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
+            response.raise_for_status()
+            batch_id = orjson.loads(response.content)["id"]
             
-            logger.error(f"Failed to parse JSON from response: {response}")
-            raise ValueError("Could not parse JSON from LLM response")
+            logger.info(f"Submitted LLM batch {batch_id} with {len(bodies)} requests")
+            return batch_id
+        
+        except Exception as e:
+            logger.error(f"LLM batch submission failed: {str(e)}")
+            raise
     
-    async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
+    async def poll_batch(
+        self,
+        batch_id: str,
+        structured: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
-        Analyze sentiment of text
+        Check a batch submitted with submit_batch and fetch its results
+        
+        Args:
+            batch_id: ID returned by submit_batch
+            structured: Parse each completion as structured-output JSON
         
         Returns:
-            {
-                "sentiment": "positive" | "negative" | "neutral",
-                "score": -1.0 to 1.0,
-                "confidence": 0.0 to 1.0
-            }
+            None while the batch is still running, then completion text (or
+            parsed JSON) by custom_id; requests that failed, expired or could
+            not be parsed are missing from the result
         """
-        prompt = f"""Analyze the sentiment of the following text and respond with JSON:
-
-Text: "{text}"
-
-Respond with ONLY this JSON format:
-{{
-    "sentiment": "positive" | "negative" | "neutral",
-    "score": <number from -1.0 to 1.0>,
-    "confidence": <number from 0.0 to 1.0>
-}}"""
+        try:
+            if self.provider == "openai":
+                response = await self.client.get(
+                    f"{self.base_url}/batches/{batch_id}", headers=self._auth_headers()
+                )
+                response.raise_for_status()
+                batch = orjson.loads(response.content)
+                
+                if batch["status"] not in _OPENAI_BATCH_DONE:
+                    return None
+                if not batch.get("output_file_id"):
+                    logger.warning(f"LLM batch {batch_id} ended with status {batch['status']}")
+                    return {}
+                
+                results_url = f"{self.base_url}/files/{batch['output_file_id']}/content"
+            else:
+                response = await self.client.get(
+                    f"{self.base_url}/messages/batches/{batch_id}",
+                    headers=self._auth_headers()
+                )
+                response.raise_for_status()
+                batch = orjson.loads(response.content)
+                
+                if batch["processing_status"] != "ended":
+                    return None
+                
+                results_url = batch["results_url"]
+            
+            response = await self.client.get(results_url, headers=self._auth_headers())
+            response.raise_for_status()
         
-        schema = {
-            "sentiment": "string",
-            "score": "number",
-            "confidence": "number"
-        }
+        except Exception as e:
+            logger.error(f"LLM batch poll failed: {str(e)}")
+            raise
+        
+        results = {}
+        for line in response.content.splitlines():
+            if not line.strip():
+                continue
+            
+            item = orjson.loads(line)
+            text = self._batch_result_text(item)
+            if text is None:
+                continue
+            
+            if not structured:
+                results[item["custom_id"]] = text
+                continue
+            
+            try:
+                results[item["custom_id"]] = _parse_json_response(text)
+            except ValueError:
+                # Already logged by _parse_json_response
+                continue
+        
+        return results
+    
+    async def wait_for_batch(
+        self,
+        batch_id: str,
+        structured: bool = False,
+        poll_interval: float = 300.0,
+        timeout: float = _BATCH_WAIT_TIMEOUT
+    ) -> Dict[str, Any]:
+        """
+        Poll a batch until it ends and return its results (see poll_batch)
+        
+        Transient poll failures (rate limits, 5xx, dropped connections) are
+        logged and retried at the next interval; other errors raise.
+        
+        Args:
+            batch_id: ID returned by submit_batch
+            structured: Parse each completion as structured-output JSON
+            poll_interval: Seconds between status checks
+            timeout: Seconds to wait before giving up
+        
+        Raises:
+            TimeoutError: If the batch hasn't ended within `timeout`
+        """
+        deadline = time.monotonic() + timeout
+        
+        while True:
+            await asyncio.sleep(poll_interval)
+            
+            try:
+                results = await self.poll_batch(batch_id, structured)
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                logger.warning(f"Transient error polling LLM batch {batch_id}, retrying: {e}")
+                results = None
+            
+            if results is not None:
+                return results
+            
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"LLM batch {batch_id} did not finish within {timeout:.0f}s")
+    
+    def _batch_result_text(self, item: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the completion text of one batch result line (None if it failed)
+        """
+        if self.provider == "openai":
+            response = item.get("response") or {}
+            if response.get("status_code") != 200:
+                return None
+            return response["body"]["choices"][0]["message"]["content"]
         
-        return await self.generate_structured_output(prompt, schema)
\ No newline at end of file
+        result = item.get("result") or {}
+        if result.get("type") != "succeeded":
+            return None
+        return result["message"]["content"][0]["text"]
@@ -2,13 +2,66 @@
 Prediction Engine - Time series forecasting for ads, SEO, etc.
 """
 
+import bisect
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
+from numba import njit
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Daily ad metrics forecast by predict_ads_performance (column order matters)
+_ADS_SERIES_FIELDS = ("spend", "impressions", "clicks", "conversions")
+
+# Prediction confidence by days of history: < 14, < 30, < 60, 60+
+_CONFIDENCE_THRESHOLDS = (14, 30, 60)
+_CONFIDENCE_LEVELS = (0.5, 0.7, 0.85, 0.95)
+
+
+@njit(cache=True)
+def _forecast_njit(values, forecast_days, invert_trend):
+    """
+    Moving average + trend forecast of a float64 series
+    
+    Returns:
+        (mean, lower, upper)
+    """
+    n = values.shape[0]
+    window_size = min(7, n)
+    
+    # Moving average over the last week
+    recent_sum = 0.0
+    for i in range(n - window_size, n):
+        recent_sum += values[i]
+    mean_value = recent_sum / window_size
+    
+    # Daily trend: last week vs the week before (the last week's sum is reused)
+    daily_trend = 0.0
+    if n >= 14:
+        older_sum = 0.0
+        for i in range(n - 14, n - 7):
+            older_sum += values[i]
+        daily_trend = (recent_sum / 7 - older_sum / 7) / 7
+    
+    if invert_trend:
+        daily_trend = -abs(daily_trend)  # Always improve (lower position)
+    
+    forecasted_value = max(0.0, mean_value + daily_trend * forecast_days)
+    
+    # Population standard deviation of the window
+    if window_size > 1:
+        squared_sum = 0.0
+        for i in range(n - window_size, n):
+            deviation = values[i] - mean_value
+            squared_sum += deviation * deviation
+        std_dev = np.sqrt(squared_sum / window_size)
+    else:
+        std_dev = mean_value * 0.25
+    margin = std_dev * 1.5
+    
+    return forecasted_value, max(0.0, forecasted_value - margin), forecasted_value + margin
+
 
 class PredictionEngine:
     """
@@ -37,52 +90,53 @@ class PredictionEngine:
             if len(historical_data) < self.min_data_points:
                 raise ValueError(f"Need at least {self.min_data_points} days of data")
             
-            # Extract time series
-            dates = [datetime.fromisoformat(d['date']) for d in historical_data]
-            spend = [d.get('spend', 0) for d in historical_data]
-            impressions = [d.get('impressions', 0) for d in historical_data]
-            clicks = [d.get('clicks', 0) for d in historical_data]
-            conversions = [d.get('conversions', 0) for d in historical_data]
+            # Extract time series in one pass: one row per day, one column per metric
+            series = np.fromiter(
+                (d.get(field, 0) for d in historical_data for field in _ADS_SERIES_FIELDS),
+                dtype=np.float64,
+                count=len(historical_data) * len(_ADS_SERIES_FIELDS)
+            ).reshape(len(historical_data), len(_ADS_SERIES_FIELDS))
+            
+            # Transposed once so each metric is a contiguous row for the forecast kernel
+            spend, impressions, clicks, conversions = np.ascontiguousarray(series.T)
             
             # Determine forecast horizon
             forecast_days = 7 if prediction_period == "next_7_days" else 30
             
             # Generate predictions using simple moving average + trend
-            predictions = {
-                "spend": self._forecast_metric(spend, forecast_days),
-                "impressions": self._forecast_metric(impressions, forecast_days),
-                "clicks": self._forecast_metric(clicks, forecast_days),
-                "conversions": self._forecast_metric(conversions, forecast_days)
-            }
+            spend_mean, spend_lower, spend_upper = self._forecast_metric(spend, forecast_days)
+            impressions_mean, _, _ = self._forecast_metric(impressions, forecast_days)
+            clicks_mean, clicks_lower, clicks_upper = self._forecast_metric(clicks, forecast_days)
+            conversions_mean, _, _ = self._forecast_metric(conversions, forecast_days)
             
             # Calculate derived metrics
-            predicted_ctr = (predictions["clicks"]["mean"] / predictions["impressions"]["mean"] * 100) \
-                if predictions["impressions"]["mean"] > 0 else 0
+            predicted_ctr = (clicks_mean / impressions_mean * 100) \
+                if impressions_mean > 0 else 0
             
-            predicted_cpc = (predictions["spend"]["mean"] / predictions["clicks"]["mean"]) \
-                if predictions["clicks"]["mean"] > 0 else 0
+            predicted_cpc = (spend_mean / clicks_mean) \
+                if clicks_mean > 0 else 0
             
             # Calculate confidence based on data quality
             confidence = self._calculate_confidence(historical_data)
             
             return {
                 "predictions": {
-                    "spend": round(predictions["spend"]["mean"], 2),
-                    "impressions": int(predictions["impressions"]["mean"]),
-                    "clicks": int(predictions["clicks"]["mean"]),
-                    "conversions": round(predictions["conversions"]["mean"], 2),
+                    "spend": round(spend_mean, 2),
+                    "impressions": int(impressions_mean),
+                    "clicks": int(clicks_mean),
+                    "conversions": round(conversions_mean, 2),
                     "ctr": round(predicted_ctr, 2),
                     "cpc": round(predicted_cpc, 2)
                 },
                 "confidence": confidence,
                 "confidence_intervals": {
                     "spend": {
-                        "lower": round(predictions["spend"]["lower"], 2),
-                        "upper": round(predictions["spend"]["upper"], 2)
+                        "lower": round(spend_lower, 2),
+                        "upper": round(spend_upper, 2)
                     },
                     "clicks": {
-                        "lower": int(predictions["clicks"]["lower"]),
-                        "upper": int(predictions["clicks"]["upper"])
+                        "lower": int(clicks_lower),
+                        "upper": int(clicks_upper)
                     }
                 },
                 "model_info": {
@@ -117,37 +171,43 @@ class PredictionEngine:
             
             # Extract metrics
             traffic = [d.get('organic_traffic', 0) for d in historical_data]
-            keywords_count = [len(d.get('keywords', [])) for d in historical_data]
             
-            # Average position across all keywords
+            # Keyword count and average position across all keywords, in one pass
+            keywords_count = []
             avg_positions = []
             for d in historical_data:
                 keywords = d.get('keywords', [])
-                if keywords:
-                    positions = [k.get('position', 0) for k in keywords]
-                    avg_positions.append(sum(positions) / len(positions))
-                else:
-                    avg_positions.append(0)
+                keywords_count.append(len(keywords))
+                avg_positions.append(
+                    np.fromiter(
+                        (k.get('position', 0) for k in keywords),
+                        dtype=np.float64,
+                        count=len(keywords)
+                    ).mean()
+                    if keywords else 0.0
+                )
             
             forecast_days = 7 if prediction_period == "next_7_days" else 30
             
             # Generate predictions
-            traffic_pred = self._forecast_metric(traffic, forecast_days)
-            keywords_pred = self._forecast_metric(keywords_count, forecast_days)
-            position_pred = self._forecast_metric(avg_positions, forecast_days, invert_trend=True)
+            traffic_mean, _, _ = self._forecast_metric(traffic, forecast_days)
+            keywords_mean, _, _ = self._forecast_metric(keywords_count, forecast_days)
+            position_mean, _, _ = self._forecast_metric(
+                avg_positions, forecast_days, invert_trend=True
+            )
             
             confidence = self._calculate_confidence(historical_data)
             
             # Generate recommendations
             recommendations = self._generate_seo_recommendations(
-                historical_data, traffic_pred, position_pred
+                historical_data, traffic_mean, position_mean
             )
             
             return {
                 "predictions": {
-                    "organic_traffic": int(traffic_pred["mean"]),
-                    "keywords_count": int(keywords_pred["mean"]),
-                    "avg_position": round(position_pred["mean"], 1)
+                    "organic_traffic": int(traffic_mean),
+                    "keywords_count": int(keywords_mean),
+                    "avg_position": round(position_mean, 1)
                 },
                 "confidence": confidence,
                 "recommendations": recommendations,
@@ -174,43 +234,50 @@ class PredictionEngine:
         """
         try:
             traffic = [d.get('organic_traffic', 0) for d in historical_data]
-            dates = [datetime.fromisoformat(d['date']) for d in historical_data]
-            
-            # Generate daily forecasts
-            daily_predictions = []
-            base_date = dates[-1]
-            
-            for i in range(1, forecast_days + 1):
-                forecast_date = base_date + timedelta(days=i)
-                
-                # Simple forecast using moving average + trend
-                window = traffic[-7:]  # Last 7 days
-                avg = sum(window) / len(window)
-                
-                # Calculate trend
-                if len(traffic) >= 14:
-                    recent_avg = sum(traffic[-7:]) / 7
-                    older_avg = sum(traffic[-14:-7]) / 7
-                    trend = (recent_avg - older_avg) / 7  # Daily trend
-                else:
-                    trend = 0
-                
-                # Apply trend
-                prediction = avg + (trend * i)
-                prediction = max(0, prediction)  # No negative traffic
-                
-                # Confidence interval (±20%)
-                lower = prediction * 0.8
-                upper = prediction * 1.2
-                
-                daily_predictions.append({
-                    "date": forecast_date.strftime("%Y-%m-%d"),
-                    "predicted_traffic": int(prediction),
-                    "lower_bound": int(lower),
-                    "upper_bound": int(upper)
-                })
-            
-            total_predicted = sum(d["predicted_traffic"] for d in daily_predictions)
+            
+            # Only the last date is needed to anchor the forecast
+            base_date = datetime.fromisoformat(historical_data[-1]['date'])
+            
+            # Simple forecast using moving average + trend (both invariant across days)
+            window = traffic[-7:]  # Last 7 days
+            avg = sum(window) / len(window)
+            
+            if len(traffic) >= 14:
+                recent_avg = sum(traffic[-7:]) / 7
+                older_avg = sum(traffic[-14:-7]) / 7
+                trend = (recent_avg - older_avg) / 7  # Daily trend
+            else:
+                trend = 0
+            
+            # All days at once; no negative traffic
+            predictions = np.maximum(avg + trend * np.arange(1, forecast_days + 1), 0)
+            
+            # Confidence interval (±20%)
+            lower = predictions * 0.8
+            upper = predictions * 1.2
+            
+            forecast_dates = [
+                (base_date + timedelta(days=i)).strftime("%Y-%m-%d")
+                for i in range(1, forecast_days + 1)
+            ]
+            predicted_traffic = predictions.astype(np.int64).tolist()
+            
+            daily_predictions = [
+                {
+                    "date": forecast_date,
+                    "predicted_traffic": prediction,
+                    "lower_bound": lower_bound,
+                    "upper_bound": upper_bound
+                }
+                for forecast_date, prediction, lower_bound, upper_bound in zip(
+                    forecast_dates,
+                    predicted_traffic,
+                    lower.astype(np.int64).tolist(),
+                    upper.astype(np.int64).tolist()
+                )
+            ]
+            
+            total_predicted = sum(predicted_traffic)
             
             # Determine trend
             if trend > 0:
@@ -236,7 +303,7 @@ class PredictionEngine:
         values: List[float],
         forecast_days: int,
         invert_trend: bool = False
-    ) -> Dict[str, float]:
+    ) -> Tuple[float, float, float]:
         """
         Forecast a single metric using moving average + trend
         
@@ -244,36 +311,15 @@ class PredictionEngine:
             values: Historical values
             forecast_days: Number of days to forecast
             invert_trend: If True, negative trend is good (e.g., position)
+            
+        Returns:
+            (mean, lower, upper) - public dicts are only built by the callers
         """
-        # Calculate moving average
-        window_size = min(7, len(values))
-        recent_values = values[-window_size:]
-        mean_value = sum(recent_values) / len(recent_values)
-        
-        # Calculate trend
-        if len(values) >= 14:
-            recent_avg = sum(values[-7:]) / 7
-            older_avg = sum(values[-14:-7]) / 7
-            daily_trend = (recent_avg - older_avg) / 7
-        else:
-            daily_trend = 0
-        
-        # Apply trend
-        if invert_trend:
-            daily_trend = -abs(daily_trend)  # Always improve (lower position)
-        
-        forecasted_value = mean_value + (daily_trend * forecast_days)
-        forecasted_value = max(0, forecasted_value)  # No negative values
-        
-        # Confidence interval (±25%)
-        std_dev = np.std(recent_values) if len(recent_values) > 1 else mean_value * 0.25
-        margin = std_dev * 1.5
-        
-        return {
-            "mean": forecasted_value,
-            "lower": max(0, forecasted_value - margin),
-            "upper": forecasted_value + margin
-        }
+        return _forecast_njit(
+            np.ascontiguousarray(values, dtype=np.float64),
+            forecast_days,
+            invert_trend
+        )
     
     def _calculate_confidence(self, data: List[Dict[str, Any]]) -> float:
         """
@@ -282,23 +328,14 @@ class PredictionEngine:
         Returns:
             Confidence score (0.0 to 1.0)
         """
-        # Base confidence on data quantity and consistency
-        data_points = len(data)
-        
-        if data_points < 14:
-            return 0.5
-        elif data_points < 30:
-            return 0.7
-        elif data_points < 60:
-            return 0.85
-        else:
-            return 0.95
+        # Base confidence on data quantity: table lookup by history length bucket
+        return _CONFIDENCE_LEVELS[bisect.bisect_right(_CONFIDENCE_THRESHOLDS, len(data))]
     
     def _generate_seo_recommendations(
         self,
         historical_data: List[Dict[str, Any]],
-        traffic_pred: Dict[str, float],
-        position_pred: Dict[str, float]
+        traffic_mean: float,
+        position_mean: float
     ) -> List[str]:
         """Generate SEO recommendations based on predictions"""
         recommendations = []
@@ -314,15 +351,15 @@ class PredictionEngine:
                 )
         
         # Analyze position
-        if position_pred["mean"] > 10:
+        if position_mean > 10:
             recommendations.append(
                 "Average position is low. Focus on improving content quality and building backlinks."
             )
         
         # Always add general recommendation
-        if traffic_pred["mean"] > 0:
+        if traffic_mean > 0:
             recommendations.append(
-                f"Expected traffic: {int(traffic_pred['mean'])} visits. "
+                f"Expected traffic: {int(traffic_mean)} visits. "
                 "Continue current SEO strategy."
             )
         
@@ -3,12 +3,79 @@ Recommendation Engine - AI-powered optimization recommendations
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 from .llm_client import LLMClient
 
 logger = logging.getLogger(__name__)
 
+# Static instructions go in the system prompt so the provider can cache them;
+# only the data summary varies between calls. The response format is shared
+# by every recommendation type.
+_REC_FORMAT = """
+
+Respond with ONLY valid JSON in this format:
+{
+    "recommendations": [
+        {
+            "title": "Brief title",
+            "description": "Detailed recommendation",
+            "priority": "high" | "medium" | "low",
+            "expected_impact": "high" | "medium" | "low",
+            "metrics_affected": ["metric1", "metric2"],
+            "action_items": ["action1", "action2"]
+        }
+    ]
+}"""
+
+_ADS_SYSTEM_PROMPT = """You are an expert digital advertising strategist. 
+Analyze campaign performance data and provide actionable optimization recommendations.
+Focus on ROI, CTR, conversion rates, and budget allocation.
+
+Provide 3-5 specific, actionable recommendations. For each recommendation, provide:
+1. Clear action to take
+2. Expected impact (high/medium/low)
+3. Priority (high/medium/low)
+4. Specific metrics that will improve""" + _REC_FORMAT
+
+_ADS_PROMPT_TEMPLATE = """Analyze this advertising performance data:
+
+{data_summary}"""
+
+_SEO_SYSTEM_PROMPT = """You are an expert SEO strategist.
+Analyze SEO performance data and provide actionable optimization recommendations.
+Focus on keyword rankings, organic traffic, and technical SEO.
+
+Provide 3-5 specific recommendations.""" + _REC_FORMAT
+
+_SEO_PROMPT_TEMPLATE = """Analyze this SEO performance data:
+
+{data_summary}"""
+
+_EMAIL_SYSTEM_PROMPT = """You are an expert email marketing strategist.
+Analyze email campaign performance and provide recommendations to improve open rates, 
+click rates, and conversions.
+
+Provide 3-5 recommendations.""" + _REC_FORMAT
+
+_EMAIL_PROMPT_TEMPLATE = """Analyze this email marketing data:
+
+{data_summary}"""
+
+# Output schema shared by every recommendation type
+_REC_SCHEMA = {
+    "recommendations": [
+        {
+            "title": "string",
+            "description": "string",
+            "priority": "string",
+            "expected_impact": "string",
+            "metrics_affected": ["string"],
+            "action_items": ["string"]
+        }
+    ]
+}
+
 
 class RecommendationEngine:
     """
@@ -37,62 +104,16 @@ class RecommendationEngine:
             # Prepare data summary for LLM
             data_summary = self._prepare_ads_summary(campaign_data, account_performance)
             
-            system_prompt = """You are an expert digital advertising strategist. 
-Analyze campaign performance data and provide actionable optimization recommendations.
-Focus on ROI, CTR, conversion rates, and budget allocation."""
-            
-            prompt = f"""Analyze this advertising performance data and provide 3-5 specific, actionable recommendations:
-
-{data_summary}
-
-For each recommendation, provide:
-1. Clear action to take
-2. Expected impact (high/medium/low)
-3. Priority (high/medium/low)
-4. Specific metrics that will improve
-
-Respond with ONLY valid JSON in this format:
-{{
-    "recommendations": [
-        {{
-            "title": "Brief title",
-            "description": "Detailed recommendation",
-            "priority": "high" | "medium" | "low",
-            "expected_impact": "high" | "medium" | "low",
-            "metrics_affected": ["metric1", "metric2"],
-            "action_items": ["action1", "action2"]
-        }}
-    ]
-}}"""
-            
-            schema = {
-                "recommendations": [
-                    {
-                        "title": "string",
-                        "description": "string",
-                        "priority": "string",
-                        "expected_impact": "string",
-                        "metrics_affected": ["string"],
-                        "action_items": ["string"]
-                    }
-                ]
-            }
-            
             response = await self.llm.generate_structured_output(
-                prompt=prompt,
-                output_schema=schema,
-                system_prompt=system_prompt
+                prompt=_ADS_PROMPT_TEMPLATE.format(data_summary=data_summary),
+                output_schema=_REC_SCHEMA,
+                system_prompt=_ADS_SYSTEM_PROMPT,
+                cache_system_prompt=True
             )
             
-            recommendations = response.get("recommendations", [])
-            
-            # Add metadata
-            for rec in recommendations:
-                rec["generated_at"] = datetime.utcnow().isoformat()
-                rec["category"] = "ads_optimization"
-                rec["status"] = "pending"
-            
-            return recommendations
+            return self._tag_recommendations(
+                response.get("recommendations", []), "ads_optimization"
+            )
             
         except Exception as e:
             logger.error(f"Failed to generate ads recommendations: {str(e)}")
@@ -109,55 +130,16 @@ Respond with ONLY valid JSON in this format:
         try:
             data_summary = self._prepare_seo_summary(seo_data, keyword_data)
             
-            system_prompt = """You are an expert SEO strategist.
-Analyze SEO performance data and provide actionable optimization recommendations.
-Focus on keyword rankings, organic traffic, and technical SEO."""
-            
-            prompt = f"""Analyze this SEO performance data and provide 3-5 specific recommendations:
-
-{data_summary}
-
-Respond with ONLY valid JSON in this format:
-{{
-    "recommendations": [
-        {{
-            "title": "Brief title",
-            "description": "Detailed recommendation",
-            "priority": "high" | "medium" | "low",
-            "expected_impact": "high" | "medium" | "low",
-            "metrics_affected": ["metric1", "metric2"],
-            "action_items": ["action1", "action2"]
-        }}
-    ]
-}}"""
-            
-            schema = {
-                "recommendations": [
-                    {
-                        "title": "string",
-                        "description": "string",
-                        "priority": "string",
-                        "expected_impact": "string",
-                        "metrics_affected": ["string"],
-                        "action_items": ["string"]
-                    }
-                ]
-            }
-            
             response = await self.llm.generate_structured_output(
-                prompt=prompt,
-                output_schema=schema,
-                system_prompt=system_prompt
+                prompt=_SEO_PROMPT_TEMPLATE.format(data_summary=data_summary),
+                output_schema=_REC_SCHEMA,
+                system_prompt=_SEO_SYSTEM_PROMPT,
+                cache_system_prompt=True
             )
             
-            recommendations = response.get("recommendations", [])
-            
-            for rec in recommendations:
-                rec["generated_at"] = datetime.utcnow().isoformat()
-                rec["category"] = "seo_optimization"
-                rec["status"] = "pending"
-            
-            return recommendations
+            return self._tag_recommendations(
+                response.get("recommendations", []), "seo_optimization"
+            )
             
         except Exception as e:
             logger.error(f"Failed to generate SEO recommendations: {str(e)}")
@@ -173,67 +155,97 @@ Respond with ONLY valid JSON in this format:
         try:
             data_summary = self._prepare_email_summary(campaign_performance)
             
-            system_prompt = """You are an expert email marketing strategist.
-Analyze email campaign performance and provide recommendations to improve open rates, 
-click rates, and conversions."""
-            
-            prompt = f"""Analyze this email marketing data and provide 3-5 recommendations:
-
-{data_summary}
-
-Respond with ONLY valid JSON in this format:
-{{
-    "recommendations": [
-        {{
-            "title": "Brief title",
-            "description": "Detailed recommendation",
-            "priority": "high" | "medium" | "low",
-            "expected_impact": "high" | "medium" | "low",
-            "metrics_affected": ["metric1", "metric2"],
-            "action_items": ["action1", "action2"]
-        }}
-    ]
-}}"""
-            
-            schema = {
-                "recommendations": [
-                    {
-                        "title": "string",
-                        "description": "string",
-                        "priority": "string",
-                        "expected_impact": "string",
-                        "metrics_affected": ["string"],
-                        "action_items": ["string"]
-                    }
-                ]
-            }
-            
             response = await self.llm.generate_structured_output(
-                prompt=prompt,
-                output_schema=schema,
-                system_prompt=system_prompt
+                prompt=_EMAIL_PROMPT_TEMPLATE.format(data_summary=data_summary),
+                output_schema=_REC_SCHEMA,
+                system_prompt=_EMAIL_SYSTEM_PROMPT,
+                cache_system_prompt=True
             )
             
-            recommendations = response.get("recommendations", [])
-            
-            for rec in recommendations:
-                rec["generated_at"] = datetime.utcnow().isoformat()
-                rec["category"] = "email_marketing"
-                rec["status"] = "pending"
-            
-            return recommendations
+            return self._tag_recommendations(
+                response.get("recommendations", []), "email_marketing"
+            )
             
         except Exception as e:
             logger.error(f"Failed to generate email recommendations: {str(e)}")
             return []
     
+    async def generate_ads_recommendations_batch(
+        self,
+        accounts: List[Tuple[List[Dict[str, Any]], Dict[str, Any]]],
+        poll_interval: float = 300.0
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Generate ads recommendations for many accounts through the provider's
+        Batch API
+        
+        Half the cost of generate_ads_recommendations, but results can take
+        up to 24 hours - for nightly jobs only.
+        
+        Args:
+            accounts: (campaign_data, account_performance) per account
+            poll_interval: Seconds between batch status checks
+            
+        Returns:
+            Recommendations per account, in input order (empty on failure)
+        """
+        if not accounts:
+            return []
+        
+        try:
+            requests = [
+                {
+                    "custom_id": str(position),
+                    "prompt": _ADS_PROMPT_TEMPLATE.format(
+                        data_summary=self._prepare_ads_summary(campaign_data, account_performance)
+                    ),
+                    "system_prompt": _ADS_SYSTEM_PROMPT,
+                    "output_schema": _REC_SCHEMA,
+                    "temperature": 0.3
+                }
+                for position, (campaign_data, account_performance) in enumerate(accounts)
+            ]
+            
+            batch_id = await self.llm.submit_batch(requests)
+            responses = await self.llm.wait_for_batch(
+                batch_id, structured=True, poll_interval=poll_interval
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to generate batched ads recommendations: {str(e)}")
+            return [[] for _ in accounts]
+        
+        return [
+            self._tag_recommendations(
+                responses.get(str(position), {}).get("recommendations", []),
+                "ads_optimization"
+            )
+            for position in range(len(accounts))
+        ]
+    
+    def _tag_recommendations(
+        self,
+        recommendations: List[Dict[str, Any]],
+        category: str
+    ) -> List[Dict[str, Any]]:
+        """Add metadata to generated recommendations"""
+        # One response, one timestamp
+        generated_at = datetime.utcnow().isoformat()
+        
+        for rec in recommendations:
+            rec["generated_at"] = generated_at
+            rec["category"] = category
+            rec["status"] = "pending"
+        
+        return recommendations
+    
     def _prepare_ads_summary(
         self,
         campaign_data: List[Dict[str, Any]],
         account_performance: Dict[str, Any]
     ) -> str:
         """Prepare ads data summary for LLM"""
-        summary = f"""
+        parts = [f"""
 ACCOUNT PERFORMANCE:
 - Total Spend: ${account_performance.get('total_spend', 0):,.2f}
 - Total Clicks: {account_performance.get('total_clicks', 0):,}
@@ -243,18 +255,18 @@ ACCOUNT PERFORMANCE:
 - Average ROAS: {account_performance.get('avg_roas', 0):.2f}x
 
 TOP CAMPAIGNS:
-"""
+"""]
         for i, campaign in enumerate(campaign_data[:5], 1):
-            summary += f"""
+            parts.append(f"""
 {i}. {campaign.get('campaign_name', 'Unknown')}
    - Spend: ${campaign.get('spend', 0):,.2f}
    - Clicks: {campaign.get('clicks', 0):,}
    - CTR: {campaign.get('ctr', 0):.2f}%
    - Conversions: {campaign.get('conversions', 0)}
    - ROAS: {campaign.get('roas', 0):.2f}x
-"""
+""")
         
-        return summary.strip()
+        return "".join(parts).strip()
     
     def _prepare_seo_summary(
         self,
@@ -262,7 +274,7 @@ TOP CAMPAIGNS:
         keyword_data: List[Dict[str, Any]]
     ) -> str:
         """Prepare SEO data summary for LLM"""
-        summary = f"""
+        parts = [f"""
 OVERALL SEO PERFORMANCE:
 - Organic Traffic: {seo_data.get('organic_traffic', 0):,} visits
 - Total Keywords Ranking: {seo_data.get('total_keywords', 0)}
@@ -271,16 +283,16 @@ OVERALL SEO PERFORMANCE:
 - Total Backlinks: {seo_data.get('backlinks', 0):,}
 
 TOP KEYWORDS:
-"""
+"""]
         for i, keyword in enumerate(keyword_data[:10], 1):
-            summary += f"""
+            parts.append(f"""
 {i}. "{keyword.get('keyword', '')}" 
    - Position: {keyword.get('position', 0)}
    - Volume: {keyword.get('volume', 0):,}
    - Clicks: {keyword.get('clicks', 0)}
-"""
+""")
         
-        return summary.strip()
+        return "".join(parts).strip()
     
     def _prepare_email_summary(
         self,
@@ -295,7 +307,7 @@ TOP KEYWORDS:
         avg_open_rate = (total_opened / total_sent * 100) if total_sent > 0 else 0
         avg_click_rate = (total_clicked / total_sent * 100) if total_sent > 0 else 0
         
-        summary = f"""
+        parts = [f"""
 OVERALL EMAIL PERFORMANCE:
 - Total Campaigns: {len(campaign_performance)}
 - Total Sent: {total_sent:,}
@@ -303,17 +315,17 @@ OVERALL EMAIL PERFORMANCE:
 - Average Click Rate: {avg_click_rate:.2f}%
 
 RECENT CAMPAIGNS:
-"""
+"""]
         for i, campaign in enumerate(campaign_performance[:5], 1):
-            summary += f"""
+            parts.append(f"""
 {i}. {campaign.get('campaign_name', 'Unknown')}
    - Subject: {campaign.get('subject', 'N/A')}
    - Sent: {campaign.get('sent', 0):,}
    - Open Rate: {campaign.get('open_rate', 0):.2f}%
    - Click Rate: {campaign.get('click_rate', 0):.2f}%
-"""
+""")
         
-        return summary.strip()
+        return "".join(parts).strip()
     
     async def close(self):
         """Close LLM client"""
@@ -2,22 +2,149 @@
 Sentiment Analyzer - Analyze brand sentiment from social media and mentions
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from collections import Counter
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from datetime import datetime
+from app.schemas.sentiment import SentimentResult
 from .llm_client import LLMClient
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import numpy as np
 import re
 
 logger = logging.getLogger(__name__)
 
+# Single structured-output request used by analyze_text
+_ANALYSIS_SYSTEM_PROMPT = (
+    "You analyze brand-related text. Rate its overall sentiment, the strength "
+    "of each listed emotion, and its main topic keywords. Respond only with JSON."
+)
+
+_ANALYSIS_SCHEMA = {
+    "sentiment": "string",
+    "score": "number",
+    "confidence": "number",
+    "keywords": ["string"],
+    "emotions": {
+        "joy": "number",
+        "sadness": "number",
+        "anger": "number",
+        "fear": "number",
+        "surprise": "number",
+        "trust": "number"
+    }
+}
+
+# analyze_batch packs several texts into one request with this schema
+_PACKED_ANALYSIS_SCHEMA = {"results": [{"index": "integer", **_ANALYSIS_SCHEMA}]}
+
+_PACKED_ANALYSIS_INSTRUCTIONS = (
+    "Analyze the sentiment, emotions and keywords of each of the following texts:"
+)
+
+_PACKED_ANALYSIS_FORMAT = """{
+    "results": [
+        {
+            "index": <text number>,
+            "sentiment": "positive" | "negative" | "neutral",
+            "score": <number from -1.0 to 1.0>,
+            "confidence": <number from 0.0 to 1.0>,
+            "keywords": [<up to 5 topic keywords from the text>],
+            "emotions": {
+                "joy": <0.0 to 1.0>,
+                "sadness": <0.0 to 1.0>,
+                "anger": <0.0 to 1.0>,
+                "fear": <0.0 to 1.0>,
+                "surprise": <0.0 to 1.0>,
+                "trust": <0.0 to 1.0>
+            }
+        }
+    ]
+}"""
+
+# Concurrent LLM requests per batch or brand-mention call
+_MAX_CONCURRENT_ANALYSES = 10
+
+# Texts are cut to this many characters (~500 tokens) before being sent, so
+# one oversized mention can't blow the token budget or stall a batch
+_MAX_TEXT_CHARS = 2000
+
+# Short texts with a clear VADER polarity are scored locally instead of by the
+# LLM; ambiguous ones (|compound| below the cut-off) still go to the LLM. VADER
+# misreads sarcasm and negation, so only strongly polar texts skip the LLM
+_LOCAL_ANALYSIS_MAX_CHARS = 200
+_LOCAL_MIN_COMPOUND = 0.5
+
+# Lexicon-based scorer shared by all analyzers (loading the lexicon is the slow part)
+_VADER = SentimentIntensityAnalyzer()
+
+# Keyword extraction: any non-word, non-space character splits words
+_NON_WORD = re.compile(r'[^\w\s]')
+
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has',
+    'had', 'do', 'does', 'did', 'will', 'would', 'should', 'could', 'may',
+    'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you',
+    'he', 'she', 'it', 'we', 'they', 'what', 'which', 'who', 'when', 'where',
+    'why', 'how', 'with', 'from', 'by', 'about', 'into', 'through', 'during',
+    'before', 'after', 'above', 'below', 'between', 'under', 'again', 'further',
+    'then', 'once', 'here', 'there', 'all', 'both', 'each', 'few', 'more',
+    'most', 'other', 'some', 'such', 'only', 'own', 'same', 'so', 'than',
+    'too', 'very', 'just', 'now'
+})
+
+
+def _analysis_prompt(text: str) -> str:
+    """
+    Build the single-text analysis prompt used by analyze_text
+    """
+    return f"""Analyze the sentiment, emotions and keywords of the following text:
+
+Text: "{text[:_MAX_TEXT_CHARS]}"
+
+Respond with ONLY this JSON format:
+{{
+    "sentiment": "positive" | "negative" | "neutral",
+    "score": <number from -1.0 to 1.0>,
+    "confidence": <number from 0.0 to 1.0>,
+    "keywords": [<up to 5 topic keywords from the text>],
+    "emotions": {{
+        "joy": <0.0 to 1.0>,
+        "sadness": <0.0 to 1.0>,
+        "anger": <0.0 to 1.0>,
+        "fear": <0.0 to 1.0>,
+        "surprise": <0.0 to 1.0>,
+        "trust": <0.0 to 1.0>
+    }}
+}}"""
+
 
 class SentimentAnalyzer:
     """
     Analyze sentiment of text using AI models
     """
     
-    def __init__(self, provider: str = "openai"):
+    def __init__(
+        self,
+        provider: str = "openai",
+        local_short_texts: bool = True,
+        local_min_compound: float = _LOCAL_MIN_COMPOUND
+    ):
+        """
+        Initialize analyzer
+        
+        Args:
+            provider: LLM provider ('openai' or 'anthropic')
+            local_short_texts: Score short, clearly polar texts with a local
+                VADER model instead of the LLM (no emotions are returned for them)
+            local_min_compound: Minimum |VADER compound| for a short text to be
+                scored locally; anything less polar goes to the LLM
+        """
         self.llm = LLMClient(provider=provider)
+        self.local_short_texts = local_short_texts
+        self.local_min_compound = local_min_compound
     
     async def analyze_text(self, text: str) -> Dict[str, Any]:
         """
@@ -25,7 +152,7 @@ class SentimentAnalyzer:
         
         Args:
             text: Text to analyze
-            
+        
         Returns:
             {
                 "sentiment": "positive" | "negative" | "neutral",
@@ -46,25 +173,17 @@ class SentimentAnalyzer:
                     "emotions": {}
                 }
             
-            # Use LLM for analysis
-            result = await self.llm.analyze_sentiment(text)
+            local_result = self._analyze_locally(text)
+            if local_result is not None:
+                return local_result
             
-            # Extract keywords (simple approach - can be enhanced)
-            keywords = self._extract_keywords(text)
-            
-            # Detect emotions using LLM
-            emotions = await self._detect_emotions(text)
-            
-            return {
-                "sentiment": result.get("sentiment", "neutral"),
-                "score": result.get("score", 0.0),
-                "confidence": result.get("confidence", 0.0),
-                "keywords": keywords,
-                "emotions": emotions,
-                "text_length": len(text),
-                "analyzed_at": datetime.utcnow().isoformat()
-            }
+            # Sentiment, emotions and keywords in a single LLM round trip
+            result = await self.llm.generate_structured_output(
+                _analysis_prompt(text), _ANALYSIS_SCHEMA, system_prompt=_ANALYSIS_SYSTEM_PROMPT
+            )
             
+            return self._format_analysis(result, text, datetime.utcnow().isoformat())
+        
         except Exception as e:
             logger.error(f"Sentiment analysis failed: {str(e)}")
             # Return neutral sentiment on error
@@ -85,24 +204,267 @@ class SentimentAnalyzer:
         """
         Analyze sentiment for multiple texts
         
+        Texts are packed batch_size at a time into a single LLM request, and
+        the batches are sent concurrently (see stream_analyze).
+        
         Args:
             texts: List of texts to analyze
-            batch_size: Process in batches to avoid rate limits
-            
+            batch_size: Texts per LLM request
+        
         Returns:
             List of sentiment analysis results
         """
-        results = []
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            for text in batch:
-                result = await self.analyze_text(text)
-                results.append(result)
+        async for index, result in self.stream_analyze(texts, batch_size):
+            results[index] = result
         
         return results
     
+    async def stream_analyze(
+        self,
+        texts: List[str],
+        batch_size: int = 10
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Analyze sentiment for multiple texts, yielding results as they complete
+        
+        Texts are packed batch_size at a time into a single LLM request and the
+        batches are sent concurrently; each batch's results are yielded as soon
+        as it finishes, so callers can use early results instead of waiting for
+        the slowest request.
+        
+        Args:
+            texts: List of texts to analyze
+            batch_size: Texts per LLM request
+        
+        Yields:
+            (index into texts, sentiment analysis result), in completion order
+        """
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_ANALYSES)
+        
+        async def analyze(start: int) -> Tuple[int, List[Dict[str, Any]]]:
+            async with semaphore:
+                return start, await self._analyze_texts_packed(texts[start:start + batch_size])
+        
+        tasks = [
+            asyncio.create_task(analyze(start))
+            for start in range(0, len(texts), batch_size)
+        ]
+        
+        try:
+            for next_batch in asyncio.as_completed(tasks):
+                start, results = await next_batch
+                for offset, result in enumerate(results):
+                    yield start + offset, result
+        finally:
+            # The consumer stopped early - don't leave requests running
+            for task in tasks:
+                task.cancel()
+    
+    async def _analyze_texts_packed(self, batch: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze several texts with one LLM request
+        
+        Texts too short to analyze and any the response leaves out (or that fail
+        with the whole request) fall back to individual analyze_text calls.
+        
+        Returns:
+            Results in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        
+        # Short, clearly polar texts are scored locally
+        for position, text in enumerate(batch):
+            if text and len(text.strip()) >= 3:
+                results[position] = self._analyze_locally(text)
+        
+        # Positions of the texts worth sending; numbered 1.. in the prompt
+        packed = [
+            position for position, text in enumerate(batch)
+            if results[position] is None and text and len(text.strip()) >= 3
+        ]
+        
+        if packed:
+            try:
+                packed_results = await self.llm.generate_packed_output(
+                    _PACKED_ANALYSIS_INSTRUCTIONS,
+                    [batch[position][:_MAX_TEXT_CHARS] for position in packed],
+                    _PACKED_ANALYSIS_FORMAT,
+                    _PACKED_ANALYSIS_SCHEMA,
+                    system_prompt=_ANALYSIS_SYSTEM_PROMPT
+                )
+                analyzed_at = datetime.utcnow().isoformat()
+                
+                for position, item in zip(packed, packed_results):
+                    if item is None:
+                        continue
+                    try:
+                        results[position] = self._format_analysis(
+                            item, batch[position], analyzed_at
+                        )
+                    except ValueError as e:
+                        # Malformed result - analyzed again on its own below
+                        logger.warning(f"Invalid packed sentiment result: {str(e)}")
+            
+            except Exception as e:
+                logger.error(f"Packed sentiment analysis failed: {str(e)}")
+        
+        # Stragglers are analyzed one by one
+        stragglers = [position for position, result in enumerate(results) if result is None]
+        if stragglers:
+            fallback_results = await asyncio.gather(
+                *(self.analyze_text(batch[position]) for position in stragglers)
+            )
+            for position, result in zip(stragglers, fallback_results):
+                results[position] = result
+        
+        return results
+    
+    async def analyze_batch_offline(
+        self,
+        texts: List[str],
+        poll_interval: float = 300.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze sentiment for many texts through the provider's Batch API
+        
+        Half the cost of analyze_batch, but results can take up to 24 hours -
+        for historical backfills and other offline jobs only.
+        
+        Args:
+            texts: List of texts to analyze
+            poll_interval: Seconds between batch status checks
+        
+        Returns:
+            List of sentiment analysis results, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        
+        # Short, clearly polar texts are scored locally
+        for position, text in enumerate(texts):
+            if text and len(text.strip()) >= 3:
+                results[position] = self._analyze_locally(text)
+        
+        # Only the texts that still need the LLM are submitted
+        submitted = [
+            position for position, text in enumerate(texts)
+            if results[position] is None and text and len(text.strip()) >= 3
+        ]
+        
+        batch_results = {}
+        if submitted:
+            batch_id = await self.llm.submit_batch([
+                {
+                    "custom_id": str(position),
+                    "prompt": _analysis_prompt(texts[position]),
+                    "system_prompt": _ANALYSIS_SYSTEM_PROMPT,
+                    "output_schema": _ANALYSIS_SCHEMA,
+                    "temperature": 0.3
+                }
+                for position in submitted
+            ])
+            batch_results = await self.llm.wait_for_batch(
+                batch_id, structured=True, poll_interval=poll_interval
+            )
+        
+        analyzed_at = datetime.utcnow().isoformat()
+        
+        for position in submitted:
+            result = batch_results.get(str(position))
+            if result is None:
+                continue
+            
+            try:
+                results[position] = self._format_analysis(result, texts[position], analyzed_at)
+            except ValueError as e:
+                logger.warning(f"Invalid batched sentiment result: {str(e)}")
+        
+        # Too-short texts and failed batch requests go through analyze_text
+        stragglers = [position for position, result in enumerate(results) if result is None]
+        if stragglers:
+            fallback_results = await self._analyze_concurrently(
+                [texts[position] for position in stragglers], _MAX_CONCURRENT_ANALYSES
+            )
+            for position, result in zip(stragglers, fallback_results):
+                results[position] = result
+        
+        return results
+    
+    def _analyze_locally(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Score a short text with VADER instead of the LLM
+        
+        Returns:
+            An analyze_text result, or None if the text is long, ambiguous or
+            local analysis is disabled
+        """
+        if not self.local_short_texts or len(text) > _LOCAL_ANALYSIS_MAX_CHARS:
+            return None
+        
+        compound = _VADER.polarity_scores(text)["compound"]
+        if abs(compound) < self.local_min_compound:
+            return None
+        
+        return {
+            "sentiment": "positive" if compound > 0 else "negative",
+            "score": compound,
+            "confidence": round(abs(compound), 3),
+            "keywords": self._extract_keywords(text),
+            "emotions": {},
+            "text_length": len(text),
+            "truncated": False,
+            "analyzed_at": datetime.utcnow().isoformat()
+        }
+    
+    def _format_analysis(
+        self,
+        result: Dict[str, Any],
+        text: str,
+        analyzed_at: str
+    ) -> Dict[str, Any]:
+        """
+        Build an analyze_text result from one LLM analysis
+        
+        Raises:
+            ValidationError: The analysis is malformed (see SentimentResult)
+        """
+        analysis = SentimentResult.model_validate(result)
+        
+        # Fall back to local extraction when the model omits keywords
+        keywords = analysis.keywords or self._extract_keywords(text[:_MAX_TEXT_CHARS])
+        
+        return {
+            "sentiment": analysis.sentiment,
+            "score": analysis.score,
+            "confidence": analysis.confidence,
+            "keywords": keywords[:5],
+            "emotions": analysis.emotions,
+            "text_length": len(text),
+            "truncated": len(text) > _MAX_TEXT_CHARS,
+            "analyzed_at": analyzed_at
+        }
+    
+    async def _analyze_concurrently(
+        self,
+        texts: List[str],
+        max_concurrency: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze texts concurrently, at most max_concurrency LLM analyses at a time
+        
+        Returns:
+            Results in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def analyze(text: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analyze_text(text)
+        
+        # analyze_text never raises - failures come back as neutral results
+        return list(await asyncio.gather(*(analyze(text) for text in texts)))
+    
     async def analyze_brand_mentions(
         self,
         mentions: List[Dict[str, Any]]
@@ -112,12 +474,15 @@ class SentimentAnalyzer:
         
         Args:
             mentions: List of brand mentions with 'content' field
-            
+        
         Returns:
             Aggregate sentiment analysis
         """
         try:
-            if not mentions:
+            # Mentions without content are never analyzed
+            contents = [mention["content"] for mention in mentions if mention.get("content")]
+            
+            if not contents:
                 return {
                     "overall_sentiment": "neutral",
                     "overall_score": 0.0,
@@ -126,25 +491,44 @@ class SentimentAnalyzer:
                         "neutral": 0,
                         "negative": 0
                     },
-                    "total_mentions": 0
+                    "total_mentions": len(mentions),
+                    "analyzed_mentions": 0
                 }
             
-            # Analyze each mention
-            sentiment_results = []
-            for mention in mentions:
-                content = mention.get("content", "")
-                if content:
-                    result = await self.analyze_text(content)
-                    sentiment_results.append(result)
+            # Analyze the mentions concurrently
+            sentiment_results = await self._analyze_concurrently(
+                contents, _MAX_CONCURRENT_ANALYSES
+            )
+            
+            # Aggregate distribution, scores, keywords and emotions in one pass
+            sentiment_counts = Counter()
+            keyword_counts = Counter()
+            emotion_totals = {}
+            emotion_counts = Counter()
+            score_sum = 0.0
+            score_count = 0
+            confidence_sum = 0.0
+            
+            for r in sentiment_results:
+                sentiment_counts[r["sentiment"]] += 1
+                
+                if "score" in r:
+                    score_sum += r["score"]
+                    score_count += 1
+                
+                confidence_sum += r.get("confidence", 0)
+                keyword_counts.update(r.get("keywords", ()))
+                
+                for emotion, score in r.get("emotions", {}).items():
+                    emotion_totals[emotion] = emotion_totals.get(emotion, 0) + score
+                    emotion_counts[emotion] += 1
             
-            # Calculate aggregates
-            positive_count = sum(1 for r in sentiment_results if r["sentiment"] == "positive")
-            negative_count = sum(1 for r in sentiment_results if r["sentiment"] == "negative")
-            neutral_count = sum(1 for r in sentiment_results if r["sentiment"] == "neutral")
+            positive_count = sentiment_counts["positive"]
+            negative_count = sentiment_counts["negative"]
+            neutral_count = sentiment_counts["neutral"]
             
             # Calculate overall score (average)
-            scores = [r["score"] for r in sentiment_results if "score" in r]
-            overall_score = sum(scores) / len(scores) if scores else 0.0
+            overall_score = score_sum / score_count if score_count else 0.0
             
             # Determine overall sentiment
             if overall_score > 0.2:
@@ -154,39 +538,20 @@ class SentimentAnalyzer:
             else:
                 overall_sentiment = "neutral"
             
-            # Extract common keywords
-            all_keywords = []
-            for r in sentiment_results:
-                all_keywords.extend(r.get("keywords", []))
-            
-            keyword_counts = {}
-            for keyword in all_keywords:
-                keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
-            
-            # Sort by frequency
-            top_keywords = sorted(
-                keyword_counts.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:10]
+            # Most common keywords (ties keep first-seen order)
+            top_keywords = keyword_counts.most_common(10)
             
-            # Aggregate emotions
-            emotion_totals = {}
-            for r in sentiment_results:
-                emotions = r.get("emotions", {})
-                for emotion, score in emotions.items():
-                    emotion_totals[emotion] = emotion_totals.get(emotion, 0) + score
-            
-            # Average emotions
+            # Average emotions over the results that carry them (locally scored
+            # texts have none)
             avg_emotions = {
-                emotion: score / len(sentiment_results)
+                emotion: score / emotion_counts[emotion]
                 for emotion, score in emotion_totals.items()
             }
             
             return {
                 "overall_sentiment": overall_sentiment,
                 "overall_score": round(overall_score, 3),
-                "confidence": round(sum(r.get("confidence", 0) for r in sentiment_results) / len(sentiment_results), 2),
+                "confidence": round(confidence_sum / len(sentiment_results), 2),
                 "sentiment_distribution": {
                     "positive": positive_count,
                     "neutral": neutral_count,
@@ -203,7 +568,7 @@ class SentimentAnalyzer:
                 "emotions": avg_emotions,
                 "analyzed_at": datetime.utcnow().isoformat()
             }
-            
+        
         except Exception as e:
             logger.error(f"Brand mention analysis failed: {str(e)}")
             return {
@@ -222,7 +587,7 @@ class SentimentAnalyzer:
         
         Args:
             historical_sentiments: List of sentiment data with dates
-            
+        
         Returns:
             Trend analysis
         """
@@ -240,16 +605,20 @@ class SentimentAnalyzer:
                 key=lambda x: x.get("date", "")
             )
             
-            # Calculate moving average
-            scores = [d.get("sentiment_score", 0) for d in sorted_data]
+            scores = np.fromiter(
+                (d.get("sentiment_score", 0) for d in sorted_data),
+                dtype=np.float64,
+                count=len(sorted_data)
+            )
             
-            # Compare recent vs older periods
-            if len(scores) >= 7:
-                recent_avg = sum(scores[-7:]) / 7
-                older_avg = sum(scores[-14:-7]) / 7 if len(scores) >= 14 else sum(scores[:-7]) / len(scores[:-7])
-            else:
-                recent_avg = sum(scores[-3:]) / min(3, len(scores))
-                older_avg = sum(scores[:-3]) / len(scores[:-3]) if len(scores) > 3 else recent_avg
+            # Compare recent vs older periods: the last week against the week
+            # before (or everything before it), or the last 3 points for short histories
+            recent_size = 7 if scores.size >= 7 else 3
+            recent = scores[-recent_size:]
+            older = scores[-14:-7] if scores.size >= 14 else scores[:-recent_size]
+            
+            recent_avg = float(recent.mean())
+            older_avg = float(older.mean()) if older.size else recent_avg
             
             change = recent_avg - older_avg
             
@@ -267,14 +636,15 @@ class SentimentAnalyzer:
             # Identify issues if declining
             issues = []
             if trend == "declining":
-                # Find negative spikes
-                for i, sentiment_data in enumerate(sorted_data[-7:]):
-                    if sentiment_data.get("sentiment_score", 0) < -0.3:
-                        issues.append({
-                            "date": sentiment_data.get("date"),
-                            "score": sentiment_data.get("sentiment_score"),
-                            "keywords": sentiment_data.get("top_keywords", [])[:3]
-                        })
+                # Find negative spikes in the last week
+                last_week = sorted_data[-7:]
+                for i in np.flatnonzero(scores[-7:] < -0.3).tolist():
+                    sentiment_data = last_week[i]
+                    issues.append({
+                        "date": sentiment_data.get("date"),
+                        "score": sentiment_data.get("sentiment_score"),
+                        "keywords": sentiment_data.get("top_keywords", [])[:3]
+                    })
             
             return {
                 "trend": trend,
@@ -286,7 +656,7 @@ class SentimentAnalyzer:
                 "issues": issues if issues else None,
                 "recommendation": self._get_trend_recommendation(trend, change)
             }
-            
+        
         except Exception as e:
             logger.error(f"Trend detection failed: {str(e)}")
             return {
@@ -305,7 +675,7 @@ class SentimentAnalyzer:
         Args:
             brand_sentiment: Your brand's sentiment data
             competitor_sentiments: List of competitor sentiment data
-            
+        
         Returns:
             Comparative analysis
         """
@@ -313,13 +683,23 @@ class SentimentAnalyzer:
             brand_score = brand_sentiment.get("overall_score", 0.0)
             
             comparisons = []
+            
+            # Rank and average are accumulated while building the comparisons
+            brands_ahead = 0
+            competitor_score_sum = 0.0
+            
             for comp in competitor_sentiments:
                 comp_score = comp.get("overall_score", 0.0)
                 difference = brand_score - comp_score
+                rounded_score = round(comp_score, 3)
+                
+                if rounded_score > brand_score:
+                    brands_ahead += 1
+                competitor_score_sum += rounded_score
                 
                 comparisons.append({
                     "competitor": comp.get("name", "Unknown"),
-                    "competitor_score": round(comp_score, 3),
+                    "competitor_score": rounded_score,
                     "difference": round(difference, 3),
                     "performance": "better" if difference > 0 else "worse" if difference < 0 else "similar"
                 })
@@ -327,107 +707,48 @@ class SentimentAnalyzer:
             # Sort by competitor score
             comparisons.sort(key=lambda x: x["competitor_score"], reverse=True)
             
-            # Calculate ranking
-            all_scores = [brand_score] + [c["competitor_score"] for c in comparisons]
-            all_scores.sort(reverse=True)
-            brand_rank = all_scores.index(brand_score) + 1
+            # Ranking: ties with the brand don't push it down
+            brand_rank = brands_ahead + 1
             
             # Average competitor score
-            avg_competitor_score = sum(c["competitor_score"] for c in comparisons) / len(comparisons) if comparisons else 0
+            avg_competitor_score = competitor_score_sum / len(comparisons) if comparisons else 0
             
             return {
                 "brand_score": round(brand_score, 3),
                 "brand_rank": brand_rank,
-                "total_brands": len(all_scores),
+                "total_brands": len(comparisons) + 1,
                 "avg_competitor_score": round(avg_competitor_score, 3),
                 "vs_average": round(brand_score - avg_competitor_score, 3),
                 "comparisons": comparisons,
                 "insights": self._generate_competitive_insights(brand_score, comparisons)
             }
-            
+        
         except Exception as e:
             logger.error(f"Competitor comparison failed: {str(e)}")
             return {"error": str(e)}
     
-    async def _detect_emotions(self, text: str) -> Dict[str, float]:
-        """
-        Detect emotions in text using LLM
-        
-        Returns:
-            Dictionary of emotions with scores (0.0 to 1.0)
-        """
-        try:
-            prompt = f"""Analyze the emotions in this text and rate each emotion from 0.0 to 1.0:
-
-Text: "{text}"
-
-Respond with ONLY valid JSON:
-{{
-    "joy": 0.0,
-    "sadness": 0.0,
-    "anger": 0.0,
-    "fear": 0.0,
-    "surprise": 0.0,
-    "trust": 0.0
-}}"""
-            
-            schema = {
-                "joy": "number",
-                "sadness": "number",
-                "anger": "number",
-                "fear": "number",
-                "surprise": "number",
-                "trust": "number"
-            }
-            
-            result = await self.llm.generate_structured_output(prompt, schema)
-            return result
-            
-        except Exception as e:
-            logger.error(f"Emotion detection failed: {str(e)}")
-            return {}
-    
     def _extract_keywords(self, text: str, max_keywords: int = 5) -> List[str]:
         """
         Extract keywords from text (simple implementation)
         
+        Fallback for analyze_text when the LLM response has no keywords. It is
+        synchronous and runs on the event loop: one regex pass and a C-level
+        Counter over a single text is microseconds, far below the overhead of
+        handing it to a worker thread.
+        
         For production, consider using:
         - spaCy for NLP
         - RAKE algorithm
         - TF-IDF
         """
-        # Clean text
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # Remove common stop words
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has',
-            'had', 'do', 'does', 'did', 'will', 'would', 'should', 'could', 'may',
-            'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you',
-            'he', 'she', 'it', 'we', 'they', 'what', 'which', 'who', 'when', 'where',
-            'why', 'how', 'with', 'from', 'by', 'about', 'into', 'through', 'during',
-            'before', 'after', 'above', 'below', 'between', 'under', 'again', 'further',
-            'then', 'once', 'here', 'there', 'all', 'both', 'each', 'few', 'more',
-            'most', 'other', 'some', 'such', 'only', 'own', 'same', 'so', 'than',
-            'too', 'very', 'just', 'now'
-        }
-        
-        # Split into words
-        words = text.split()
-        
-        # Filter and count
-        word_counts = {}
-        for word in words:
-            if len(word) > 3 and word not in stop_words:
-                word_counts[word] = word_counts.get(word, 0) + 1
-        
-        # Sort by frequency
-        sorted_words = sorted(word_counts.items(), key=lambda x: x[1], reverse=True)
+        word_counts = Counter(
+            word
+            for word in _NON_WORD.sub(' ', text.lower()).split()
+            if len(word) > 3 and word not in _STOP_WORDS
+        )
         
-        # Return top keywords
-        return [word for word, count in sorted_words[:max_keywords]]
+        # Most frequent first; ties keep first-seen order
+        return [word for word, count in word_counts.most_common(max_keywords)]
     
     def _get_trend_recommendation(self, trend: str, change: float) -> str:
         """Generate recommendation based on trend"""
@@ -2,29 +2,230 @@
 Call Analytics - Calculate cold calling metrics and insights
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
+from numba import njit
+import functools
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Outcomes counted as a successful call
+_SUCCESS_OUTCOMES = frozenset({"interested", "callback"})
+
+
+def _call_hour(called_at: Any) -> int:
+    """
+    Hour of day a call was made (datetime or ISO string), or -1 if unknown
+    """
+    if not called_at:
+        return -1
+    
+    # Handle both datetime objects and ISO strings
+    if isinstance(called_at, str):
+        try:
+            called_at = datetime.fromisoformat(called_at.replace('Z', '+00:00'))
+        except ValueError:
+            return -1
+    
+    if not isinstance(called_at, datetime):
+        return -1
+    
+    return called_at.hour
+
+
+def _count_outcomes(call_data: List[Dict[str, Any]]) -> Dict[Any, int]:
+    """
+    Count calls per outcome, in order of first appearance
+    """
+    outcome_counts = {}
+    for call in call_data:
+        outcome = call.get("outcome", "unknown")
+        outcome_counts[outcome] = outcome_counts.get(outcome, 0) + 1
+    return outcome_counts
+
+
+def _agent_entry(
+    agent_id: Any,
+    agent_name: str,
+    total_calls: int,
+    total_duration: int,
+    successful: int,
+    outcome_breakdown: Dict[Any, int]
+) -> Dict[str, Any]:
+    """
+    Format one agent's analyze_agent_performance entry
+    """
+    success_rate = (successful / total_calls * 100) if total_calls > 0 else 0.0
+    
+    return {
+        "agent_id": agent_id,
+        "agent_name": agent_name,
+        "total_calls": total_calls,
+        "total_duration_minutes": round(total_duration / 60, 2),
+        "avg_duration_seconds": round(total_duration / total_calls, 2) if total_calls > 0 else 0,
+        "success_rate": round(success_rate, 2),
+        "outcome_breakdown": outcome_breakdown
+    }
+
+
+@njit(cache=True)
+def _overview_kernel(durations, outcome_codes, n_outcomes):
+    """
+    Total duration and per-outcome call counts in one fused pass
+    
+    Returns:
+        (total duration, counts indexed by outcome code)
+    """
+    total_duration = 0
+    outcome_counts = np.zeros(n_outcomes, dtype=np.int64)
+    
+    for i in range(durations.shape[0]):
+        total_duration += durations[i]
+        outcome_counts[outcome_codes[i]] += 1
+    
+    return total_duration, outcome_counts
+
+
+class CallColumns:
+    """
+    Columnar view of call documents for running several analyses on the
+    same calls (see CallAnalytics.to_columns)
+    
+    Each column is extracted from the documents the first time an analysis
+    reads it and reused after that, so a caller only pays for the fields its
+    analyses need. Outcomes and agents are interned to integer codes in order
+    of first appearance.
+    """
+    
+    def __init__(self, calls: List[Dict[str, Any]]):
+        self.calls = calls
+    
+    def __len__(self) -> int:
+        return len(self.calls)
+    
+    @functools.cached_property
+    def _outcome_index(self) -> Tuple[List[Any], np.ndarray]:
+        """
+        Distinct outcomes and each call's outcome code
+        """
+        outcome_ids: Dict[Any, int] = {}
+        codes = [
+            outcome_ids.setdefault(outcome, len(outcome_ids))
+            for outcome in (call.get("outcome", "unknown") for call in self.calls)
+        ]
+        return list(outcome_ids), np.array(codes, dtype=np.int64)
+    
+    @property
+    def outcomes(self) -> List[Any]:
+        return self._outcome_index[0]
+    
+    @property
+    def outcome_codes(self) -> np.ndarray:
+        return self._outcome_index[1]
+    
+    @functools.cached_property
+    def _agent_index(self) -> Tuple[List[Any], List[str], np.ndarray]:
+        """
+        Distinct agent IDs, their names and each call's agent code
+        """
+        agent_ids: Dict[Any, int] = {}
+        agent_names: List[str] = []
+        codes = np.empty(len(self.calls), dtype=np.int64)
+        
+        for i, call in enumerate(self.calls):
+            agent_id = call.get("agent_id")
+            agent_code = agent_ids.get(agent_id)
+            if agent_code is None:
+                # An agent is reported under the name on its first call
+                agent_code = agent_ids[agent_id] = len(agent_ids)
+                agent_names.append(call.get("agent_name", "Unknown"))
+            codes[i] = agent_code
+        
+        return list(agent_ids), agent_names, codes
+    
+    @property
+    def agent_ids(self) -> List[Any]:
+        return self._agent_index[0]
+    
+    @property
+    def agent_names(self) -> List[str]:
+        return self._agent_index[1]
+    
+    @property
+    def agent_codes(self) -> np.ndarray:
+        return self._agent_index[2]
+    
+    @functools.cached_property
+    def durations(self) -> np.ndarray:
+        # Durations are whole seconds
+        return np.fromiter(
+            (call.get("duration", 0) for call in self.calls),
+            dtype=np.int64,
+            count=len(self.calls)
+        )
+    
+    @functools.cached_property
+    def hours(self) -> np.ndarray:
+        return np.fromiter(
+            (_call_hour(call.get("called_at")) for call in self.calls),
+            dtype=np.int64,
+            count=len(self.calls)
+        )
+    
+    @functools.cached_property
+    def successful(self) -> np.ndarray:
+        # Looked up per distinct outcome, then broadcast to the calls
+        success_by_code = np.array(
+            [outcome in _SUCCESS_OUTCOMES for outcome in self.outcomes], dtype=np.bool_
+        )
+        return success_by_code[self.outcome_codes]
+
+
+# Analytics methods take raw call documents or columns extracted from them
+CallData = Union[List[Dict[str, Any]], CallColumns]
+
 
 class CallAnalytics:
     """
     Analytics engine for cold calling metrics calculation
+    
+    Every analysis accepts either a list of call documents or the CallColumns
+    built from it by to_columns. A single analysis over a list runs as one
+    plain pass over the documents; callers running several analyses on the
+    same calls should build the columns once and pass them to each, so each
+    field is extracted only once.
     """
     
-    def calculate_overview_metrics(self, call_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    @staticmethod
+    def to_columns(call_data: CallData) -> CallColumns:
+        """
+        Wrap call documents in a lazily extracted columnar view
+        
+        Args:
+            call_data: List of call documents (columns are returned unchanged)
+            
+        Returns:
+            Columnar view of the calls
+        """
+        if isinstance(call_data, CallColumns):
+            return call_data
+        return CallColumns(call_data)
+    
+    def calculate_overview_metrics(self, call_data: CallData) -> Dict[str, Any]:
         """
         Calculate overview metrics from call data
         
         Args:
-            call_data: List of call documents
+            call_data: List of call documents (or their CallColumns)
             
         Returns:
             Dict with calculated overview metrics
         """
-        if not call_data:
+        total_calls = len(call_data)
+        
+        if total_calls == 0:
             return {
                 "total_calls": 0,
                 "total_duration": 0,
@@ -33,15 +234,18 @@ class CallAnalytics:
                 "outcome_breakdown": {}
             }
         
-        total_calls = len(call_data)
-        total_duration = sum(c.get("duration", 0) for c in call_data)
-        avg_duration = total_duration / total_calls if total_calls > 0 else 0.0
+        if isinstance(call_data, CallColumns):
+            total_duration, counts = _overview_kernel(
+                call_data.durations, call_data.outcome_codes, len(call_data.outcomes)
+            )
+            # Back to Python ints so results stay JSON-serializable
+            total_duration = int(total_duration)
+            outcome_counts = dict(zip(call_data.outcomes, counts.tolist()))
+        else:
+            total_duration = sum(c.get("duration", 0) for c in call_data)
+            outcome_counts = _count_outcomes(call_data)
         
-        # Count outcomes
-        outcome_counts = {}
-        for call in call_data:
-            outcome = call.get("outcome", "unknown")
-            outcome_counts[outcome] = outcome_counts.get(outcome, 0) + 1
+        avg_duration = total_duration / total_calls if total_calls > 0 else 0.0
         
         # Calculate success rate (interested + callback as success)
         successful_calls = outcome_counts.get("interested", 0) + outcome_counts.get("callback", 0)
@@ -99,27 +303,41 @@ class CallAnalytics:
     
     def analyze_agent_performance(
         self,
-        call_data: List[Dict[str, Any]]
+        call_data: CallData
     ) -> List[Dict[str, Any]]:
         """
         Analyze performance by agent
         
         Args:
-            call_data: List of call documents
+            call_data: List of call documents (or their CallColumns)
             
         Returns:
             List of agent performance metrics sorted by success rate
         """
+        if isinstance(call_data, CallColumns):
+            agent_performance = self._agent_performance_from_columns(call_data)
+        else:
+            agent_performance = self._agent_performance_from_calls(call_data)
+        
+        # Sort by success rate (descending)
+        return sorted(agent_performance, key=lambda x: x["success_rate"], reverse=True)
+    
+    def _agent_performance_from_calls(
+        self,
+        call_data: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Per-agent metrics from call documents, in one pass
+        """
         agent_stats = {}
         
         for call in call_data:
             agent_id = call.get("agent_id")
-            agent_name = call.get("agent_name", "Unknown")
             
             if agent_id not in agent_stats:
                 agent_stats[agent_id] = {
                     "agent_id": agent_id,
-                    "agent_name": agent_name,
+                    "agent_name": call.get("agent_name", "Unknown"),
                     "total_calls": 0,
                     "total_duration": 0,
                     "outcomes": {}
@@ -132,51 +350,97 @@ class CallAnalytics:
             outcome = call.get("outcome", "unknown")
             stats["outcomes"][outcome] = stats["outcomes"].get(outcome, 0) + 1
         
-        # Calculate metrics for each agent
         agent_performance = []
-        for agent_id, stats in agent_stats.items():
+        for stats in agent_stats.values():
             total_calls = stats["total_calls"]
             successful = stats["outcomes"].get("interested", 0) + stats["outcomes"].get("callback", 0)
-            success_rate = (successful / total_calls * 100) if total_calls > 0 else 0.0
             
-            agent_performance.append({
-                "agent_id": agent_id,
-                "agent_name": stats["agent_name"],
-                "total_calls": total_calls,
-                "total_duration_minutes": round(stats["total_duration"] / 60, 2),
-                "avg_duration_seconds": round(stats["total_duration"] / total_calls, 2) if total_calls > 0 else 0,
-                "success_rate": round(success_rate, 2),
-                "outcome_breakdown": stats["outcomes"]
-            })
+            agent_performance.append(_agent_entry(
+                stats["agent_id"],
+                stats["agent_name"],
+                total_calls,
+                stats["total_duration"],
+                successful,
+                stats["outcomes"]
+            ))
+        
+        return agent_performance
+    
+    def _agent_performance_from_columns(self, columns: CallColumns) -> List[Dict[str, Any]]:
+        """
+        Per-agent metrics from call columns, with one bincount per statistic
+        """
+        n_agents = len(columns.agent_ids)
+        n_outcomes = len(columns.outcomes)
         
-        # Sort by success rate (descending)
-        return sorted(agent_performance, key=lambda x: x["success_rate"], reverse=True)
+        agent_calls = np.bincount(columns.agent_codes, minlength=n_agents)
+        agent_durations = np.bincount(
+            columns.agent_codes, weights=columns.durations, minlength=n_agents
+        )
+        agent_successful = np.bincount(
+            columns.agent_codes[columns.successful], minlength=n_agents
+        )
+        
+        # (agent, outcome) call counts from one bincount over combined codes
+        agent_outcomes = np.bincount(
+            columns.agent_codes * n_outcomes + columns.outcome_codes,
+            minlength=n_agents * n_outcomes
+        ).reshape(n_agents, n_outcomes)
+        
+        return [
+            _agent_entry(
+                agent_id,
+                agent_name,
+                total_calls,
+                # Whole seconds, so the float sum is exact
+                int(total_duration),
+                successful,
+                {
+                    outcome: count
+                    for outcome, count in zip(columns.outcomes, outcome_row)
+                    if count
+                }
+            )
+            for agent_id, agent_name, total_calls, total_duration, successful, outcome_row in zip(
+                columns.agent_ids,
+                columns.agent_names,
+                agent_calls.tolist(),
+                agent_durations.tolist(),
+                agent_successful.tolist(),
+                agent_outcomes.tolist()
+            )
+        ]
     
     def analyze_hourly_performance(
         self,
-        call_data: List[Dict[str, Any]]
+        call_data: CallData
     ) -> List[Dict[str, Any]]:
         """
         Analyze call performance by hour of day
         
         Args:
-            call_data: List of call documents with called_at timestamps
+            call_data: List of call documents with called_at timestamps (or
+                their CallColumns)
             
         Returns:
             List of hourly performance metrics
         """
+        if isinstance(call_data, CallColumns):
+            return self._hourly_performance_from_columns(call_data)
+        
         hourly_stats = {}
         
         for call in call_data:
+            # Same parsing as _call_hour, inlined for the per-call hot loop;
+            # calls without a usable timestamp are left out
             called_at = call.get("called_at")
             if not called_at:
                 continue
             
-            # Handle both datetime objects and ISO strings
             if isinstance(called_at, str):
                 try:
                     called_at = datetime.fromisoformat(called_at.replace('Z', '+00:00'))
-                except:
+                except ValueError:
                     continue
             
             if not isinstance(called_at, datetime):
@@ -196,8 +460,7 @@ class CallAnalytics:
             stats["total_calls"] += 1
             stats["total_duration"] += call.get("duration", 0)
             
-            outcome = call.get("outcome", "")
-            if outcome in ["interested", "callback"]:
+            if call.get("outcome", "") in _SUCCESS_OUTCOMES:
                 stats["successful_calls"] += 1
         
         # Calculate success rates
@@ -221,37 +484,75 @@ class CallAnalytics:
         # Sort by hour
         return sorted(result, key=lambda x: x["hour"])
     
+    def _hourly_performance_from_columns(self, columns: CallColumns) -> List[Dict[str, Any]]:
+        """
+        Hourly metrics from call columns, with one bincount per statistic
+        """
+        # Calls without a usable timestamp are left out
+        timed = columns.hours >= 0
+        hours = columns.hours[timed]
+        
+        total_calls = np.bincount(hours, minlength=24)
+        total_duration = np.bincount(hours, weights=columns.durations[timed], minlength=24)
+        successful_calls = np.bincount(hours[columns.successful[timed]], minlength=24)
+        
+        # Only hours with calls are reported, in hour order
+        active_hours = np.flatnonzero(total_calls)
+        
+        return [
+            {
+                "hour": hour,
+                "total_calls": hour_calls,
+                "successful_calls": hour_successful,
+                # Python round() on the final floats, as for lists of calls
+                "success_rate": round(hour_successful / hour_calls * 100, 2),
+                "avg_duration_seconds": round(int(hour_duration) / hour_calls, 2)
+            }
+            for hour, hour_calls, hour_successful, hour_duration in zip(
+                active_hours.tolist(),
+                total_calls[active_hours].tolist(),
+                successful_calls[active_hours].tolist(),
+                total_duration[active_hours].tolist()
+            )
+        ]
+    
     def analyze_outcome_patterns(
         self,
-        call_data: List[Dict[str, Any]]
+        call_data: CallData
     ) -> Dict[str, Any]:
         """
         Analyze patterns in call outcomes
         
         Args:
-            call_data: List of call documents
+            call_data: List of call documents (or their CallColumns)
             
         Returns:
             Analysis of outcome patterns
         """
+        total_calls = len(call_data)
+        
         outcome_analysis = {
-            "total_calls": len(call_data),
+            "total_calls": total_calls,
             "outcome_distribution": {},
             "success_rate": 0.0,
             "conversion_rate": 0.0,
             "contact_rate": 0.0
         }
         
-        if not call_data:
+        if total_calls == 0:
             return outcome_analysis
         
         # Count outcomes
-        outcome_counts = {}
-        for call in call_data:
-            outcome = call.get("outcome", "unknown")
-            outcome_counts[outcome] = outcome_counts.get(outcome, 0) + 1
+        if isinstance(call_data, CallColumns):
+            outcome_counts = dict(zip(
+                call_data.outcomes,
+                np.bincount(
+                    call_data.outcome_codes, minlength=len(call_data.outcomes)
+                ).tolist()
+            ))
+        else:
+            outcome_counts = _count_outcomes(call_data)
         
-        total_calls = len(call_data)
         successful = outcome_counts.get("interested", 0) + outcome_counts.get("callback", 0)
         contacted = total_calls - outcome_counts.get("no_answer", 0) - outcome_counts.get("voicemail", 0)
         interested = outcome_counts.get("interested", 0)
@@ -280,18 +581,20 @@ class CallAnalytics:
     
     def calculate_call_efficiency(
         self,
-        call_data: List[Dict[str, Any]]
+        call_data: CallData
     ) -> Dict[str, Any]:
         """
         Calculate call efficiency metrics
         
         Args:
-            call_data: List of call documents
+            call_data: List of call documents (or their CallColumns)
             
         Returns:
             Efficiency metrics
         """
-        if not call_data:
+        total_calls = len(call_data)
+        
+        if total_calls == 0:
             return {
                 "calls_per_hour": 0.0,
                 "successful_calls_per_hour": 0.0,
@@ -299,12 +602,22 @@ class CallAnalytics:
                 "efficiency_score": 0.0
             }
         
-        total_calls = len(call_data)
-        total_duration = sum(c.get("duration", 0) for c in call_data)
-        successful_calls = sum(
-            1 for c in call_data
-            if c.get("outcome") in ["interested", "callback"]
-        )
+        if isinstance(call_data, CallColumns):
+            total_duration = int(call_data.durations.sum())
+            successful_durations = call_data.durations[call_data.successful]
+            successful_calls = successful_durations.size
+            successful_duration = int(successful_durations.sum())
+        else:
+            # Totals and successful-call totals in one pass
+            total_duration = 0
+            successful_calls = 0
+            successful_duration = 0
+            for call in call_data:
+                duration = call.get("duration", 0)
+                total_duration += duration
+                if call.get("outcome") in _SUCCESS_OUTCOMES:
+                    successful_calls += 1
+                    successful_duration += duration
         
         total_hours = total_duration / 3600  # Convert seconds to hours
         
@@ -312,13 +625,9 @@ class CallAnalytics:
         successful_calls_per_hour = successful_calls / total_hours if total_hours > 0 else 0.0
         
         # Calculate average time to success (only for successful calls)
-        successful_durations = [
-            c.get("duration", 0) for c in call_data
-            if c.get("outcome") in ["interested", "callback"]
-        ]
         avg_time_to_success = (
-            sum(successful_durations) / len(successful_durations)
-            if successful_durations else 0.0
+            successful_duration / successful_calls
+            if successful_calls else 0.0
         )
         
         # Efficiency score (0-100): combination of calls/hour and success rate
@@ -338,14 +647,14 @@ class CallAnalytics:
     
     def get_best_calling_times(
         self,
-        call_data: List[Dict[str, Any]],
+        call_data: CallData,
         min_calls: int = 10
     ) -> List[Dict[str, Any]]:
         """
         Identify best times to make calls based on success rates
         
         Args:
-            call_data: List of call documents
+            call_data: List of call documents (or their CallColumns)
             min_calls: Minimum number of calls required for a time slot to be considered
             
         Returns:
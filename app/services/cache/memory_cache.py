@@ -0,0 +1,175 @@
+"""
+In-process TTL cache for aggregator results
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+from datetime import datetime
+import copy
+import functools
+import time
+
+from app.services.cache.redis_service import RedisService
+
+# Seconds after an invalidation during which a user's reads skip the cache
+# (and go to the primary, see recently_invalidated) so they see their own write
+# even if secondaries lag
+_INVALIDATION_WINDOW = 10
+
+# Invalidations are shared between worker processes through a per-user Redis
+# key holding the wall-clock time of the user's last invalidation. It must
+# outlive every ttl_cache TTL so no worker can serve an entry cached before it.
+_INVALIDATION_KEY = "aggcache:invalidated:{user_id}"
+_INVALIDATION_KEY_TTL = 600  # seconds
+
+# user_id -> wall-clock time of the last invalidation made by this process
+# (still honoured when Redis is unavailable)
+_INVALIDATED_AT: Dict[str, float] = {}
+_INVALIDATED_AT_MAX_SIZE = 10_000
+
+
+def _normalize_key_part(value: Any) -> Any:
+    """
+    Normalize a cache key component
+    
+    Datetimes are truncated to the minute so "now"-relative date ranges
+    issued within the same minute share an entry.
+    """
+    if isinstance(value, datetime):
+        return value.replace(second=0, microsecond=0)
+    return value
+
+
+def _db_identity(db: Any) -> Tuple[str, str]:
+    """
+    Identify a database handle by name and read preference for cache keys
+    """
+    return (db.name, db.read_preference.name)
+
+
+def _record_invalidation(user_id: str, invalidated_at: float):
+    """
+    Remember when this process last invalidated a user's cached results
+    """
+    _INVALIDATED_AT.pop(user_id, None)
+    if len(_INVALIDATED_AT) >= _INVALIDATED_AT_MAX_SIZE:
+        # Evict the oldest entry (dicts keep insertion order)
+        _INVALIDATED_AT.pop(next(iter(_INVALIDATED_AT)))
+    _INVALIDATED_AT[user_id] = invalidated_at
+
+
+async def _last_invalidation(user_id: str) -> Optional[float]:
+    """
+    Wall-clock time of a user's last invalidation by any process, if known
+    """
+    shared = await RedisService().get(_INVALIDATION_KEY.format(user_id=user_id))
+    local = _INVALIDATED_AT.get(user_id)
+    
+    if shared is None:
+        return local
+    if local is None:
+        return shared
+    return max(shared, local)
+
+
+def _within_window(invalidated_at: Optional[float]) -> bool:
+    """
+    Whether an invalidation time falls inside the read-your-writes window
+    """
+    return (
+        invalidated_at is not None
+        and time.time() - invalidated_at < _INVALIDATION_WINDOW
+    )
+
+
+async def invalidate_user(user_id: str):
+    """
+    Mark a user's cached results stale in every worker process
+    
+    Records the invalidation locally and under the user's Redis key; each
+    worker compares cache hits against it and, for a few seconds, skips the
+    cache and reads from the primary (see recently_invalidated). Without
+    Redis only this process sees the invalidation.
+    """
+    invalidated_at = time.time()
+    _record_invalidation(user_id, invalidated_at)
+    await RedisService().set(
+        _INVALIDATION_KEY.format(user_id=user_id),
+        invalidated_at,
+        ttl=_INVALIDATION_KEY_TTL
+    )
+
+
+async def recently_invalidated(user_id: str) -> bool:
+    """
+    Whether a user's cached results were invalidated within the last few seconds
+    
+    Aggregators read from the primary while this holds, so a write followed
+    by a read doesn't see a lagging secondary.
+    """
+    return _within_window(await _last_invalidation(user_id))
+
+
+def ttl_cache(ttl: float, max_size: int = 10_000) -> Callable:
+    """
+    Cache an async per-user aggregator method for `ttl` seconds
+    
+    The decorated method must take `user_id` as its first argument after
+    `self`; entries are keyed by user_id, the instance's database handle
+    (from `self._get_db()`) and the remaining arguments. Callers get a deep
+    copy, so mutating a result never touches the cached entry.
+    
+    Entries computed before the user's last invalidation (see invalidate_user)
+    are never served, and the cache is bypassed for that user for a few
+    seconds after one. The wrapper also exposes `invalidate(user_id)` to drop
+    a user's entries from this process.
+    
+    Args:
+        ttl: Entry lifetime in seconds (at most _INVALIDATION_KEY_TTL)
+        max_size: Maximum number of entries (oldest evicted first)
+    """
+    def decorator(func: Callable) -> Callable:
+        # key -> (expires_at, computation start wall-clock time, result)
+        cache: Dict[Tuple, Tuple[float, float, Any]] = {}
+        
+        @functools.wraps(func)
+        async def wrapper(self, user_id: str, *args, **kwargs):
+            invalidated_at = await _last_invalidation(user_id)
+            if _within_window(invalidated_at):
+                return await func(self, user_id, *args, **kwargs)
+            
+            key = (
+                user_id,
+                _db_identity(await self._get_db()),
+                *(_normalize_key_part(arg) for arg in args),
+                *sorted((k, _normalize_key_part(v)) for k, v in kwargs.items())
+            )
+            now = time.monotonic()
+            
+            cached = cache.get(key)
+            if (
+                cached and cached[0] > now
+                and (invalidated_at is None or cached[1] > invalidated_at)
+            ):
+                return copy.deepcopy(cached[2])
+            
+            # Stamped with the start time, so a result whose query raced an
+            # invalidation is treated as stale
+            started_at = time.time()
+            result = await func(self, user_id, *args, **kwargs)
+            
+            cache.pop(key, None)
+            if len(cache) >= max_size:
+                # Evict the oldest entry (dicts keep insertion order)
+                cache.pop(next(iter(cache)))
+            cache[key] = (now + ttl, started_at, result)
+            
+            return copy.deepcopy(result)
+        
+        def invalidate(user_id: str):
+            for key in [k for k in cache if k[0] == user_id]:
+                cache.pop(key, None)
+        
+        wrapper.invalidate = invalidate
+        return wrapper
+    
+    return decorator
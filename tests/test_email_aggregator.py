@@ -0,0 +1,77 @@
+"""
+Tests for the email aggregator
+"""
+
+import asyncio
+
+from app.services.aggregators.email_aggregator import EmailAggregator
+
+
+class _FakeCursor:
+    def __init__(self, rows):
+        self._rows = rows
+    
+    async def to_list(self, length=None):
+        return self._rows
+
+
+class _FakeCampaigns:
+    """
+    email_campaigns stand-in: every matched user contributes one campaign
+    """
+    
+    def __init__(self):
+        self.pipelines = []
+    
+    def aggregate(self, pipeline, **kwargs):
+        self.pipelines.append(pipeline)
+        users = pipeline[0]["$match"]["user_id"]["$in"]
+        return _FakeCursor([{
+            "total_campaigns": len(users),
+            "total_sent": 100 * len(users),
+            "total_opened": 25 * len(users),
+            "total_clicked": 5 * len(users),
+            "total_bounced": 1 * len(users),
+            "total_unsubscribed": 0,
+            "overall_open_rate": 25.0,
+            "overall_click_rate": 5.0,
+            "overall_bounce_rate": 1.0,
+            "avg_open_rate": 25.0,
+            "avg_click_rate": 5.0,
+            "avg_bounce_rate": 1.0
+        }])
+
+
+class _FakeDatabase:
+    def __init__(self):
+        self.email_campaigns = _FakeCampaigns()
+
+
+def test_aggregate_many_users_batches_and_sums():
+    """Users are queried in $in batches of 500 and the totals summed"""
+    db = _FakeDatabase()
+    user_ids = [f"user_{i}" for i in range(1200)] + ["user_0"]
+    
+    totals = asyncio.run(EmailAggregator(db=db).aggregate_many_users(user_ids))
+    
+    batches = [p[0]["$match"]["user_id"]["$in"] for p in db.email_campaigns.pipelines]
+    assert [len(batch) for batch in batches] == [500, 500, 200]
+    assert sorted(sum(batches, [])) == sorted(set(user_ids))
+    assert all(p[0]["$match"]["status"] == "sent" for p in db.email_campaigns.pipelines)
+    
+    assert totals["total_campaigns"] == 1200
+    assert totals["total_sent"] == 120_000
+    assert totals["total_opened"] == 30_000
+    assert totals["overall_open_rate"] == 25.0
+    assert totals["avg_click_rate"] == 5.0
+
+
+def test_aggregate_many_users_without_users():
+    """An empty cohort returns empty totals without querying"""
+    db = _FakeDatabase()
+    
+    totals = asyncio.run(EmailAggregator(db=db).aggregate_many_users([]))
+    
+    assert db.email_campaigns.pipelines == []
+    assert totals["total_campaigns"] == 0
+    assert totals["overall_open_rate"] == 0.0
@@ -0,0 +1,41 @@
+"""
+Tests for the LLM client helpers
+"""
+
+import httpx
+
+from app.services.ai.llm_client import _extract_json_object, _is_retryable
+
+
+def _status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com/v1/messages")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def test_extract_json_object_ignores_braces_in_strings():
+    """Braces and escaped quotes inside string values don't end the object"""
+    text = 'Sure! {"summary": "use {braces} and \\"}\\" freely", "n": {"a": 1}} trailing }'
+    
+    assert _extract_json_object(text) == (
+        '{"summary": "use {braces} and \\"}\\" freely", "n": {"a": 1}}'
+    )
+
+
+def test_extract_json_object_without_complete_object():
+    """Text without a balanced object yields None"""
+    assert _extract_json_object("no json here") is None
+    assert _extract_json_object('{"summary": "cut off') is None
+
+
+def test_is_retryable():
+    """Rate limits, 5xx and transport errors retry; client errors don't"""
+    assert _is_retryable(_status_error(429))
+    assert _is_retryable(_status_error(503))
+    assert _is_retryable(_status_error(529))
+    assert _is_retryable(httpx.ReadTimeout("timed out"))
+    assert _is_retryable(httpx.ConnectError("refused"))
+    
+    assert not _is_retryable(_status_error(400))
+    assert not _is_retryable(_status_error(401))
+    assert not _is_retryable(ValueError("bad JSON"))
@@ -0,0 +1,170 @@
+"""
+Tests for the in-process aggregator cache
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.aggregators import inbox_aggregator
+from app.services.aggregators.inbox_aggregator import InboxAggregator
+from app.services.cache import memory_cache
+from app.services.cache.memory_cache import invalidate_user, ttl_cache
+from app.services.cache.redis_service import RedisService
+
+
+class _FakeReadPreference:
+    def __init__(self, name):
+        self.name = name
+
+
+class _FakeDatabase:
+    def __init__(self, name="cms", read_preference="SecondaryPreferred"):
+        self.name = name
+        self.read_preference = _FakeReadPreference(read_preference)
+
+
+class _Aggregator:
+    """
+    Minimal aggregator counting how often the cached method really runs
+    """
+    
+    def __init__(self, db):
+        self.db = db
+        self.calls = 0
+    
+    async def _get_db(self, user_id=None):
+        return self.db
+    
+    @ttl_cache(ttl=60)
+    async def aggregate(self, user_id, days):
+        self.calls += 1
+        return {"user_id": user_id, "days": days, "platforms": []}
+
+
+@pytest.fixture(autouse=True)
+def _no_redis(monkeypatch):
+    """Stand in for Redis with a dict and isolate each test's entries"""
+    shared = {}
+    
+    async def get(self, key):
+        return shared.get(key)
+    
+    async def set(self, key, value, ttl=None):
+        shared[key] = value
+        return True
+    
+    monkeypatch.setattr(RedisService, "get", get)
+    monkeypatch.setattr(RedisService, "set", set)
+    monkeypatch.setattr(memory_cache, "_INVALIDATED_AT", {})
+    yield shared
+    
+    for user_id in ("user_1", "user_2"):
+        _Aggregator.aggregate.invalidate(user_id)
+
+
+def test_hits_return_deep_copies():
+    """Mutating a returned result never touches the cached entry"""
+    aggregator = _Aggregator(_FakeDatabase())
+    
+    async def run():
+        first = await aggregator.aggregate("user_1", 7)
+        first["platforms"].append("mutated")
+        return await aggregator.aggregate("user_1", 7)
+    
+    second = asyncio.run(run())
+    
+    assert aggregator.calls == 1
+    assert second["platforms"] == []
+
+
+def test_entries_are_keyed_per_database():
+    """The same arguments against another database handle miss the cache"""
+    secondary = _Aggregator(_FakeDatabase(read_preference="SecondaryPreferred"))
+    primary = _Aggregator(_FakeDatabase(read_preference="Primary"))
+    other = _Aggregator(_FakeDatabase(name="other"))
+    
+    async def run():
+        for aggregator in (secondary, primary, other, secondary):
+            await aggregator.aggregate("user_1", 7)
+    
+    asyncio.run(run())
+    
+    assert (secondary.calls, primary.calls, other.calls) == (1, 1, 1)
+
+
+def test_invalidate_drops_only_that_users_entries():
+    """wrapper.invalidate(user_id) leaves other users' entries cached"""
+    aggregator = _Aggregator(_FakeDatabase())
+    
+    async def run():
+        await aggregator.aggregate("user_1", 7)
+        await aggregator.aggregate("user_2", 7)
+        _Aggregator.aggregate.invalidate("user_1")
+        await aggregator.aggregate("user_1", 7)
+        await aggregator.aggregate("user_2", 7)
+    
+    asyncio.run(run())
+    
+    assert aggregator.calls == 3
+
+
+def test_invalidation_bypasses_cache_inside_window(monkeypatch):
+    """Right after invalidate_user, reads skip the cache; later ones refill it"""
+    aggregator = _Aggregator(_FakeDatabase())
+    
+    async def run():
+        await aggregator.aggregate("user_1", 7)
+        await invalidate_user("user_1")
+        await aggregator.aggregate("user_1", 7)
+        await aggregator.aggregate("user_1", 7)
+        
+        # Past the window: the pre-invalidation entry is stale, so the
+        # first read recomputes and the next one hits
+        monkeypatch.setattr(memory_cache, "_INVALIDATION_WINDOW", 0)
+        await aggregator.aggregate("user_1", 7)
+        await aggregator.aggregate("user_1", 7)
+    
+    asyncio.run(run())
+    
+    assert aggregator.calls == 4
+
+
+def test_invalidations_from_other_workers_are_honoured(_no_redis):
+    """An invalidation recorded only in Redis still marks entries stale"""
+    aggregator = _Aggregator(_FakeDatabase())
+    
+    async def run():
+        await aggregator.aggregate("user_1", 7)
+        _no_redis[memory_cache._INVALIDATION_KEY.format(user_id="user_1")] = (
+            memory_cache.time.time()
+        )
+        await aggregator.aggregate("user_1", 7)
+    
+    asyncio.run(run())
+    
+    assert aggregator.calls == 2
+
+
+def test_reads_go_to_primary_inside_window(monkeypatch):
+    """Aggregators read from the primary right after an invalidation"""
+    handles = {False: _FakeDatabase(read_preference="Primary"), True: _FakeDatabase()}
+    
+    async def get_database(analytics=False):
+        return handles[analytics]
+    
+    monkeypatch.setattr(inbox_aggregator, "get_database", get_database)
+    aggregator = InboxAggregator()
+    
+    async def run():
+        before = await aggregator._get_db("user_1")
+        await invalidate_user("user_1")
+        after = await aggregator._get_db("user_1")
+        other_user = await aggregator._get_db("user_2")
+        return before, after, other_user
+    
+    before, after, other_user = asyncio.run(run())
+    
+    assert before is handles[True]
+    assert after is handles[False]
+    assert other_user is handles[True]
@@ -2,3 +2,39 @@
 Tests for sentiment API
 """
 
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.sentiment import SentimentResult
+
+
+def test_sentiment_result_defaults_missing_fields():
+    """Missing fields take neutral defaults"""
+    result = SentimentResult.model_validate({})
+    
+    assert result.sentiment == "neutral"
+    assert result.score == 0.0
+    assert result.confidence == 0.0
+    assert result.keywords == []
+    assert result.emotions == {}
+
+
+def test_sentiment_result_normalizes_label_case():
+    """Labels are accepted in any case"""
+    result = SentimentResult.model_validate({"sentiment": " Positive ", "score": 0.4})
+    
+    assert result.sentiment == "positive"
+
+
+@pytest.mark.parametrize("analysis", [
+    {"sentiment": "ecstatic"},
+    {"score": 1.5},
+    {"confidence": -0.1},
+    {"keywords": "not a list"},
+    {"emotions": {"joy": "very"}},
+])
+def test_sentiment_result_rejects_invalid_values(analysis):
+    """Unknown labels, out-of-range numbers and wrong types raise"""
+    with pytest.raises(ValidationError):
+        SentimentResult.model_validate(analysis)
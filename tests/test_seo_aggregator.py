@@ -0,0 +1,71 @@
+"""
+Tests for the SEO aggregator
+"""
+
+import numpy as np
+
+from app.services.aggregators.seo_aggregator import (
+    _RowTable,
+    _keyword_rows,
+    _page_rows,
+    _top_indices
+)
+
+
+def _table(clicks, impressions, positions, counts) -> _RowTable:
+    return _RowTable(
+        keys=[f"key_{i}" for i in range(len(clicks))],
+        clicks=np.array(clicks, dtype=np.int64),
+        impressions=np.array(impressions, dtype=np.int64),
+        positions=np.array(positions, dtype=np.float64),
+        counts=np.array(counts, dtype=np.int64),
+        top_10=np.zeros(len(clicks), dtype=bool)
+    )
+
+
+def test_top_indices_orders_by_clicks():
+    """The most-clicked IDs come first"""
+    clicks = np.array([5, 40, 10, 30])
+    
+    assert _top_indices(clicks, 3) == [1, 3, 2]
+
+
+def test_top_indices_ties_keep_first_seen_order():
+    """Ties, including at the cut-off, keep first-seen order like a stable sort"""
+    clicks = np.array([3, 7, 3, 7, 3, 1])
+    
+    assert _top_indices(clicks, 4) == [1, 3, 0, 2]
+    assert _top_indices(clicks, 10) == [1, 3, 0, 2, 4, 5]
+    assert _top_indices(clicks, 4) == sorted(
+        range(clicks.size), key=lambda i: -clicks[i]
+    )[:4]
+
+
+def test_top_indices_without_keys():
+    """No keys or a zero limit selects nothing"""
+    assert _top_indices(np.array([], dtype=np.int64), 5) == []
+    assert _top_indices(np.array([1, 2]), 0) == []
+
+
+def test_rows_round_like_python():
+    """CTR and positions match round(x, 2), not numpy's half-to-even"""
+    table = _table(
+        clicks=[1, 40, 0],
+        impressions=[4000, 80, 0],
+        positions=[62653.0, 62653.0, 17.0],
+        counts=[40, 40, 3]
+    )
+    indices = [0, 1, 2]
+    
+    pages = dict(_page_rows(table, indices))
+    keywords = dict(_keyword_rows(table, indices))
+    
+    assert pages["key_0"]["ctr"] == round(1 / 4000 * 100, 2) == 0.03
+    assert pages["key_1"]["position"] == round(62653 / 40, 2) == 1566.33
+    # Pages without clicks keep the raw position sum
+    assert pages["key_2"]["position"] == 17.0
+    assert pages["key_2"]["ctr"] == 0.0
+    
+    assert keywords["key_0"]["ctr"] == 0.03
+    assert keywords["key_0"]["position"] == 1566.33
+    assert keywords["key_2"]["position"] == round(17 / 3, 2)